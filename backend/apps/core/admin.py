@@ -1,9 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import User, Client, ActivationCode, AuditLog
+from .admin_mixins import LargeTableAdminMixin
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(LargeTableAdminMixin, UserAdmin):
+    keyset_ordering = ('username',)
     list_display = ('username', 'email', 'first_name', 'last_name', 'role', 'tenant', 'is_staff')
     list_filter = ('role', 'tenant', 'is_staff', 'is_superuser', 'is_active')
     fieldsets = UserAdmin.fieldsets + (
@@ -19,13 +21,15 @@ class ClientAdmin(admin.ModelAdmin):
     search_fields = ('name', 'schema_name')
 
 @admin.register(ActivationCode)
-class ActivationCodeAdmin(admin.ModelAdmin):
+class ActivationCodeAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    keyset_ordering = ('-id',)
     list_display = ('code', 'tenant', 'uses_left', 'expires_at', 'created_at')
     list_filter = ('tenant', 'expires_at')
     search_fields = ('code',)
 
 @admin.register(AuditLog)
-class AuditLogAdmin(admin.ModelAdmin):
+class AuditLogAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    keyset_ordering = ('-timestamp', '-id')
     list_display = ('user', 'action', 'get_target', 'timestamp', 'ip_address')
     list_filter = ('action', 'timestamp')
     search_fields = ('user__username', 'action', 'details')
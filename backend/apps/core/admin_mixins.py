@@ -0,0 +1,224 @@
+"""
+Admin changelist helpers for very large tables.
+
+- EstimatedCountPaginator: planner estimates instead of SELECT COUNT(*) above
+  ADMIN_COUNT_ESTIMATE_THRESHOLD rows.
+- Keyset "next page" navigation on the admin's default ordering, so paging
+  forward never needs a deep OFFSET.
+- Filter sidebar queries run under ADMIN_FILTER_QUERY_TIMEOUT_MS; a filter
+  whose choices cannot be computed in time is hidden instead of blocking the page.
+"""
+import base64
+import json
+import logging
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.utils import get_fields_from_path
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import OperationalError, connection, models, transaction
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+KEYSET_VAR = 'after'
+
+
+@contextmanager
+def statement_timeout(milliseconds):
+    """Run the enclosed queries with a Postgres statement_timeout."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SHOW statement_timeout')
+        previous = cursor.fetchone()[0]
+        cursor.execute('SET LOCAL statement_timeout = %s', [int(milliseconds)])
+        yield
+        # On error the savepoint rollback already restores the old value.
+        cursor.execute('SET LOCAL statement_timeout = %s', [previous])
+
+
+def estimate_count(queryset):
+    """
+    Planner row estimate for ``queryset``: ``pg_class.reltuples`` (summed over
+    partitions) when unfiltered, the EXPLAIN estimate otherwise. ``None`` if
+    the table has never been analyzed.
+    """
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT SUM(c.reltuples) FILTER (WHERE c.reltuples >= 0)
+                FROM pg_partition_tree(%s::regclass) t
+                JOIN pg_class c ON c.oid = t.relid
+                WHERE t.isleaf
+                """,
+                [queryset.model._meta.db_table],
+            )
+            estimate = cursor.fetchone()[0]
+        if estimate:
+            return int(estimate)
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that trusts planner estimates for large result sets."""
+
+    is_estimated = False
+
+    @cached_property
+    def count(self):
+        threshold = settings.ADMIN_COUNT_ESTIMATE_THRESHOLD
+        try:
+            estimate = estimate_count(self.object_list)
+        except Exception:
+            logger.exception('Count estimate failed for %s', self.object_list.model.__name__)
+            estimate = None
+        if estimate is not None and estimate > threshold:
+            self.is_estimated = True
+            return estimate
+        return self.object_list.count()
+
+    def page(self, number):
+        if not self.is_estimated:
+            return super().page(number)
+        # An estimate can be off either way; never clip the page to it.
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class TimeBoundedAllValuesFieldListFilter(admin.AllValuesFieldListFilter):
+    """SELECT DISTINCT over the whole table, bounded by a statement timeout."""
+    timed_out = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        try:
+            with statement_timeout(settings.ADMIN_FILTER_QUERY_TIMEOUT_MS):
+                self.lookup_choices = list(self.lookup_choices)
+        except OperationalError:
+            logger.warning('Admin filter %s timed out; hiding it', self.field_path)
+            self.lookup_choices = []
+            self.timed_out = True
+
+    def has_output(self):
+        # AllValuesFieldListFilter always has output, even with no choices.
+        return not self.timed_out and super().has_output()
+
+
+class TimeBoundedRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    timed_out = False
+
+    def field_choices(self, field, request, model_admin):
+        try:
+            with statement_timeout(settings.ADMIN_FILTER_QUERY_TIMEOUT_MS):
+                return list(super().field_choices(field, request, model_admin))
+        except OperationalError:
+            logger.warning('Admin filter %s timed out; hiding it', self.field_path)
+            self.timed_out = True
+            return []
+
+    def has_output(self):
+        return not self.timed_out and super().has_output()
+
+
+class KeysetChangeList(ChangeList):
+    """ChangeList that adds an ``?after=<token>`` keyset "next page" link."""
+
+    def __init__(self, request, *args, **kwargs):
+        # Unknown query parameters are treated as field lookups by ChangeList,
+        # so the keyset token is taken out before it parses the request.
+        request.GET = request.GET.copy()
+        self._keyset_token = request.GET.pop(KEYSET_VAR, [None])[-1]
+        self.keyset_next_url = None
+        super().__init__(request, *args, **kwargs)
+
+    def _keyset_fields(self):
+        return [name.lstrip('-') for name in self.keyset_ordering]
+
+    def decode_keyset(self, token):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            fields = [self.opts.get_field(name) for name in self._keyset_fields()]
+            if len(values) != len(fields):
+                return None
+            return [field.to_python(value) for field, value in zip(fields, values)]
+        except Exception:
+            return None
+
+    def encode_keyset(self, obj):
+        values = [getattr(obj, self.opts.get_field(name).attname) for name in self._keyset_fields()]
+        return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode('ascii')
+
+    def get_queryset(self, request):
+        # Called at the end of ChangeList.__init__, once model_admin and
+        # params are available.
+        self.keyset_ordering = self.model_admin.keyset_ordering
+        self.keyset_enabled = bool(self.keyset_ordering) and ORDER_VAR not in self.params
+        self.keyset_after = None
+        if self._keyset_token and self.keyset_enabled:
+            self.keyset_after = self.decode_keyset(self._keyset_token)
+
+        qs = super().get_queryset(request)
+        if self.keyset_after is None:
+            return qs
+        descending = self.keyset_ordering[0].startswith('-')
+        fields = self._keyset_fields()
+        values = self.keyset_after
+        if len(fields) == 1:
+            return qs.filter(**{f'{fields[0]}__{"lt" if descending else "gt"}': values[0]})
+        # (a, b) < (x, y)  <=>  a <= x AND NOT (a = x AND b >= y), which keeps
+        # the range condition on the leading index column.
+        first, second = fields
+        return qs.filter(**{f'{first}__{"lte" if descending else "gte"}': values[0]}).exclude(
+            **{first: values[0], f'{second}__{"gte" if descending else "lte"}': values[1]}
+        )
+
+    def get_results(self, request):
+        super().get_results(request)
+        if not self.keyset_enabled or not self.multi_page or (self.show_all and self.can_show_all):
+            return
+        rows = list(self.result_list)
+        if len(rows) == self.list_per_page:
+            self.keyset_next_url = self.get_query_string(
+                {KEYSET_VAR: self.encode_keyset(rows[-1])}, remove=[PAGE_VAR]
+            )
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin mixin for tables too large for COUNT(*) and OFFSET paging.
+
+    ``keyset_ordering`` is the default ordering and must end with a unique
+    field (one unique field, or a field followed by the primary key).
+    """
+    keyset_ordering = None
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/keyset_change_list.html'
+
+    def get_ordering(self, request):
+        return self.keyset_ordering or super().get_ordering(request)
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_list_filter(self, request):
+        list_filter = []
+        for item in super().get_list_filter(request):
+            if isinstance(item, str):
+                item = self._bounded_list_filter(item)
+            list_filter.append(item)
+        return list_filter
+
+    def _bounded_list_filter(self, field_path):
+        field = get_fields_from_path(self.model, field_path)[-1]
+        if field.is_relation:
+            return (field_path, TimeBoundedRelatedFieldListFilter)
+        if field.flatchoices or isinstance(field, (models.BooleanField, models.DateField)):
+            # These filters build their choices without querying.
+            return field_path
+        return (field_path, TimeBoundedAllValuesFieldListFilter)
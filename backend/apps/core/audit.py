@@ -0,0 +1,164 @@
+"""
+Buffered AuditLog writer.
+
+Audit events are queued in-process and written with ``bulk_create`` in batches
+instead of one INSERT per signal. A batch is flushed when it reaches
+``AUDIT_LOG_BATCH_SIZE`` entries or when ``AUDIT_LOG_FLUSH_INTERVAL`` seconds
+have passed, whichever comes first. Pending entries are flushed on interpreter
+exit and on Celery worker shutdown, so nothing buffered is lost.
+
+Set ``AUDIT_LOG_MODE = 'sync'`` to write every event immediately (tests, scripts).
+"""
+import atexit
+import logging
+import os
+import threading
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class AuditBuffer:
+    """Thread-safe in-process queue of unsaved AuditLog instances."""
+
+    def __init__(self, batch_size=200, flush_interval=2.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._entries = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def add(self, entry):
+        self._ensure_flusher()
+        with self._lock:
+            self._entries.append(entry)
+            full = len(self._entries) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write every pending entry. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                entries, self._entries = self._entries, []
+            if not entries:
+                return 0
+            written = 0
+            for start in range(0, len(entries), self.batch_size):
+                written += _write_batch(entries[start:start + self.batch_size])
+            return written
+
+    def _ensure_flusher(self):
+        # Gunicorn and Celery fork after import, so the flusher thread is
+        # started lazily and restarted in every child process.
+        pid = os.getpid()
+        if self._pid == pid and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread and self._thread.is_alive():
+                return
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name='audit-log-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Audit log flush failed')
+            finally:
+                close_old_connections()
+
+
+def _write_batch(entries):
+    from .models import AuditLog
+
+    try:
+        with transaction.atomic():
+            AuditLog.objects.bulk_create(entries)
+        return len(entries)
+    except Exception:
+        logger.exception('Audit batch insert failed, retrying %d entries one by one', len(entries))
+
+    # One bad row (e.g. an actor deleted before the flush) must not drop the batch.
+    written = 0
+    for entry in entries:
+        try:
+            with transaction.atomic():
+                AuditLog.objects.bulk_create([entry])
+            written += 1
+        except Exception:
+            entry.user = None
+            try:
+                with transaction.atomic():
+                    AuditLog.objects.bulk_create([entry])
+                written += 1
+            except Exception:
+                logger.exception('Dropping audit entry %s: %s', entry.action, entry.details)
+    return written
+
+
+_buffer = AuditBuffer(
+    batch_size=getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 200),
+    flush_interval=getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 2.0),
+)
+
+
+def is_sync_mode():
+    return getattr(settings, 'AUDIT_LOG_MODE', 'buffered') == 'sync'
+
+
+def record(action, user=None, details=None, ip_address=None):
+    """
+    Queue an audit event.
+
+    The event is captured immediately (timestamp included) but only handed to
+    the buffer once the surrounding transaction commits, so rolled back
+    changes are never audited.
+    """
+    from .models import AuditLog
+
+    # Only the id is stored; request.user may be a claims-only TokenUser.
+    user_id = user.pk if user is not None and user.is_authenticated else None
+
+    entry = AuditLog(
+        user_id=user_id,
+        action=action,
+        details=details if details is not None else {},
+        ip_address=ip_address,
+        timestamp=timezone.now(),
+    )
+
+    if is_sync_mode():
+        entry.save()
+        return entry
+
+    transaction.on_commit(lambda: _buffer.add(entry))
+    return entry
+
+
+def flush():
+    """Synchronously write all buffered events."""
+    return _buffer.flush()
+
+
+def _flush_on_shutdown(*args, **kwargs):
+    try:
+        flush()
+    except Exception:
+        logger.exception('Audit log flush on shutdown failed')
+
+
+atexit.register(_flush_on_shutdown)
+worker_shutdown.connect(_flush_on_shutdown, weak=False)
+worker_process_shutdown.connect(_flush_on_shutdown, weak=False)
@@ -0,0 +1,139 @@
+"""
+JWT authentication without a User query per request.
+
+CachedJWTAuthentication keeps the authenticated user (with its tenant) in the
+shared cache and in a short per-process TTL cache. Every entry is tied to a
+per-user version token that is replaced on each User save or delete, so a
+change is visible to all workers on their next request.
+
+ClaimsJWTAuthentication additionally trusts the ``role`` and ``tenant_id``
+claims embedded at login for safe (read-only) requests and never touches the
+cache or the database for them. Claims stay valid until the access token
+expires, so only use it on endpoints where that staleness is acceptable.
+"""
+import copy
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .tenant_resolution import LocalTTLCache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'auth:user:{}:version'
+USER_KEY = 'auth:user:{}:{}'
+
+_local = LocalTTLCache(
+    maxsize=getattr(settings, 'AUTH_USER_CACHE_LOCAL_SIZE', 10000),
+    ttl=getattr(settings, 'AUTH_USER_CACHE_LOCAL_TTL', 10),
+)
+
+
+def _shared_cache():
+    return caches['default']
+
+
+def invalidate_user(user_id):
+    """Give ``user_id`` a new version, orphaning every cached copy."""
+    user_id = str(user_id)
+    _local.delete(user_id)
+    try:
+        _shared_cache().set(VERSION_KEY.format(user_id), uuid.uuid4().hex, None)
+    except Exception:
+        logger.warning('Could not invalidate cached user %s', user_id)
+
+
+def get_cached_user(user_model, user_id):
+    """
+    Return the user with ``user_id`` (tenant included) or ``None``.
+
+    Costs one cache round trip (the version check) on a local hit and falls
+    back to the database if the cache is unavailable.
+    """
+    user_id = str(user_id)
+    cache = _shared_cache()
+    try:
+        version = cache.get(VERSION_KEY.format(user_id))
+        if version is None:
+            cache.add(VERSION_KEY.format(user_id), uuid.uuid4().hex, None)
+            version = cache.get(VERSION_KEY.format(user_id))
+    except Exception:
+        logger.warning('User cache unavailable, loading user %s from the database', user_id)
+        return user_model.objects.select_related('tenant').filter(pk=user_id).first()
+
+    cached = _local.get(user_id)
+    if cached is not None and cached[0] == version:
+        return copy.copy(cached[1])
+
+    key = USER_KEY.format(user_id, version)
+    user = cache.get(key)
+    if user is None:
+        user = user_model.objects.select_related('tenant').filter(pk=user_id).first()
+        if user is None:
+            return None
+        cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TTL', 300))
+    _local.set(user_id, (version, user))
+    return copy.copy(user)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that reads the user through the versioned user cache."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        user = get_cached_user(self.user_model, user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return user
+
+
+class ClaimsTokenUser(TokenUser):
+    """Stateless user exposing the role and tenant claims added at login."""
+
+    @property
+    def role(self):
+        return self.token.get('role')
+
+    @property
+    def tenant_id(self):
+        return self.token.get('tenant_id')
+
+
+class ClaimsJWTAuthentication(CachedJWTAuthentication):
+    """
+    Stateless for safe methods (user built from token claims), cached user
+    lookup for everything else.
+    """
+
+    def authenticate(self, request):
+        self._safe_request = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if not self._safe_request:
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM not in validated_token or 'role' not in validated_token:
+            # Tokens issued before the claims existed fall back to the lookup.
+            return super().get_user(validated_token)
+        return ClaimsTokenUser(validated_token)
@@ -0,0 +1,123 @@
+"""
+Tenant-aware caching.
+
+The ``tenant`` cache alias builds its keys with ``django_tenants.cache.make_key``,
+so every key is namespaced by the current ``connection.schema_name`` and
+tenants never see each other's entries. The ``default`` alias stays global
+(tenant resolution, authenticated users).
+
+Keys can belong to a *group* (e.g. ``catalog``). A group has a version stored
+in the cache; ``invalidate_group`` replaces it, which orphans every key of the
+group for the current tenant at once.
+
+``get_or_set`` protects expensive values from stampedes: a cold key is built
+by one process while the others wait for it, and a warm key is rebuilt early
+with a probability that grows as it approaches expiry (XFetch), so the hot
+keys are refreshed before they ever expire for everyone.
+
+Tests can swap both aliases for local memory with ``local_caches()``.
+"""
+import logging
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'tenant'
+GROUP_VERSION_KEY = 'group:{}:version'
+LOCK_KEY = 'lock:{}'
+LOCK_POLL_INTERVAL = 0.05
+
+
+def tenant_cache():
+    return caches[CACHE_ALIAS]
+
+
+def group_version(group):
+    cache = tenant_cache()
+    version_key = GROUP_VERSION_KEY.format(group)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, time.time_ns(), None)
+        version = cache.get(version_key)
+    return version
+
+
+def make_group_key(group, key):
+    return f'{group}:{group_version(group)}:{key}'
+
+
+def invalidate_group(group):
+    """Orphan every key of ``group`` for the current tenant."""
+    try:
+        # A fresh timestamp, not a counter: an evicted version key must never
+        # come back with a value some stale entries were written under.
+        tenant_cache().set(GROUP_VERSION_KEY.format(group), time.time_ns(), None)
+    except Exception:
+        logger.warning('Could not invalidate cache group %s', group)
+
+
+def _should_refresh(delta, expires_at, beta):
+    # XFetch: refresh early with probability rising towards expiry, scaled by
+    # how long the value took to compute.
+    return time.time() - delta * beta * math.log(random.random() or 1e-12) >= expires_at
+
+
+def get_or_set(key, producer, timeout, group=None, beta=1.0, lock_timeout=10):
+    """
+    Return the cached value for ``key`` or build it with ``producer()``.
+
+    Only one caller rebuilds a missing key; others wait up to ``lock_timeout``
+    seconds for its result before building it themselves.
+    """
+    cache = tenant_cache()
+    try:
+        if group:
+            key = make_group_key(group, key)
+        entry = cache.get(key)
+    except Exception:
+        logger.warning('Tenant cache unavailable, computing %s directly', key)
+        return producer()
+
+    lock_key = LOCK_KEY.format(key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        if not _should_refresh(delta, expires_at, beta):
+            return value
+        # Early refresh: only the lock holder rebuilds; everyone else keeps
+        # serving the still valid value.
+        if not cache.add(lock_key, 1, lock_timeout):
+            return value
+        locked = True
+    else:
+        locked = cache.add(lock_key, 1, lock_timeout)
+        deadline = time.monotonic() + lock_timeout
+        while not locked and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+
+    try:
+        started = time.time()
+        value = producer()
+        delta = time.time() - started
+        cache.set(key, (value, delta, time.time() + timeout), timeout)
+        return value
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def local_caches():
+    """``override_settings`` replacing every cache alias with local memory."""
+    from django.test.utils import override_settings
+
+    return override_settings(CACHES={
+        alias: {**config, 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': alias}
+        for alias, config in settings.CACHES.items()
+    })
@@ -0,0 +1,121 @@
+"""
+Per-request audit context (acting user and client IP).
+
+Backed by ``contextvars`` so it is isolated per thread *and* per asyncio task,
+which makes it correct under WSGI, ASGI/async views and ``sync_to_async``.
+The context is forwarded to Celery tasks as message headers, so audit rows
+written by a task are attributed to the user who triggered it.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+
+_request = contextvars.ContextVar('audit_request', default=None)
+_user = contextvars.ContextVar('audit_user', default=None)
+_user_id = contextvars.ContextVar('audit_user_id', default=None)
+_ip = contextvars.ContextVar('audit_ip', default=None)
+
+USER_HEADER = 'audit_user_id'
+IP_HEADER = 'audit_ip'
+
+
+def get_current_user():
+    user = _user.get()
+    if user is not None:
+        return user
+    request = _request.get()
+    if request is not None:
+        # Read at call time: DRF authenticates (JWT) inside the view and
+        # writes the user back onto the underlying HttpRequest.
+        return getattr(request, 'user', None)
+    user_id = _user_id.get()
+    if user_id is not None:
+        from django.contrib.auth import get_user_model
+        user = get_user_model().objects.filter(pk=user_id).first()
+        _user.set(user)
+    return user
+
+
+def get_current_ip():
+    return _ip.get()
+
+
+def get_client_ip(request):
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def set_audit_context(request=None, user=None, user_id=None, ip=None):
+    """Set the audit context; returns tokens for ``reset_audit_context``."""
+    return (
+        _request.set(request),
+        _user.set(user),
+        _user_id.set(user_id),
+        _ip.set(ip),
+    )
+
+
+def reset_audit_context(tokens):
+    for var, token in zip((_request, _user, _user_id, _ip), tokens):
+        var.reset(token)
+
+
+@contextmanager
+def audit_context(user=None, ip=None):
+    """Attribute audit rows written inside the block to ``user`` / ``ip``."""
+    tokens = set_audit_context(user=user, ip=ip)
+    try:
+        yield
+    finally:
+        reset_audit_context(tokens)
+
+
+def _current_user_id():
+    user = _user.get()
+    if user is None:
+        request = _request.get()
+        user = getattr(request, 'user', None) if request is not None else None
+    if user is not None and getattr(user, 'is_authenticated', False):
+        return str(user.pk)
+    return _user_id.get()
+
+
+@before_task_publish.connect(weak=False)
+def _attach_audit_headers(headers=None, **kwargs):
+    if headers is None:
+        return
+    user_id = _current_user_id()
+    if user_id is not None:
+        headers.setdefault(USER_HEADER, user_id)
+    ip = get_current_ip()
+    if ip is not None:
+        headers.setdefault(IP_HEADER, ip)
+
+
+_task_tokens = {}
+
+
+def _task_header(task, name):
+    value = getattr(task.request, name, None)
+    if value is None:
+        value = (getattr(task.request, 'headers', None) or {}).get(name)
+    return value
+
+
+@task_prerun.connect(weak=False)
+def _enter_task_context(task_id=None, task=None, **kwargs):
+    # The acting user is loaded lazily, only if the task writes an audit row.
+    _task_tokens[task_id] = set_audit_context(
+        user_id=_task_header(task, USER_HEADER),
+        ip=_task_header(task, IP_HEADER),
+    )
+
+
+@task_postrun.connect(weak=False)
+def _exit_task_context(task_id=None, **kwargs):
+    tokens = _task_tokens.pop(task_id, None)
+    if tokens is not None:
+        reset_audit_context(tokens)
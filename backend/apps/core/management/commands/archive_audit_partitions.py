@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.partitions import archive_expired_partitions
+
+
+class Command(BaseCommand):
+    help = 'Detach AuditLog partitions past the retention window, archive them as gzip JSONL and drop them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            default=settings.AUDIT_LOG_RETENTION_MONTHS,
+            help='Number of past months to keep in the database.',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=str(settings.AUDIT_LOG_ARCHIVE_DIR),
+            help='Directory that receives <partition>.jsonl.gz files.',
+        )
+
+    def handle(self, *args, **options):
+        archived = archive_expired_partitions(options['retention_months'], options['archive_dir'])
+        for path, rows in archived:
+            self.stdout.write(f'Archived {rows} rows to {path}')
+        self.stdout.write(self.style.SUCCESS(f'{len(archived)} partition(s) archived.'))
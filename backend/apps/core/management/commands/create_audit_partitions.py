@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.partitions import ensure_partitions
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly AuditLog partitions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=settings.AUDIT_LOG_PARTITIONS_AHEAD,
+            help='Number of future months to create besides the current one.',
+        )
+
+    def handle(self, *args, **options):
+        created = ensure_partitions(months_ahead=options['months_ahead'])
+        for name in created:
+            self.stdout.write(f'Created {name}')
+        self.stdout.write(self.style.SUCCESS(f'{len(created)} partition(s) created.'))
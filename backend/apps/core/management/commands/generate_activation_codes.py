@@ -0,0 +1,54 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.core.models import Client
+from apps.core.services import bulk_create_activation_codes, export_activation_codes
+
+
+class Command(BaseCommand):
+    help = 'Generate activation codes for a tenant in bulk (COPY) and optionally export them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('schema_name', help='Schema name of the tenant the codes belong to.')
+        parser.add_argument('--count', type=int, required=True, help='Number of codes to create.')
+        parser.add_argument('--uses', type=int, default=1, help='Redemptions allowed per code.')
+        parser.add_argument('--expires-days', type=int, default=365, help='Days until the codes expire.')
+        parser.add_argument('--length', type=int, default=10, help='Random characters per code.')
+        parser.add_argument('--prefix', default='', help='Fixed prefix, e.g. a district abbreviation.')
+        parser.add_argument('--output', help='Write the generated codes to this file, one per line.')
+
+    def handle(self, *args, **options):
+        try:
+            tenant = Client.objects.get(schema_name=options['schema_name'])
+        except Client.DoesNotExist:
+            raise CommandError(f"Tenant '{options['schema_name']}' not found.")
+        if options['count'] < 1:
+            raise CommandError('--count must be positive.')
+        if len(options['prefix']) + options['length'] > 50:
+            raise CommandError('Codes are limited to 50 characters.')
+
+        started = time.perf_counter()
+        try:
+            created_at = bulk_create_activation_codes(
+                tenant,
+                count=options['count'],
+                uses_left=options['uses'],
+                expires_at=timezone.now() + timedelta(days=options['expires_days']),
+                length=options['length'],
+                prefix=options['prefix'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                export_activation_codes(tenant, created_at, output)
+            self.stdout.write(f"Codes written to {options['output']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['count']} code(s) created for {tenant.name} in {elapsed:.1f}s."
+        ))
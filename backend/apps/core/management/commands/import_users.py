@@ -0,0 +1,65 @@
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import Client, ImportStatus, UserImport
+from apps.core.user_import import run_import
+
+
+class Command(BaseCommand):
+    help = 'Import users from a CSV/XLSX file into a tenant, or resume an earlier import.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='CSV or XLSX file with a header row.')
+        parser.add_argument('--tenant', help='Schema name of the tenant the users belong to.')
+        parser.add_argument('--resume', type=int, help='Resume the UserImport with this id.')
+        parser.add_argument('--chunk-size', type=int, help='Rows per committed chunk.')
+        parser.add_argument('--workers', type=int, help='Password hashing processes.')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            try:
+                user_import = UserImport.objects.select_related('tenant').get(pk=options['resume'])
+            except UserImport.DoesNotExist:
+                raise CommandError(f"UserImport {options['resume']} not found.")
+            if user_import.status == ImportStatus.COMPLETED:
+                raise CommandError(f'UserImport {user_import.pk} is already completed.')
+            self.stdout.write(f'Resuming import {user_import.pk} after row {user_import.processed_rows}')
+        else:
+            user_import = self._create_import(options)
+            self.stdout.write(f'Created import {user_import.pk}')
+
+        run_import(
+            user_import,
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            progress=self._report,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{user_import.created_count} user(s) created, {user_import.error_count} row(s) rejected.'
+        ))
+        for entry in user_import.errors[:20]:
+            self.stdout.write(f"  row {entry['row']}: {entry['errors']}")
+
+    def _create_import(self, options):
+        if not options['path'] or not options['tenant']:
+            raise CommandError('Give a file and --tenant, or --resume <id>.')
+        if not options['path'].lower().endswith(('.csv', '.xlsx')):
+            raise CommandError('Only .csv and .xlsx files are supported.')
+        try:
+            tenant = Client.objects.get(schema_name=options['tenant'])
+        except Client.DoesNotExist:
+            raise CommandError(f"Tenant '{options['tenant']}' not found.")
+        # The file is copied to media storage so the import can be resumed.
+        with open(options['path'], 'rb') as source:
+            user_import = UserImport(tenant=tenant)
+            user_import.file.save(os.path.basename(options['path']), File(source), save=False)
+        user_import.save()
+        return user_import
+
+    def _report(self, user_import):
+        self.stdout.write(
+            f'  {user_import.processed_rows}/{user_import.total_rows} rows, '
+            f'{user_import.created_count} created, {user_import.error_count} rejected'
+        )
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import Client
+from apps.core.provisioning import provision_tenant, refresh_template, template_is_current
+
+
+class Command(BaseCommand):
+    help = 'Create a tenant by cloning the template schema, and/or refresh the template.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('schema_name', nargs='?', help='Schema name of the new tenant.')
+        parser.add_argument('--name', help='Display name of the tenant.')
+        parser.add_argument('--domain', help='Primary domain, e.g. academy.example.com.')
+        parser.add_argument('--refresh-template', action='store_true',
+                            help='Migrate the template schema first (run after migrate_schemas).')
+
+    def handle(self, *args, **options):
+        if options['refresh_template']:
+            started = time.perf_counter()
+            refresh_template(verbosity=options['verbosity'] - 1)
+            self.stdout.write(f'Template refreshed in {time.perf_counter() - started:.2f}s')
+        elif not template_is_current():
+            self.stdout.write(self.style.WARNING(
+                'Template schema is missing or stale; the tenant will be migrated.'
+            ))
+
+        if not options['schema_name']:
+            if not options['refresh_template']:
+                raise CommandError('Give a schema name, --refresh-template, or both.')
+            return
+        if not options['domain']:
+            raise CommandError('--domain is required.')
+        if Client.objects.filter(schema_name=options['schema_name']).exists():
+            raise CommandError(f"Tenant '{options['schema_name']}' already exists.")
+
+        started = time.perf_counter()
+        tenant = provision_tenant(
+            options['schema_name'],
+            options['name'] or options['schema_name'],
+            options['domain'],
+            verbosity=options['verbosity'] - 1,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Tenant {tenant.schema_name} created by {tenant.provisioned_by} '
+            f'in {time.perf_counter() - started:.2f}s'
+        ))
@@ -1,32 +1,46 @@
-import threading
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django_tenants.middleware.main import TenantMainMiddleware
 
-_thread_locals = threading.local()
+from .context import get_client_ip, get_current_ip, get_current_user, reset_audit_context, set_audit_context
+from .tenant_resolution import resolve_tenant
 
-def get_current_user():
-    return getattr(_thread_locals, 'user', None)
+__all__ = ('AuditMiddleware', 'CachedTenantMainMiddleware', 'get_current_user', 'get_current_ip')
 
-def get_current_ip():
-    return getattr(_thread_locals, 'ip', None)
 
 class AuditMiddleware:
+    """
+    Expose the acting user and client IP to audit signals.
+
+    Works in both sync and async stacks; the context lives in contextvars, so
+    concurrent coroutines on one thread never see each other's values.
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        _thread_locals.user = getattr(request, 'user', None)
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        _thread_locals.ip = ip
-        
-        response = self.get_response(request)
-        
-        # Cleanup
-        if hasattr(_thread_locals, 'user'):
-            del _thread_locals.user
-        if hasattr(_thread_locals, 'ip'):
-            del _thread_locals.ip
-            
-        return response
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tokens = set_audit_context(request=request, ip=get_client_ip(request))
+        try:
+            return self.get_response(request)
+        finally:
+            reset_audit_context(tokens)
+
+    async def __acall__(self, request):
+        tokens = set_audit_context(request=request, ip=get_client_ip(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_audit_context(tokens)
+
+
+class CachedTenantMainMiddleware(TenantMainMiddleware):
+    """TenantMainMiddleware that resolves the hostname from cache instead of a query."""
+
+    def get_tenant(self, domain_model, hostname):
+        return resolve_tenant(domain_model, hostname)
@@ -0,0 +1,126 @@
+"""
+Parallel ``migrate_schemas`` executor.
+
+The public schema is migrated first, in this process. Tenant schemas then
+run concurrently in a bounded pool of forked processes, each with its own
+database connection, and every schema's outcome is reported as it finishes.
+
+- A schema whose django_migrations already holds every migration on disk
+  is skipped, so a failed run can simply be repeated.
+- After the first failure no further schema is started. The ones already
+  running are allowed to finish, then the command fails.
+- A single pending schema, or a run inside a transaction (the template
+  refresh, ``Client.create_schema`` in an admin save), is migrated in this
+  process as the standard executor does: forked workers could not see the
+  uncommitted schema, and closing the connection would break the
+  transaction.
+
+Selected by ``GET_EXECUTOR_FUNCTION``. ``EXECUTOR=standard`` (or
+``--executor``) picks one of the django-tenants executors instead.
+"""
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import CommandError, OutputWrapper
+from django.db import connections
+from django_tenants.migration_executors import get_executor as get_tenants_executor
+from django_tenants.migration_executors.base import MigrationExecutor, run_migrations
+
+from .provisioning import applied_migrations, expected_migrations
+
+
+def get_executor(codename=None):
+    codename = codename or os.environ.get('EXECUTOR', ParallelExecutor.codename)
+    if codename == ParallelExecutor.codename:
+        return ParallelExecutor
+    return get_tenants_executor(codename)
+
+
+def migrate_schema(args, options, codename, schema_name, idx, count):
+    """Pool worker: migrate one schema, returning (schema_name, seconds, error)."""
+    started = time.perf_counter()
+    try:
+        run_migrations(args, options, codename, schema_name, allow_atomic=False, idx=idx, count=count)
+    except Exception:
+        return schema_name, time.perf_counter() - started, traceback.format_exc()
+    return schema_name, time.perf_counter() - started, None
+
+
+class ParallelExecutor(MigrationExecutor):
+    codename = 'parallel'
+
+    def __init__(self, args, options):
+        super().__init__(args, options)
+        self.stdout = OutputWrapper(sys.stdout)
+        self.verbose = int(options.get('verbosity', 1)) >= 1
+        self.processes = options.get('parallel') or settings.TENANT_MULTIPROCESSING_MAX_PROCESSES
+
+    def pending(self, tenants):
+        # A specific target (app_label / migration_name) is always run.
+        if self.args or self.options.get('app_label'):
+            return list(tenants)
+        expected = expected_migrations()
+        return [schema_name for schema_name in tenants if not expected <= applied_migrations(schema_name)]
+
+    def run_migrations(self, tenants=None):
+        tenants = list(tenants or [])
+        if self.PUBLIC_SCHEMA_NAME in tenants:
+            tenants.remove(self.PUBLIC_SCHEMA_NAME)
+            run_migrations(self.args, self.options, self.codename, self.PUBLIC_SCHEMA_NAME)
+        if not tenants:
+            return
+
+        pending = self.pending(tenants)
+        skipped = len(tenants) - len(pending)
+        if skipped and self.verbose:
+            self.stdout.write(f'{skipped} schema(s) already up to date, skipped.')
+        if not pending:
+            return
+
+        if len(pending) == 1 or connections[self.TENANT_DB_ALIAS].in_atomic_block:
+            for idx, schema_name in enumerate(pending):
+                run_migrations(self.args, self.options, self.codename, schema_name, idx=idx, count=len(pending))
+            return
+
+        # Forked workers must open their own connections.
+        connections[self.TENANT_DB_ALIAS].close()
+        failures, done = self.run_pool(pending)
+        if failures:
+            for schema_name, error in failures:
+                self.stdout.write(f'--- {schema_name}\n{error}')
+            remaining = len(pending) - done
+            raise CommandError(
+                f'Migrating {", ".join(name for name, _ in failures)} failed; '
+                f'{remaining} schema(s) not started. Re-run migrate_schemas to resume.'
+            )
+
+    def run_pool(self, schemas):
+        """Migrate ``schemas``; returns ([(schema_name, traceback)], schemas finished)."""
+        count = len(schemas)
+        queue = list(reversed(list(enumerate(schemas))))
+        failures = []
+        done = 0
+        running = set()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=min(self.processes, count), mp_context=context) as pool:
+            while running or (queue and not failures):
+                while queue and not failures and len(running) < self.processes:
+                    idx, schema_name = queue.pop()
+                    running.add(pool.submit(
+                        migrate_schema, self.args, self.options, self.codename, schema_name, idx, count,
+                    ))
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    schema_name, seconds, error = future.result()
+                    done += 1
+                    if error:
+                        failures.append((schema_name, error))
+                        self.stdout.write(f'[{done}/{count}] {schema_name} FAILED after {seconds:.1f}s')
+                    elif self.verbose:
+                        self.stdout.write(f'[{done}/{count}] {schema_name} migrated in {seconds:.1f}s')
+        return failures, done
@@ -0,0 +1,107 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Postgres requires the partition key in the primary key, so the partitioned
+# table uses PRIMARY KEY (id, timestamp). Identity columns are not allowed on
+# partitioned tables before Postgres 17, hence the explicit sequence.
+# Monthly partitions are created for every month with existing rows plus the
+# next three; apps.core.partitions maintains them from then on.
+PARTITION_AUDITLOG = """
+ALTER TABLE core_auditlog RENAME TO core_auditlog_unpartitioned;
+ALTER TABLE core_auditlog_unpartitioned ALTER COLUMN id DROP IDENTITY IF EXISTS;
+
+CREATE TABLE core_auditlog (
+    id bigint NOT NULL,
+    action varchar(255) NOT NULL,
+    details jsonb NOT NULL,
+    ip_address inet NULL,
+    "timestamp" timestamp with time zone NOT NULL,
+    user_id uuid NULL,
+    PRIMARY KEY (id, "timestamp")
+) PARTITION BY RANGE ("timestamp");
+
+CREATE SEQUENCE core_auditlog_id_seq OWNED BY core_auditlog.id;
+ALTER TABLE core_auditlog ALTER COLUMN id SET DEFAULT nextval('core_auditlog_id_seq');
+
+CREATE TABLE core_auditlog_default PARTITION OF core_auditlog DEFAULT;
+
+DO $$
+DECLARE
+    month date := date_trunc('month', COALESCE(
+        (SELECT min("timestamp") FROM core_auditlog_unpartitioned), now()) AT TIME ZONE 'UTC')::date;
+    last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months')::date;
+BEGIN
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF core_auditlog FOR VALUES FROM (%L) TO (%L)',
+            'core_auditlog_p' || to_char(month, 'YYYYMM'),
+            month::text || ' 00:00:00+00',
+            (month + interval '1 month')::date::text || ' 00:00:00+00'
+        );
+        month := (month + interval '1 month')::date;
+    END LOOP;
+END $$;
+
+INSERT INTO core_auditlog (id, action, details, ip_address, "timestamp", user_id)
+    SELECT id, action, details, ip_address, "timestamp", user_id FROM core_auditlog_unpartitioned;
+SELECT setval('core_auditlog_id_seq', COALESCE((SELECT max(id) FROM core_auditlog), 0) + 1, false);
+DROP TABLE core_auditlog_unpartitioned;
+
+-- Added after the copy so no deferred trigger events are pending when the
+-- indexes are built.
+ALTER TABLE core_auditlog ADD CONSTRAINT core_auditlog_user_id_fk_core_user_id
+    FOREIGN KEY (user_id) REFERENCES core_user (id) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+UNPARTITION_AUDITLOG = """
+ALTER TABLE core_auditlog RENAME TO core_auditlog_partitioned;
+
+CREATE TABLE core_auditlog (
+    id bigint NOT NULL GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    action varchar(255) NOT NULL,
+    details jsonb NOT NULL,
+    ip_address inet NULL,
+    "timestamp" timestamp with time zone NOT NULL,
+    user_id uuid NULL
+);
+
+INSERT INTO core_auditlog (id, action, details, ip_address, "timestamp", user_id)
+    SELECT id, action, details, ip_address, "timestamp", user_id FROM core_auditlog_partitioned;
+SELECT setval(pg_get_serial_sequence('core_auditlog', 'id'), COALESCE((SELECT max(id) FROM core_auditlog), 0) + 1, false);
+DROP TABLE core_auditlog_partitioned CASCADE;
+
+ALTER TABLE core_auditlog ADD CONSTRAINT core_auditlog_user_id_fk_core_user_id
+    FOREIGN KEY (user_id) REFERENCES core_user (id) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_auditlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='user',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunSQL(PARTITION_AUDITLOG, reverse_sql=UNPARTITION_AUDITLOG),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['timestamp'], name='core_audit_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['action', 'timestamp'], name='core_audit_action_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['user', 'timestamp'], name='core_audit_user_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:33
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_partition_auditlog'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='core_audit_timestamp_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['timestamp', 'id'], name='core_audit_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['ip_address', 'timestamp'], name='core_audit_ip_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['details'], name='core_audit_details_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
@@ -1,20 +1,45 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.validators import FileExtensionValidator
 from django.contrib.auth.models import AbstractUser
 from django_tenants.models import TenantMixin, DomainMixin
+from django_tenants.utils import schema_exists
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 import uuid
 
-class Client(TenantMixin):
+from .tracking import FieldTrackerMixin
+
+class Client(FieldTrackerMixin, TenantMixin):
     name = models.CharField(max_length=100)
     created_on = models.DateField(auto_now_add=True)
 
     # Add other tenant specific fields here
     auto_create_schema = True
+    # 'clone' or 'migrate' once create_schema() built the schema.
+    provisioned_by = None
 
     def __str__(self):
         return self.name
 
-class Domain(DomainMixin):
+    def create_schema(self, check_if_exists=False, sync_schema=True, verbosity=1):
+        # Copy the pre-migrated template schema (see apps.core.provisioning);
+        # replaying every migration is the fallback.
+        from .provisioning import clone_template, load_fixtures
+
+        if not sync_schema or (check_if_exists and schema_exists(self.schema_name)):
+            return super().create_schema(check_if_exists, sync_schema, verbosity)
+        if clone_template(self.schema_name):
+            self.provisioned_by = 'clone'
+            return True
+        super().create_schema(check_if_exists, sync_schema, verbosity)
+        load_fixtures(self.schema_name)
+        self.provisioned_by = 'migrate'
+        return True
+
+class Domain(FieldTrackerMixin, DomainMixin):
     pass
 
 class UserRole(models.TextChoices):
@@ -23,7 +48,7 @@ class UserRole(models.TextChoices):
     ADMIN = 'ADMIN', _('Admin')
     TENANT_ADMIN = 'TENANT_ADMIN', _('Tenant Admin')
 
-class User(AbstractUser):
+class User(FieldTrackerMixin, AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     role = models.CharField(
         max_length=20,
@@ -42,7 +67,7 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
-class ActivationCode(models.Model):
+class ActivationCode(FieldTrackerMixin, models.Model):
     code = models.CharField(max_length=50, unique=True)
     tenant = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='activation_codes')
     uses_left = models.PositiveIntegerField(default=1)
@@ -57,11 +82,69 @@ class ActivationCode(models.Model):
         return f"{self.code} - {self.tenant.name}"
 
 class AuditLog(models.Model):
-    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    """
+    Append-only audit trail.
+
+    The table is partitioned by month on ``timestamp`` (migration 0004, see
+    ``apps.core.partitions``), so its primary key is ``(id, timestamp)`` in the
+    database. Old months are archived with ``archive_audit_partitions``.
+    """
+    # Covered by the (user, timestamp) index below.
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, db_index=False)
     action = models.CharField(max_length=255)
     details = models.JSONField(default=dict)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event is recorded, not when the buffered batch is flushed.
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # (timestamp, id) is the keyset order of the audit log API.
+            models.Index(fields=['timestamp', 'id'], name='core_audit_ts_id_idx'),
+            models.Index(fields=['action', 'timestamp'], name='core_audit_action_ts_idx'),
+            models.Index(fields=['user', 'timestamp'], name='core_audit_user_ts_idx'),
+            models.Index(fields=['ip_address', 'timestamp'], name='core_audit_ip_ts_idx'),
+            # Containment filters such as details @> '{"target": "..."}'.
+            GinIndex(fields=['details'], opclasses=['jsonb_path_ops'], name='core_audit_details_gin'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.action} - {self.timestamp}"
+
+class ImportStatus(models.TextChoices):
+    PENDING = 'PENDING', _('Pending')
+    RUNNING = 'RUNNING', _('Running')
+    COMPLETED = 'COMPLETED', _('Completed')
+    FAILED = 'FAILED', _('Failed')
+
+def user_import_storage():
+    # Import files contain plain-text passwords; keep them out of MEDIA_ROOT.
+    return FileSystemStorage(location=settings.USER_IMPORT_ROOT)
+
+class UserImport(models.Model):
+    """
+    A bulk user import (see ``apps.core.user_import``).
+
+    ``processed_rows`` is committed together with each chunk of users, so a
+    failed or interrupted import resumes after the last committed chunk.
+    """
+    tenant = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='user_imports')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    file = models.FileField(
+        upload_to='user_imports/',
+        storage=user_import_storage,
+        validators=[FileExtensionValidator(allowed_extensions=['csv', 'xlsx'])]
+    )
+    status = models.CharField(max_length=20, choices=ImportStatus.choices, default=ImportStatus.PENDING)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    # First USER_IMPORT_MAX_ERRORS rejected rows: [{'row': n, 'errors': {...}}]
+    errors = models.JSONField(default=list, blank=True)
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.file.name} - {self.status}"
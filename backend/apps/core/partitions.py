@@ -0,0 +1,179 @@
+"""
+Monthly partition maintenance for the AuditLog table.
+
+``core_auditlog`` is a Postgres table partitioned by RANGE on ``timestamp``
+(see migration 0004). Every month lives in ``core_auditlog_pYYYYMM``; rows
+outside the created range fall into ``core_auditlog_default`` so writes never
+fail. Old months are detached, streamed to gzip-compressed JSONL and dropped.
+"""
+import datetime
+import gzip
+import logging
+import os
+import re
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = 'core_auditlog'
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+PARTITION_NAME_RE = re.compile(rf'^{PARENT_TABLE}_p(\d{{4}})(\d{{2}})$')
+
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{PARENT_TABLE}_p{month:%Y%m}'
+
+
+def _bound(month):
+    # Partition bounds are timestamptz literals; use UTC midnight so a month
+    # never depends on the session time zone.
+    return f'{month.isoformat()} 00:00:00+00'
+
+
+def list_partitions():
+    """
+    Return ``[(name, month, attached)]`` for every monthly audit table,
+    including detached ones left behind by an interrupted archive run.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, i.inhparent IS NOT NULL
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            LEFT JOIN pg_inherits i
+                ON i.inhrelid = c.oid AND i.inhparent = %s::regclass
+            WHERE n.nspname = current_schema()
+              AND c.relkind = 'r'
+              AND c.relname LIKE %s
+            ORDER BY c.relname
+            """,
+            [PARENT_TABLE, f'{PARENT_TABLE}_p%'],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, attached in rows:
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            month = datetime.date(int(match.group(1)), int(match.group(2)), 1)
+            partitions.append((name, month, attached))
+    return partitions
+
+
+def create_partition(month):
+    """
+    Create the partition for ``month`` if it does not exist yet.
+
+    Rows that already landed in the default partition for that month are
+    moved into the new partition in the same transaction.
+    """
+    name = partition_name(month)
+    start, end = _bound(month), _bound(add_months(month, 1))
+    qn = connection.ops.quote_name
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [name])
+        if cursor.fetchone()[0]:
+            return False
+
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {qn(DEFAULT_PARTITION)} '
+            f'WHERE "timestamp" >= %s AND "timestamp" < %s)',
+            [start, end],
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(
+                f'CREATE TABLE {qn(name)} PARTITION OF {qn(PARENT_TABLE)} '
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+            return True
+
+        logger.warning('Moving %s rows out of %s', month, DEFAULT_PARTITION)
+        cursor.execute(
+            f'CREATE TABLE {qn(name)} (LIKE {qn(PARENT_TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} '
+            f'WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+            f'INSERT INTO {qn(name)} SELECT * FROM moved',
+            [start, end],
+        )
+        cursor.execute(
+            f'ALTER TABLE {qn(PARENT_TABLE)} ATTACH PARTITION {qn(name)} '
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    return True
+
+
+def ensure_partitions(months_ahead=3, today=None):
+    """Create partitions from the current month up to ``months_ahead`` months ahead."""
+    current = month_start(today or timezone.now())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if create_partition(month):
+            created.append(partition_name(month))
+    return created
+
+
+def archive_partition(name, archive_dir):
+    """
+    Detach ``name`` (if still attached), stream its rows to
+    ``<archive_dir>/<name>.jsonl.gz`` and drop the table.
+
+    The archive is written to a temporary file and renamed only once complete,
+    so the table is never dropped without a full copy on disk.
+    """
+    qn = connection.ops.quote_name
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f'{name}.jsonl.gz')
+    tmp_path = f'{path}.part'
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = %s::regclass AND inhparent = %s::regclass)',
+            [name, PARENT_TABLE],
+        )
+        if cursor.fetchone()[0]:
+            cursor.execute(f'ALTER TABLE {qn(PARENT_TABLE)} DETACH PARTITION {qn(name)}')
+
+    rows = 0
+    with transaction.atomic():
+        # Server-side cursor: the partition is streamed in chunks, never
+        # loaded into memory. Postgres renders each row as JSON text.
+        with connection.chunked_cursor() as cursor, gzip.open(tmp_path, 'wt', encoding='utf-8') as archive:
+            cursor.execute(f'SELECT row_to_json(t)::text FROM {qn(name)} t ORDER BY "timestamp", id')
+            for (line,) in cursor:
+                archive.write(line)
+                archive.write('\n')
+                rows += 1
+    os.replace(tmp_path, path)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE {qn(name)}')
+
+    logger.info('Archived %d audit rows from %s to %s', rows, name, path)
+    return path, rows
+
+
+def archive_expired_partitions(retention_months, archive_dir, today=None):
+    """Archive and drop every monthly partition older than ``retention_months``."""
+    cutoff = add_months(month_start(today or timezone.now()), -retention_months)
+    archived = []
+    for name, month, attached in list_partitions():
+        # Detached tables are leftovers of an interrupted run; finish them.
+        if month < cutoff or not attached:
+            archived.append(archive_partition(name, archive_dir))
+    return archived
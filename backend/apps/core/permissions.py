@@ -0,0 +1,20 @@
+from rest_framework import permissions
+
+
+class IsAdminOrTenantAdmin(permissions.BasePermission):
+    """Platform admins and tenant admins only."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user and user.is_authenticated
+            and user.role in ('ADMIN', 'TENANT_ADMIN')
+        )
+
+
+class IsPlatformAdmin(permissions.BasePermission):
+    """Platform admins only."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and user.role == 'ADMIN')
@@ -0,0 +1,135 @@
+"""
+django-tenants backend tuned for persistent and pooled connections.
+
+django-tenants re-issues ``SET search_path`` for the first cursor after every
+``set_tenant()``, i.e. on every request. This backend remembers the
+search_path applied to the physical connection and only sends ``SET`` when
+the tenant actually changes, so with ``CONN_MAX_AGE`` a request for the same
+tenant costs no extra round trip.
+
+``DB_POOL_MODE``:
+
+- ``session`` (default): direct Postgres or a session-pooling proxy. The
+  search_path is cached per connection and forgotten on rollback, reconnect
+  or close.
+- ``transaction``: a transaction-pooling proxy (PgBouncer) may hand every
+  transaction to a different server connection, so a session-level ``SET``
+  cannot be trusted. The ``SET`` is sent in the same query string as every
+  statement instead; it costs no extra round trip. Run migrations against
+  Postgres directly, with the session mode.
+
+django-tenants also empties the ContentType cache on every ``set_tenant()``
+because content type ids differ between schemas. Here the cache is kept per
+schema instead, so it stays warm across requests.
+"""
+import django.db.utils
+import psycopg2
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django_tenants.postgresql_backend import base as tenant_base
+
+DatabaseError = tenant_base.DatabaseError
+IntegrityError = tenant_base.IntegrityError
+
+
+class SearchPathCursor(psycopg2.extensions.cursor):
+    """psycopg2 cursor that runs ``search_path_sql`` in front of every statement."""
+    search_path_sql = None
+
+    def _with_search_path(self, query, has_params):
+        if not self.search_path_sql or not isinstance(query, str):
+            return query
+        prefix = self.search_path_sql.replace('%', '%%') if has_params else self.search_path_sql
+        return f'{prefix}; {query}'
+
+    def execute(self, query, vars=None):
+        return super().execute(self._with_search_path(query, vars is not None), vars)
+
+    def executemany(self, query, vars_list):
+        return super().executemany(self._with_search_path(query, True), vars_list)
+
+
+class SchemaContentTypeCache(dict):
+    """``ContentTypeManager._cache`` keyed by (alias, current schema) instead of alias."""
+
+    def _key(self, alias):
+        return alias, connections[alias].schema_name
+
+    def __getitem__(self, alias):
+        return super().__getitem__(self._key(alias))
+
+    def setdefault(self, alias, default=None):
+        return super().setdefault(self._key(alias), default)
+
+
+ContentType.objects._cache = SchemaContentTypeCache()
+
+
+class DatabaseWrapper(tenant_base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        self.applied_search_path = None
+        super().__init__(*args, **kwargs)
+        self.transaction_pooling = getattr(settings, 'DB_POOL_MODE', 'session') == 'transaction'
+
+    def set_tenant(self, tenant, include_public=True):
+        # django-tenants' set_tenant() without ContentType.objects.clear_cache().
+        self.tenant = tenant
+        self.schema_name = tenant.schema_name
+        self.include_public_schema = include_public
+        self.set_settings_schema(self.schema_name)
+        if tenant_base.EXTRA_SET_TENANT_METHOD:
+            tenant_base.EXTRA_SET_TENANT_METHOD(self, tenant)
+        self.search_path_set_schemas = None
+
+    def get_new_connection(self, conn_params):
+        self.applied_search_path = None
+        connection = super().get_new_connection(conn_params)
+        if self.transaction_pooling:
+            connection.cursor_factory = SearchPathCursor
+        return connection
+
+    def close(self):
+        self.applied_search_path = None
+        super().close()
+
+    def _rollback(self):
+        # A rolled back transaction also reverts a SET issued inside it.
+        self.applied_search_path = None
+        return super()._rollback()
+
+    def _savepoint_rollback(self, sid):
+        self.applied_search_path = None
+        return super()._savepoint_rollback(sid)
+
+    def search_path_sql(self):
+        if not self.schema_name:
+            raise ImproperlyConfigured('Database schema not set. Did you forget '
+                                       'to call set_schema() or set_tenant()?')
+        return 'SET search_path = {}'.format(
+            ','.join("'{}'".format(schema) for schema in self._get_cursor_search_paths())
+        )
+
+    def _cursor(self, name=None):
+        # Skip django-tenants' _cursor, which sets the search_path per tenant switch.
+        cursor = tenant_base.original_backend.DatabaseWrapper._cursor(self, name=name)
+        search_path_sql = self.search_path_sql()
+
+        if self.transaction_pooling:
+            cursor.cursor.search_path_sql = search_path_sql
+            return cursor
+
+        if self.applied_search_path != search_path_sql:
+            # A named (server-side) cursor can only run its own query.
+            target = self.connection.cursor() if name else cursor
+            try:
+                target.execute(search_path_sql)
+            except (django.db.utils.DatabaseError, psycopg2.InternalError):
+                # The transaction is aborted; the next statement fails anyway.
+                self.applied_search_path = None
+            else:
+                self.applied_search_path = search_path_sql
+            if name:
+                target.close()
+        return cursor
@@ -0,0 +1,125 @@
+"""
+Tenant provisioning from a template schema.
+
+Migrating a new tenant schema replays the whole tenant migration history.
+Instead, ``TENANT_TEMPLATE_SCHEMA`` is kept migrated (with the
+``TENANT_TEMPLATE_FIXTURES`` loaded) and a new tenant gets a server-side copy
+of it: tables, sequences, indexes, constraints and rows, including
+django_migrations, content types and permissions. The copy is done by the
+pg-clone-schema function shipped with django-tenants, installed once with
+the template rather than before every clone as ``CloneSchema`` does.
+
+The template is stale when a migration on disk is not recorded in it. A
+new tenant then falls back to migrations, and the template is refreshed in
+the background.
+"""
+import functools
+import logging
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.migrations.loader import MigrationLoader
+from django_tenants.clone import CLONE_SCHEMA_FUNCTION
+from django_tenants.utils import schema_context, schema_exists
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock key serializing template refreshes and clones.
+TEMPLATE_LOCK_ID = 7_301_014
+CLONE_FUNCTION_SIGNATURE = 'public.clone_schema(text,text,public.cloneparms[])'
+
+
+@functools.lru_cache(maxsize=None)
+def expected_migrations():
+    """Every migration on disk as (app_label, name); fixed for the process."""
+    return frozenset(MigrationLoader(None, ignore_no_migrations=True).disk_migrations)
+
+
+def applied_migrations(schema_name):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s)', [f'"{schema_name}".django_migrations'])
+        if cursor.fetchone()[0] is None:
+            return set()
+        cursor.execute(f'SELECT app, name FROM "{schema_name}".django_migrations')
+        return set(cursor.fetchall())
+
+
+def template_is_current():
+    template = settings.TENANT_TEMPLATE_SCHEMA
+    return (
+        bool(template) and schema_exists(template)
+        and expected_migrations() <= applied_migrations(template)
+    )
+
+
+def load_fixtures(schema_name):
+    if settings.TENANT_TEMPLATE_FIXTURES:
+        with schema_context(schema_name):
+            call_command('loaddata', *settings.TENANT_TEMPLATE_FIXTURES, verbosity=0)
+
+
+def install_clone_function(cursor):
+    user = connection.settings_dict['USER'] or 'postgres'
+    cursor.execute(CLONE_SCHEMA_FUNCTION.format(db_user=user))
+
+
+def refresh_template(verbosity=0):
+    """Create or migrate the template schema and load the seed fixtures into it."""
+    template = settings.TENANT_TEMPLATE_SCHEMA
+    connection.set_schema_to_public()
+    # One transaction: clones keep seeing the previous template until the
+    # migrated and seeded one is committed.
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [TEMPLATE_LOCK_ID])
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{template}"')
+            install_clone_function(cursor)
+        call_command('migrate_schemas', tenant=True, schema_name=template,
+                     interactive=False, verbosity=verbosity)
+        load_fixtures(template)
+    connection.set_schema_to_public()
+
+
+def clone_template(schema_name):
+    """
+    Create ``schema_name`` as a copy of the template.
+
+    Returns False, creating nothing, if the template is missing or stale.
+    """
+    if not settings.TENANT_TEMPLATE_SCHEMA:
+        return False
+    with transaction.atomic():
+        connection.set_schema_to_public()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [TEMPLATE_LOCK_ID])
+            if not template_is_current():
+                logger.warning('Tenant template %s is stale; migrating %s instead',
+                               settings.TENANT_TEMPLATE_SCHEMA, schema_name)
+                from .tasks import refresh_tenant_template_task
+                transaction.on_commit(refresh_tenant_template_task.delay)
+                return False
+            cursor.execute('SELECT to_regprocedure(%s)', [CLONE_FUNCTION_SIGNATURE])
+            if cursor.fetchone()[0] is None:
+                install_clone_function(cursor)
+            cursor.execute('SELECT public.clone_schema(%s, %s, %s)',
+                           [settings.TENANT_TEMPLATE_SCHEMA, schema_name, 'DATA'])
+    return True
+
+
+def provision_tenant(schema_name, name, domain, verbosity=0):
+    """
+    Create a Client with its schema and primary Domain.
+
+    Returns the tenant; ``tenant.provisioned_by`` is 'clone' or 'migrate'.
+    """
+    from .models import Client, Domain
+
+    tenant = Client(schema_name=schema_name, name=name)
+    tenant.save(verbosity=verbosity)
+    try:
+        Domain.objects.create(domain=domain, tenant=tenant, is_primary=True)
+    except Exception:
+        tenant.delete(force_drop=True)
+        raise
+    return tenant
@@ -0,0 +1,11 @@
+"""Shared raw Redis client for features the Django cache API cannot express."""
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    # Short timeouts: callers fall back to local behaviour instead of blocking requests.
+    return redis.Redis.from_url(settings.CACHE_REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
@@ -1,6 +1,12 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model
-from .models import ActivationCode
+from django.conf import settings
+from django.db import transaction
+from django_tenants.utils import get_public_schema_name
+from .models import ActivationCode, AuditLog, Client, Domain, UserImport
+from .provisioning import provision_tenant
+from .services import redeem_activation_code
 
 User = get_user_model()
 
@@ -10,11 +16,61 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'role', 'tenant', 'is_active', 'last_login')
         read_only_fields = ('role', 'tenant', 'last_login')
 
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Embeds role and tenant so read-only endpoints can skip the user lookup."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['role'] = user.role
+        token['tenant_id'] = user.tenant_id
+        return token
+
 class ActivationCodeSerializer(serializers.ModelSerializer):
     class Meta:
         model = ActivationCode
         fields = ('code', 'tenant', 'expires_at')
 
+class AuditLogSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='user.username', read_only=True, default=None)
+
+    class Meta:
+        model = AuditLog
+        fields = ('id', 'user', 'username', 'action', 'details', 'ip_address', 'timestamp')
+        read_only_fields = fields
+
+class UserImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserImport
+        fields = (
+            'id', 'tenant', 'file', 'status', 'total_rows', 'processed_rows',
+            'created_count', 'error_count', 'errors', 'error_message', 'created_at', 'updated_at',
+        )
+        read_only_fields = tuple(name for name in fields if name not in ('tenant', 'file'))
+        extra_kwargs = {'tenant': {'required': False}, 'file': {'write_only': True}}
+
+class TenantProvisionSerializer(serializers.ModelSerializer):
+    domain = serializers.CharField(max_length=253, write_only=True)
+    provisioned_by = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Client
+        fields = ('id', 'schema_name', 'name', 'domain', 'provisioned_by', 'created_on')
+        read_only_fields = ('id', 'created_on')
+
+    def validate_schema_name(self, value):
+        if value in (get_public_schema_name(), settings.TENANT_TEMPLATE_SCHEMA):
+            raise serializers.ValidationError('Bu şema adı sistem tarafından kullanılıyor.')
+        return value
+
+    def validate_domain(self, value):
+        if Domain.objects.filter(domain=value).exists():
+            raise serializers.ValidationError('Bu alan adı zaten kullanılıyor.')
+        return value
+
+    def create(self, validated_data):
+        return provision_tenant(**validated_data)
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     activation_code = serializers.CharField(write_only=True, required=False, allow_blank=True)
@@ -24,34 +80,31 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ('username', 'password', 'email', 'first_name', 'last_name', 'activation_code')
 
     def validate_activation_code(self, value):
-        if not value:
-            return None
-        try:
-            code = ActivationCode.objects.get(code=value)
-            if not code.is_valid():
-                raise serializers.ValidationError("Activation code is expired or used up.")
-            return code
-        except ActivationCode.DoesNotExist:
-            raise serializers.ValidationError("Invalid activation code.")
+        # Checked and used up atomically in create(); see redeem_activation_code.
+        return value or None
 
     def create(self, validated_data):
         activation_code = validated_data.pop('activation_code', None)
         password = validated_data.pop('password')
-        
-        # Assign tenant
-        if activation_code:
-            validated_data['tenant'] = activation_code.tenant
-            # Decrement uses
-            activation_code.uses_left -= 1
-            activation_code.save()
-        else:
-            # Assign to public tenant by default
-            from .models import Client
-            public_tenant = Client.objects.get(schema_name='public')
-            validated_data['tenant'] = public_tenant
-        
-        user = User.objects.create_user(**validated_data)
-        user.set_password(password)
-        user.save()
-        
+
+        with transaction.atomic():
+            # Assign tenant
+            if activation_code:
+                tenant_id = redeem_activation_code(activation_code)
+                if tenant_id is None:
+                    if ActivationCode.objects.filter(code=activation_code).exists():
+                        message = "Activation code is expired or used up."
+                    else:
+                        message = "Invalid activation code."
+                    raise serializers.ValidationError({'activation_code': [message]})
+                validated_data['tenant_id'] = tenant_id
+            else:
+                # Assign to public tenant by default
+                from .models import Client
+                public_tenant = Client.objects.get(schema_name='public')
+                validated_data['tenant'] = public_tenant
+
+            # A failed user insert rolls the redemption back.
+            user = User.objects.create_user(password=password, **validated_data)
+
         return user
@@ -0,0 +1,107 @@
+import io
+import secrets
+
+from django.db import connection, transaction
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from . import audit
+from .models import ActivationCode
+
+# No 0/O or 1/I/L, codes are typed in by hand.
+CODE_ALPHABET = 'ABCDEFGHJKMNPQRSTUVWXYZ23456789'
+COPY_CHUNK_SIZE = 50_000
+# Batches in a row that add no code before the code space counts as full.
+MAX_IDLE_ROUNDS = 100
+
+
+def redeem_activation_code(code):
+    """
+    Use up one redemption of ``code`` in a single conditional UPDATE.
+
+    Returns the tenant id, or ``None`` if the code does not exist, is expired
+    or has no uses left. Concurrent redemptions serialize on the row lock, so
+    a code is never redeemed more than ``uses_left`` times.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {ActivationCode._meta.db_table}
+            SET uses_left = uses_left - 1
+            WHERE code = %s AND uses_left > 0 AND expires_at > now()
+            RETURNING tenant_id
+            """,
+            [code],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def generate_code(length, prefix=''):
+    return prefix + ''.join(secrets.choice(CODE_ALPHABET) for _ in range(length))
+
+
+def bulk_create_activation_codes(tenant, count, uses_left, expires_at, length=10, prefix='', user=None):
+    """
+    Insert ``count`` new unique codes for ``tenant`` through COPY.
+
+    Codes are streamed into a temporary table and moved over with
+    ``ON CONFLICT DO NOTHING``; collisions with existing codes are replaced
+    until ``count`` rows exist. All rows of a batch share one ``created_at``,
+    which identifies the batch. One audit entry is written for the batch.
+
+    Raises ValueError if ``length`` random characters after ``prefix`` do
+    not leave room for ``count`` more codes.
+    """
+    table = ActivationCode._meta.db_table
+    created_at = timezone.now()
+    inserted = 0
+    idle_rounds = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        taken = ActivationCode.objects.filter(code__startswith=prefix).annotate(
+            code_length=Length('code'),
+        ).filter(code_length=len(prefix) + length).count()
+        if count > len(CODE_ALPHABET) ** length - taken:
+            raise ValueError(f'{length} character(s) leave no room for {count} more code(s); use longer codes.')
+        cursor.execute('CREATE TEMP TABLE activation_code_import (code varchar(50)) ON COMMIT DROP')
+        while inserted < count:
+            if idle_rounds == MAX_IDLE_ROUNDS:
+                raise ValueError(f'No free codes of {length} character(s) found; use longer codes.')
+            batch = min(count - inserted, COPY_CHUNK_SIZE)
+            buffer = io.StringIO(''.join(generate_code(length, prefix) + '\n' for _ in range(batch)))
+            cursor.execute('TRUNCATE activation_code_import')
+            cursor.cursor.copy_expert('COPY activation_code_import (code) FROM STDIN', buffer)
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (code, tenant_id, uses_left, expires_at, created_at)
+                SELECT DISTINCT code, %s, %s, %s, %s FROM activation_code_import
+                ON CONFLICT (code) DO NOTHING
+                """,
+                [tenant.pk, uses_left, expires_at, created_at],
+            )
+            inserted += cursor.rowcount
+            idle_rounds = 0 if cursor.rowcount else idle_rounds + 1
+
+        audit.record(
+            user=user,
+            action='ACTIVATIONCODE_BULK_CREATE',
+            details={
+                'target': tenant.name,
+                'count': count,
+                'uses_left': uses_left,
+                'expires_at': expires_at.isoformat(),
+                'created_at': created_at.isoformat(),
+            },
+        )
+    return created_at
+
+
+def export_activation_codes(tenant, created_at, output):
+    """Write the codes of one batch to ``output``, one per line, via COPY."""
+    with connection.cursor() as cursor:
+        query = cursor.mogrify(
+            f'COPY (SELECT code FROM {ActivationCode._meta.db_table} '
+            f'WHERE tenant_id = %s AND created_at = %s ORDER BY id) TO STDOUT',
+            [tenant.pk, created_at],
+        ).decode()
+        cursor.cursor.copy_expert(query, output)
@@ -1,19 +1,36 @@
-from django.db.models.signals import pre_save, post_save, post_delete
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.signals import user_logged_in, user_login_failed
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from django.forms.models import model_to_dict
-from .models import AuditLog, Client, ActivationCode
-from .middleware import get_current_user, get_current_ip
-import json
-from django.core.serializers.json import DjangoJSONEncoder
+from .models import Client, ActivationCode, Domain
+from . import audit
+from .tenant_resolution import invalidate_hostnames
+from .authentication import invalidate_user
+from .context import get_current_user, get_current_ip
 
 User = get_user_model()
 
+# Never copied into audit details; a change to only these fields is not audited.
+AUDIT_IGNORED_FIELDS = ('password', 'last_login')
+
+AUDIT_TARGET_FIELDS = {
+    'User': 'username',
+    'Client': 'name',
+    'ActivationCode': 'code',
+}
+
+
+def get_audit_target(instance):
+    field = AUDIT_TARGET_FIELDS.get(type(instance).__name__)
+    if field:
+        return getattr(instance, field)
+    return str(instance)
+
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     ip = get_current_ip()
-    AuditLog.objects.create(
+    audit.record(
         user=user,
         action='LOGIN',
         details={'message': 'User logged in successfully'},
@@ -23,98 +40,37 @@ def log_user_login(sender, request, user, **kwargs):
 @receiver(user_login_failed)
 def log_user_login_failed(sender, credentials, request, **kwargs):
     ip = get_current_ip()
-    AuditLog.objects.create(
+    audit.record(
         action='LOGIN_FAILED',
         details={'credentials': credentials, 'message': 'Login failed'},
         ip_address=ip
     )
 
-@receiver(pre_save, sender=User)
-@receiver(pre_save, sender=Client)
-@receiver(pre_save, sender=ActivationCode)
-def capture_old_state(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            old_instance = sender.objects.get(pk=instance.pk)
-            instance._old_state = model_to_dict(old_instance)
-        except sender.DoesNotExist:
-            instance._old_state = {}
-    else:
-        instance._old_state = {}
-
 @receiver(post_save, sender=User)
 @receiver(post_save, sender=Client)
 @receiver(post_save, sender=ActivationCode)
-def log_model_change(sender, instance, created, **kwargs):
+def log_model_change(sender, instance, created, update_fields=None, **kwargs):
     action = 'CREATE' if created else 'UPDATE'
     model_name = sender.__name__
-    
-    user = get_current_user()
-    ip = get_current_ip()
-    
-    details = {}
-    
-    # Helper to sanitize dict for JSONField
-    def sanitize_for_json(data):
-        return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
-
-    # Identify the target
-    target_info = str(instance)
-    if model_name == 'User':
-        target_info = instance.username
-    elif model_name == 'Client':
-        target_info = instance.name
-    elif model_name == 'ActivationCode':
-        target_info = instance.code
 
+    # Diff against the snapshot taken when the instance was loaded or last
+    # saved (see FieldTrackerMixin), so no extra SELECT is needed.
     if created:
-        try:
-            details = model_to_dict(instance)
-            # Remove sensitive or large fields if necessary
-            if 'password' in details:
-                del details['password']
-            if 'groups' in details:
-                del details['groups']
-            if 'user_permissions' in details:
-                del details['user_permissions']
-            details = sanitize_for_json(details)
-        except Exception as e:
-            details = {'error': str(e)}
+        details = instance.get_tracked_values(exclude=AUDIT_IGNORED_FIELDS)
     else:
-        # Calculate diff
-        old_state = getattr(instance, '_old_state', {})
-        new_state = model_to_dict(instance)
-        
-        diff = {}
-        for field, new_value in new_state.items():
-            if field in ['password', 'last_login', 'groups', 'user_permissions']:
-                continue
-                
-            old_value = old_state.get(field)
-            if old_value != new_value:
-                diff[field] = {
-                    'old': old_value,
-                    'new': new_value
-                }
-        
-        if not diff:
-            return # No changes detected (or only ignored fields changed)
-            
-        details = sanitize_for_json(diff)
-
-    # Add target info to details
-    if isinstance(details, dict):
-        details['target'] = target_info
-
-    # If user is not authenticated (e.g. system task), user will be None
-    if user and not user.is_authenticated:
-        user = None
+        details = instance.get_tracked_changes(exclude=AUDIT_IGNORED_FIELDS, fields=update_fields)
+    instance.snapshot_tracked_fields(fields=update_fields)
 
-    AuditLog.objects.create(
-        user=user,
+    if not details:
+        return # No changes detected (or only ignored fields changed)
+
+    details['target'] = get_audit_target(instance)
+
+    audit.record(
+        user=get_current_user(),
         action=f'{model_name.upper()}_{action}',
         details=details,
-        ip_address=ip
+        ip_address=get_current_ip()
     )
 
 @receiver(post_delete, sender=User)
@@ -123,23 +79,38 @@ def log_model_change(sender, instance, created, **kwargs):
 def log_model_delete(sender, instance, **kwargs):
     model_name = sender.__name__
     user = get_current_user()
-    ip = get_current_ip()
-    
-    if user and not user.is_authenticated:
+    # An account deleting itself cannot be referenced by its own audit row.
+    if user is not None and isinstance(instance, User) and user.pk == instance.pk:
         user = None
 
-    # Identify the target
-    target_info = str(instance)
-    if model_name == 'User':
-        target_info = instance.username
-    elif model_name == 'Client':
-        target_info = instance.name
-    elif model_name == 'ActivationCode':
-        target_info = instance.code
-
-    AuditLog.objects.create(
+    audit.record(
         user=user,
         action=f'{model_name.upper()}_DELETE',
-        details={'id': str(instance.pk), 'str_repr': str(instance), 'target': target_info},
-        ip_address=ip
+        details={'id': str(instance.pk), 'str_repr': str(instance), 'target': get_audit_target(instance)},
+        ip_address=get_current_ip()
     )
+
+
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+def invalidate_domain_cache(sender, instance, **kwargs):
+    hostnames = {instance.domain}
+    # A renamed domain must stop resolving under its old hostname as well.
+    changes = instance.get_tracked_changes(fields=['domain'])
+    if 'domain' in changes:
+        hostnames.add(changes['domain']['old'])
+    instance.snapshot_tracked_fields(fields=['domain'])
+    # After the commit: until then a request would cache the old mapping again.
+    transaction.on_commit(lambda: invalidate_hostnames(hostnames))
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def invalidate_client_cache(sender, instance, **kwargs):
+    # Cached entries hold the Client itself (schema_name, name, ...).
+    hostnames = list(Domain.objects.filter(tenant_id=instance.pk).values_list('domain', flat=True))
+    transaction.on_commit(lambda: invalidate_hostnames(hostnames))
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
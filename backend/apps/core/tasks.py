@@ -0,0 +1,29 @@
+from celery import shared_task
+from django.conf import settings
+
+from .models import UserImport
+from .partitions import archive_expired_partitions, ensure_partitions
+from .provisioning import refresh_template, template_is_current
+from .user_import import run_import
+
+
+@shared_task(ignore_result=True)
+def maintain_audit_log_partitions():
+    """Create upcoming AuditLog partitions and archive the expired ones."""
+    ensure_partitions(months_ahead=settings.AUDIT_LOG_PARTITIONS_AHEAD)
+    archive_expired_partitions(settings.AUDIT_LOG_RETENTION_MONTHS, str(settings.AUDIT_LOG_ARCHIVE_DIR))
+
+
+# Resumable, so redelivery after a lost worker is safe.
+@shared_task(ignore_result=True, acks_late=True)
+def import_users_task(import_id):
+    """Run or resume a UserImport created through the API."""
+    user_import = UserImport.objects.select_related('tenant', 'created_by').get(pk=import_id)
+    run_import(user_import)
+
+
+@shared_task(ignore_result=True)
+def refresh_tenant_template_task():
+    """Bring the tenant template schema up to date with the migrations on disk."""
+    if not template_is_current():
+        refresh_template()
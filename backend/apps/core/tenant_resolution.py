@@ -0,0 +1,116 @@
+"""
+Cached hostname -> tenant resolution.
+
+Two levels in front of the Domain/Client query that django-tenants runs on
+every request:
+
+1. an in-process LRU (TENANT_CACHE_LOCAL_SIZE entries, TENANT_CACHE_LOCAL_TTL
+   seconds), so the hot path costs neither a query nor a network hop;
+2. the shared ``default`` cache (Redis), so a new worker or an LRU miss does
+   not reach the database either.
+
+Domain and Client saves/deletes invalidate both levels explicitly (see
+signals.py). Other processes' LRUs expire within TENANT_CACHE_LOCAL_TTL.
+"""
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = 'tenant:host:{}'
+NOT_FOUND = 'not-found'
+
+
+class LocalTTLCache:
+    """Small thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = LocalTTLCache(
+    maxsize=getattr(settings, 'TENANT_CACHE_LOCAL_SIZE', 1024),
+    ttl=getattr(settings, 'TENANT_CACHE_LOCAL_TTL', 30),
+)
+
+
+def _shared_cache():
+    return caches['default']
+
+
+def resolve_tenant(domain_model, hostname):
+    """
+    Return the tenant for ``hostname`` or raise ``domain_model.DoesNotExist``.
+
+    Unknown hostnames are cached too, so random Host headers cannot turn into
+    one query per request.
+    """
+    tenant = _local.get(hostname)
+    if tenant is None:
+        key = CACHE_KEY.format(hostname)
+        try:
+            tenant = _shared_cache().get(key)
+        except Exception:
+            logger.warning('Tenant cache unavailable, resolving %s from the database', hostname)
+            tenant = None
+        if tenant is None:
+            try:
+                tenant = domain_model.objects.select_related('tenant').get(domain=hostname).tenant
+            except domain_model.DoesNotExist:
+                tenant = NOT_FOUND
+            try:
+                _shared_cache().set(key, tenant, getattr(settings, 'TENANT_CACHE_TTL', 3600))
+            except Exception:
+                pass
+        _local.set(hostname, tenant)
+
+    if tenant == NOT_FOUND:
+        raise domain_model.DoesNotExist(f'No domain for hostname "{hostname}"')
+    # The middleware annotates the tenant per request; keep the cached copy clean.
+    return copy.copy(tenant)
+
+
+def invalidate_hostnames(hostnames):
+    hostnames = [hostname for hostname in hostnames if hostname]
+    for hostname in hostnames:
+        _local.delete(hostname)
+    try:
+        _shared_cache().delete_many([CACHE_KEY.format(hostname) for hostname in hostnames])
+    except Exception:
+        logger.warning('Could not invalidate tenant cache for %s', hostnames)
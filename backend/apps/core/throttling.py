@@ -0,0 +1,190 @@
+"""
+Shared sliding-window rate limiting.
+
+Every request is counted against up to two quotas: the caller (user, or IP
+for anonymous requests) and the tenant the request is addressed to. Quotas
+are looked up per endpoint class (``throttle_scope`` on the view, e.g.
+``catalog`` or ``upload``) in ``DEFAULT_THROTTLE_RATES``.
+
+Counters live in Redis as sliding-window counters (current window plus the
+weighted previous one); all quotas of a request are checked and incremented
+by one Lua script, so the check is atomic and costs one round trip. While
+Redis is unreachable each process limits with its own token buckets.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .redis_client import get_redis
+from .tenant_resolution import LocalTTLCache
+
+logger = logging.getLogger(__name__)
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# KEYS: (current window, previous window) per quota.
+# ARGV: now in ms, then (limit, window in ms) per quota.
+# Returns {1, 0} and counts the request if every quota allows it, otherwise
+# {0, ms until the most restrictive quota allows a request}.
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local wait = 0
+for i = 1, #KEYS / 2 do
+    local limit = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+    local remaining = window - now % window
+    local current = tonumber(redis.call('GET', KEYS[i * 2 - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[i * 2]) or '0')
+    if previous * remaining / window + current + 1 > limit then
+        local delay = remaining
+        if current + 1 <= limit and previous > 0 then
+            delay = remaining - (limit - current - 1) * window / previous
+        end
+        if delay > wait then
+            wait = delay
+        end
+    end
+end
+if wait > 0 then
+    return {0, math.ceil(wait)}
+end
+for i = 1, #KEYS / 2 do
+    redis.call('INCR', KEYS[i * 2 - 1])
+    redis.call('PEXPIRE', KEYS[i * 2 - 1], tonumber(ARGV[i * 2 + 1]) * 2)
+end
+return {1, 0}
+"""
+
+
+def parse_rate(rate):
+    """'100/hour' -> (100, 3600); ``None`` disables the quota."""
+    if rate is None:
+        return None
+    count, period = rate.split('/')
+    return int(count), DURATIONS[period[0]]
+
+
+def get_rate(scope, kind):
+    rates = api_settings.DEFAULT_THROTTLE_RATES
+    if scope and f'{scope}.{kind}' in rates:
+        return parse_rate(rates[f'{scope}.{kind}'])
+    return parse_rate(rates.get(kind))
+
+
+class TokenBucketFallback:
+    """Per-process token buckets used while Redis is unavailable."""
+
+    def __init__(self, maxsize=10000):
+        self._buckets = LocalTTLCache(maxsize=maxsize, ttl=86400)
+        self._lock = threading.Lock()
+
+    def allow(self, quotas, now):
+        with self._lock:
+            buckets = []
+            wait = 0
+            for key, limit, window in quotas:
+                bucket = self._buckets.get(key) or [float(limit), now]
+                rate = limit / window
+                bucket[0] = min(float(limit), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                self._buckets.set(key, bucket)
+                if bucket[0] < 1:
+                    wait = max(wait, (1 - bucket[0]) / rate if rate else window)
+                buckets.append(bucket)
+            if wait:
+                return False, wait
+            for bucket in buckets:
+                bucket[0] -= 1
+            return True, 0
+
+
+_fallback = TokenBucketFallback()
+_script = None
+_redis_retry_at = 0.0
+
+
+def _run_script(keys, args):
+    global _script
+    if _script is None:
+        _script = get_redis().register_script(SLIDING_WINDOW_SCRIPT)
+    return _script(keys=keys, args=args)
+
+
+def check_quotas(quotas, now=None):
+    """
+    Count one request against ``quotas`` [(key, limit, window seconds)].
+
+    Returns ``(allowed, wait_seconds)``.
+    """
+    global _redis_retry_at
+    now = time.time() if now is None else now
+    if now >= _redis_retry_at:
+        now_ms = int(now * 1000)
+        keys, args = [], [now_ms]
+        for key, limit, window in quotas:
+            window_ms = window * 1000
+            index = now_ms // window_ms
+            keys += [f'throttle:{key}:{index}', f'throttle:{key}:{index - 1}']
+            args += [limit, window_ms]
+        try:
+            allowed, wait_ms = _run_script(keys, args)
+            return bool(allowed), wait_ms / 1000
+        except Exception:
+            logger.warning('Rate limiter cannot reach Redis; using local token buckets')
+            _redis_retry_at = now + settings.THROTTLE_REDIS_RETRY_INTERVAL
+    return _fallback.allow(quotas, now)
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Per-caller and per-tenant quotas for the view's ``throttle_scope``.
+
+    Rates: ``<scope>.<kind>`` or ``<kind>`` in DEFAULT_THROTTLE_RATES, where
+    kind is ``anon`` (per IP), ``user`` or ``tenant``.
+    """
+
+    def get_quotas(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        prefix = scope or 'default'
+        quotas = []
+
+        user = request.user
+        if user is not None and user.is_authenticated:
+            kind, ident = 'user', user.pk
+        else:
+            kind, ident = 'anon', self.get_ident(request)
+        rate = get_rate(scope, kind)
+        if rate:
+            quotas.append((f'{prefix}:{kind}:{ident}', *rate))
+
+        tenant = getattr(request, 'tenant', None)
+        rate = get_rate(scope, 'tenant')
+        if tenant is not None and rate:
+            quotas.append((f'{prefix}:tenant:{tenant.schema_name}', *rate))
+        return quotas
+
+    def allow_request(self, request, view):
+        quotas = self.get_quotas(request, view)
+        if not quotas:
+            return True
+        allowed, self._wait = check_quotas(quotas)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class CatalogThrottleScopeMixin:
+    """Reads count against the ``catalog`` quotas, writes against ``throttle_write_scope``."""
+    throttle_write_scope = None
+
+    @property
+    def throttle_scope(self):
+        if self.request.method in SAFE_METHODS:
+            return 'catalog'
+        return self.throttle_write_scope
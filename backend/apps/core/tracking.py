@@ -0,0 +1,79 @@
+"""
+Load-time field snapshots for audited models.
+
+Instances remember the field values they were loaded with (``from_db``) or
+last saved with, so an update can be diffed against its previous state
+without selecting the old row again.
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+
+_encoder = DjangoJSONEncoder()
+_JSON_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+def to_json_safe(value):
+    """Cheap JSON-safe conversion for a single field value."""
+    if isinstance(value, _JSON_PRIMITIVES):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [to_json_safe(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): to_json_safe(item) for key, item in value.items()}
+    return _encoder.default(value)
+
+
+class FieldTrackerMixin:
+    """
+    Mixin for models whose changes are audited or otherwise diffed on save.
+
+    Only concrete editable fields are tracked, keyed by field name with the raw
+    column value (the same shape ``model_to_dict`` used to produce).
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_tracked_fields()
+        return instance
+
+    @classmethod
+    def _tracked_fields(cls):
+        return [f for f in cls._meta.concrete_fields if f.editable]
+
+    def snapshot_tracked_fields(self, fields=None):
+        """Remember current values of ``fields`` (all tracked fields by default)."""
+        state = self.__dict__.setdefault('_tracked_state', {})
+        for field in self._tracked_fields():
+            # Deferred fields are not loaded and therefore not tracked.
+            if field.attname not in self.__dict__:
+                continue
+            if fields is None or field.name in fields or field.attname in fields:
+                state[field.name] = self.__dict__[field.attname]
+
+    def get_tracked_values(self, exclude=()):
+        """JSON-safe values of all tracked fields."""
+        return {
+            field.name: to_json_safe(field.value_from_object(self))
+            for field in self._tracked_fields()
+            if field.name not in exclude
+        }
+
+    def get_tracked_changes(self, exclude=(), fields=None):
+        """
+        JSON-safe ``{field: {'old': ..., 'new': ...}}`` for changed fields.
+
+        ``fields`` limits the comparison, e.g. to the ``update_fields`` of a save.
+        """
+        state = self.__dict__.get('_tracked_state', {})
+        diff = {}
+        for field in self._tracked_fields():
+            name = field.name
+            if name in exclude or (fields is not None and name not in fields and field.attname not in fields):
+                continue
+            if field.attname not in self.__dict__:
+                continue
+            old_value = state.get(name)
+            new_value = self.__dict__[field.attname]
+            if old_value != new_value:
+                diff[name] = {'old': to_json_safe(old_value), 'new': to_json_safe(new_value)}
+        return diff
@@ -1,12 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RegisterView, UserViewSet, ActivationCodeView
+from .views import RegisterView, UserViewSet, ActivationCodeView, AuditLogViewSet, UserImportViewSet, TenantProvisionView
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
+router.register(r'audit-logs', AuditLogViewSet, basename='auditlog')
+router.register(r'user-imports', UserImportViewSet, basename='userimport')
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('activation/validate/', ActivationCodeView.as_view(), name='validate_activation'),
+    path('tenants/', TenantProvisionView.as_view(), name='provision_tenant'),
     path('', include(router.urls)),
 ]
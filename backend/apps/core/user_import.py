@@ -0,0 +1,207 @@
+"""
+Bulk user import from CSV or XLSX.
+
+Rows are streamed from the file and handled in chunks: each chunk is
+validated, its passwords are hashed across a process pool, and the users are
+inserted with one ``bulk_create`` together with a single audit entry and the
+import's progress. A chunk is all-or-nothing, so an interrupted import is
+resumed from ``UserImport.processed_rows``.
+
+Columns (header row, any order): username, password, email, first_name,
+last_name, role. Only username and password are required.
+"""
+import csv
+import io
+import logging
+from itertools import islice
+
+from billiard import Pool
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from . import audit
+from .models import ImportStatus
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+COLUMNS = ('username', 'password', 'email', 'first_name', 'last_name', 'role')
+IMPORTABLE_ROLES = ('STUDENT', 'INSTRUCTOR')
+
+
+def _normalize(row):
+    return {column: (str(row.get(column) or '')).strip() for column in COLUMNS}
+
+
+def _read_csv(file):
+    reader = csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+    for row in reader:
+        yield _normalize(row)
+
+
+def _read_xlsx(file):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(name or '').strip().lower() for name in next(rows, ())]
+        for values in rows:
+            if any(value not in (None, '') for value in values):
+                yield _normalize(dict(zip(header, values)))
+    finally:
+        workbook.close()
+
+
+def read_rows(file, name):
+    """Stream the data rows of ``file`` as dicts keyed by COLUMNS."""
+    if name.lower().endswith('.xlsx'):
+        return _read_xlsx(file)
+    return _read_csv(file)
+
+
+def validate_rows(rows, first_row):
+    """
+    Split ``rows`` into importable rows and ``{'row', 'errors'}`` entries.
+
+    ``first_row`` is the 1-based data row number of ``rows[0]``.
+    """
+    usernames = [row['username'] for row in rows if row['username']]
+    taken = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+    valid, rejected, seen = [], [], set()
+    for number, row in enumerate(rows, start=first_row):
+        errors = {}
+        username = row['username']
+        if not username:
+            errors['username'] = 'Bu alan zorunludur.'
+        elif username in taken or username in seen:
+            errors['username'] = 'Bu kullanıcı adı zaten kullanılıyor.'
+        else:
+            try:
+                User.username_validator(username)
+            except ValidationError as e:
+                errors['username'] = ' '.join(e.messages)
+
+        if row['email']:
+            try:
+                validate_email(row['email'])
+            except ValidationError:
+                errors['email'] = 'Geçersiz e-posta adresi.'
+
+        row['role'] = row['role'].upper() or 'STUDENT'
+        if row['role'] not in IMPORTABLE_ROLES:
+            errors['role'] = f'Geçersiz rol: {row["role"]}.'
+
+        if not row['password']:
+            errors['password'] = 'Bu alan zorunludur.'
+        else:
+            try:
+                validate_password(row['password'], User(username=username, email=row['email']))
+            except ValidationError as e:
+                errors['password'] = ' '.join(e.messages)
+
+        if errors:
+            rejected.append({'row': number, 'errors': errors})
+        else:
+            seen.add(username)
+            valid.append(row)
+    return valid, rejected
+
+
+def hash_passwords(passwords, pool=None):
+    if pool is None:
+        return [make_password(password) for password in passwords]
+    return pool.map(make_password, passwords)
+
+
+def import_chunk(user_import, rows, first_row, pool=None):
+    """Validate, hash and insert one chunk; commits the users and the progress together."""
+    valid, rejected = validate_rows(rows, first_row)
+    hashes = hash_passwords([row['password'] for row in valid], pool)
+    users = [
+        User(
+            username=row['username'],
+            email=row['email'],
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            role=row['role'],
+            tenant_id=user_import.tenant_id,
+            password=password_hash,
+        )
+        for row, password_hash in zip(valid, hashes)
+    ]
+
+    with transaction.atomic():
+        # bulk_create skips the per-row audit signals; the chunk is audited once.
+        User.objects.bulk_create(users)
+        audit.record(
+            user=user_import.created_by,
+            action='USER_BULK_IMPORT',
+            details={
+                'target': user_import.tenant.name,
+                'import_id': user_import.pk,
+                'rows': [first_row, first_row + len(rows) - 1],
+                'created': len(users),
+                'rejected': len(rejected),
+            },
+        )
+        room = settings.USER_IMPORT_MAX_ERRORS - len(user_import.errors)
+        user_import.errors.extend(rejected[:max(room, 0)])
+        user_import.processed_rows += len(rows)
+        user_import.created_count += len(users)
+        user_import.error_count += len(rejected)
+        user_import.save(update_fields=['processed_rows', 'created_count', 'error_count', 'errors', 'updated_at'])
+
+
+def run_import(user_import, chunk_size=None, workers=None, progress=None):
+    """
+    Import (or resume) ``user_import``; ``progress`` is called after each chunk.
+
+    Rows before ``processed_rows`` were committed by an earlier run and are skipped.
+    """
+    chunk_size = chunk_size or settings.USER_IMPORT_CHUNK_SIZE
+    workers = workers or settings.USER_IMPORT_HASH_WORKERS
+
+    user_import.status = ImportStatus.RUNNING
+    user_import.error_message = ''
+    if user_import.total_rows is None:
+        with user_import.file.open('rb') as file:
+            user_import.total_rows = sum(1 for _ in read_rows(file, user_import.file.name))
+    user_import.save(update_fields=['status', 'error_message', 'total_rows', 'updated_at'])
+
+    # billiard (Celery's multiprocessing fork) can also fork from inside a worker.
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        with user_import.file.open('rb') as file:
+            rows = islice(read_rows(file, user_import.file.name), user_import.processed_rows, None)
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                import_chunk(user_import, chunk, user_import.processed_rows + 1, pool)
+                if progress:
+                    progress(user_import)
+    except Exception as e:
+        logger.exception('User import %s failed', user_import.pk)
+        user_import.status = ImportStatus.FAILED
+        user_import.error_message = str(e)
+        user_import.save(update_fields=['status', 'error_message', 'updated_at'])
+        raise
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    # The file holds plain-text passwords and is not needed any more.
+    user_import.file.delete(save=False)
+    user_import.status = ImportStatus.COMPLETED
+    user_import.save(update_fields=['status', 'file', 'updated_at'])
+    return user_import
@@ -1,10 +1,24 @@
-from rest_framework import generics, viewsets, permissions, status
+import ipaddress
+import uuid
+
+from rest_framework import generics, mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
+from rest_framework.exceptions import ValidationError
 from django.contrib.auth import get_user_model
-from .serializers import UserSerializer, RegisterSerializer, ActivationCodeSerializer
-from .models import ActivationCode
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .serializers import (
+    UserSerializer, RegisterSerializer, ActivationCodeSerializer, AuditLogSerializer, UserImportSerializer,
+    TenantProvisionSerializer,
+)
+from .models import ActivationCode, AuditLog, ImportStatus, UserImport
+from .pagination import KeysetPagination
+from .permissions import IsAdminOrTenantAdmin, IsPlatformAdmin
+from .tasks import import_users_task
 
 User = get_user_model()
 
@@ -13,6 +27,11 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = (permissions.AllowAny,)
     serializer_class = RegisterSerializer
 
+class TenantProvisionView(generics.CreateAPIView):
+    """Create an academy: its schema is cloned from the template (see apps.core.provisioning)."""
+    permission_classes = [IsPlatformAdmin]
+    serializer_class = TenantProvisionSerializer
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -50,3 +69,100 @@ class ActivationCodeView(APIView):
             return Response({"valid": False, "error": "Expired or used"}, status=status.HTTP_400_BAD_REQUEST)
         except ActivationCode.DoesNotExist:
             return Response({"valid": False, "error": "Invalid code"}, status=status.HTTP_404_NOT_FOUND)
+
+class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Audit trail for the SystemLogs page, newest first.
+
+    Filters: ``action`` (comma separated), ``user`` (id), ``ip``, ``since`` /
+    ``until`` (ISO 8601) and ``target`` (matched with ``details @> {"target": ...}``
+    on the GIN index). Paginated by ``(timestamp, id)`` keyset cursor.
+    """
+    serializer_class = AuditLogSerializer
+    permission_classes = [IsAdminOrTenantAdmin]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = AuditLog.objects.select_related('user')
+        user = self.request.user
+        if user.role != 'ADMIN':
+            # Tenant admins only see activity of their own academy's users.
+            if user.tenant_id is None:
+                return queryset.none()
+            queryset = queryset.filter(user__tenant_id=user.tenant_id)
+
+        if self.action != 'list':
+            return queryset
+
+        params = self.request.query_params
+        if params.get('action'):
+            queryset = queryset.filter(action__in=params['action'].split(','))
+        if params.get('user'):
+            try:
+                user_id = uuid.UUID(params['user'])
+            except ValueError:
+                raise ValidationError({'user': 'Geçersiz kullanıcı kimliği.'})
+            queryset = queryset.filter(user_id=user_id)
+        if params.get('ip'):
+            try:
+                ip_address = ipaddress.ip_address(params['ip'])
+            except ValueError:
+                raise ValidationError({'ip': 'Geçersiz IP adresi.'})
+            queryset = queryset.filter(ip_address=str(ip_address))
+        if params.get('target'):
+            queryset = queryset.filter(details__contains={'target': params['target']})
+        for param, lookup in (('since', 'timestamp__gte'), ('until', 'timestamp__lt')):
+            if params.get(param):
+                value = parse_datetime(params[param])
+                if value is None:
+                    raise ValidationError({param: 'Geçersiz tarih formatı (ISO 8601 bekleniyor).'})
+                queryset = queryset.filter(**{lookup: value})
+        return queryset
+
+class UserImportViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                        viewsets.GenericViewSet):
+    """
+    Bulk user import for an academy: upload a CSV/XLSX file, then poll the
+    import for progress. Tenant admins always import into their own tenant.
+    """
+    serializer_class = UserImportSerializer
+    permission_classes = [IsAdminOrTenantAdmin]
+    parser_classes = [MultiPartParser]
+
+    def get_queryset(self):
+        queryset = UserImport.objects.order_by('-created_at')
+        user = self.request.user
+        if user.role != 'ADMIN':
+            queryset = queryset.filter(tenant_id=user.tenant_id)
+        return queryset
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        tenant = serializer.validated_data.get('tenant')
+        if user.role != 'ADMIN' or tenant is None:
+            tenant = user.tenant
+        if tenant is None:
+            raise ValidationError({'tenant': 'Kullanıcıların aktarılacağı akademi belirtilmelidir.'})
+        user_import = serializer.save(tenant=tenant, created_by=user)
+        transaction.on_commit(lambda: import_users_task.delay(user_import.pk))
+
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """
+        Continue a failed import after its last committed chunk. Running
+        imports are left alone: one whose worker died is redelivered by the
+        broker (the task is acks_late).
+        """
+        user_import = self.get_object()
+        # Conditional, so concurrent requests queue a single task.
+        resumed = UserImport.objects.filter(pk=user_import.pk, status=ImportStatus.FAILED).update(
+            status=ImportStatus.PENDING, updated_at=timezone.now(),
+        )
+        if not resumed:
+            return Response(
+                {'error': 'Yalnızca başarısız olan bir aktarım devam ettirilebilir.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        user_import.refresh_from_db()
+        transaction.on_commit(lambda: import_users_task.delay(user_import.pk))
+        return Response(self.get_serializer(user_import).data, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,127 @@
+"""
+Direct-to-object-storage uploads.
+
+Instead of streaming a file through a Django worker, the client asks for a
+presigned POST (or PUT) for one new object key, uploads straight to
+MinIO/S3 and then hands the returned ``upload`` token to the API, e.g. as
+the ``upload`` field of a DocumentLesson. The token is signed and names
+the key, size, content type, purpose, user and tenant it was issued for.
+Attaching it checks the object with a HEAD request; the file is never
+downloaded.
+
+Only available when the purpose's storage is an S3 storage (see
+``DOCUMENT_STORAGE``).
+"""
+import posixpath
+import uuid
+
+import boto3
+from botocore.client import Config
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core import signing
+from django.db import connection
+from django.utils.text import get_valid_filename
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from .models import DocumentLesson
+
+TOKEN_SALT = 'apps.lms.direct_uploads'
+
+# What each purpose may upload, where it goes and who may ask for it.
+PURPOSES = {
+    'document': {
+        'field': DocumentLesson._meta.get_field('file'),
+        'max_size': DocumentLesson.MAX_FILE_SIZE,
+        'roles': ('INSTRUCTOR', 'ADMIN', 'TENANT_ADMIN'),
+        'content_types': {
+            'pdf': 'application/pdf',
+            'doc': 'application/msword',
+            'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+            'xls': 'application/vnd.ms-excel',
+            'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        },
+    },
+}
+
+
+class DirectUploadUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Doğrudan yükleme için nesne depolama yapılandırılmamış.'
+
+
+def purpose_storage(purpose):
+    storage = PURPOSES[purpose]['field'].storage
+    if not isinstance(storage, S3Boto3Storage):
+        raise DirectUploadUnavailable()
+    return storage
+
+
+def presigning_client():
+    # Signed for the endpoint browsers use, which is part of the signature.
+    return boto3.client(
+        's3',
+        endpoint_url=settings.AWS_S3_PUBLIC_ENDPOINT_URL,
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_S3_REGION_NAME,
+        config=Config(signature_version='s3v4'),
+    )
+
+
+def presign(purpose, filename, content_type, size, user, method='POST'):
+    """
+    A presigned POST or PUT for a new key under the purpose's upload_to,
+    bound to ``content_type`` and exactly ``size`` bytes.
+    """
+    storage = purpose_storage(purpose)
+    field = PURPOSES[purpose]['field']
+    key = posixpath.join(
+        field.upload_to, connection.schema_name, uuid.uuid4().hex, get_valid_filename(filename),
+    )
+    client = presigning_client()
+    expiry = settings.DIRECT_UPLOAD_URL_EXPIRY
+    if method == 'PUT':
+        url = client.generate_presigned_url(
+            'put_object', ExpiresIn=expiry, HttpMethod='PUT',
+            Params={'Bucket': storage.bucket_name, 'Key': key, 'ContentType': content_type, 'ContentLength': size},
+        )
+        request = {'method': 'PUT', 'url': url, 'headers': {'Content-Type': content_type}}
+    else:
+        post = client.generate_presigned_post(
+            storage.bucket_name, key, ExpiresIn=expiry,
+            Fields={'Content-Type': content_type},
+            Conditions=[{'Content-Type': content_type}, ['content-length-range', size, size]],
+        )
+        request = {'method': 'POST', 'url': post['url'], 'fields': post['fields']}
+    token = signing.dumps({
+        'key': key, 'purpose': purpose, 'size': size, 'content_type': content_type,
+        'user': str(user.pk), 'schema': connection.schema_name,
+    }, salt=TOKEN_SALT)
+    return {**request, 'key': key, 'upload': token, 'expires_in': expiry}
+
+
+def verify(token, purpose, user):
+    """
+    Check an ``upload`` token and its object; returns (key, size).
+
+    Raises ValidationError if the token is not this user's, or the object
+    is missing or differs from what was presigned.
+    """
+    try:
+        upload = signing.loads(token, salt=TOKEN_SALT, max_age=settings.DIRECT_UPLOAD_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        raise ValidationError('Geçersiz veya süresi dolmuş yükleme anahtarı.')
+    if (upload['purpose'], upload['user'], upload['schema']) != (purpose, str(user.pk), connection.schema_name):
+        raise ValidationError('Bu yükleme anahtarı burada kullanılamaz.')
+
+    storage = purpose_storage(purpose)
+    try:
+        head = storage.connection.meta.client.head_object(Bucket=storage.bucket_name, Key=upload['key'])
+    except ClientError:
+        raise ValidationError('Dosya henüz yüklenmemiş.')
+    if head['ContentLength'] != upload['size'] or head['ContentType'] != upload['content_type']:
+        raise ValidationError('Yüklenen dosya beklenen boyut veya türde değil.')
+    return upload['key'], head['ContentLength']
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+# Paths of existing categories, from the roots down.
+BUILD_PATHS = """
+WITH RECURSIVE tree (id, path) AS (
+    SELECT id, '/' || id || '/' FROM lms_category WHERE parent_id IS NULL
+    UNION ALL
+    SELECT c.id, tree.path || c.id || '/' FROM lms_category c JOIN tree ON c.parent_id = tree.id
+)
+UPDATE lms_category c SET path = tree.path FROM tree WHERE c.id = tree.id
+"""
+
+# Every published course counts for its category and all of its ancestors.
+COUNT_COURSES = """
+UPDATE lms_category c SET course_count = counts.total
+FROM (
+    SELECT ancestor.id, count(*) AS total
+    FROM lms_course course
+    JOIN lms_category category ON category.id = course.category_id
+    CROSS JOIN LATERAL unnest(string_to_array(trim(both '/' from category.path), '/')::bigint[]) AS ancestor (id)
+    WHERE course.is_published
+    GROUP BY ancestor.id
+) counts
+WHERE c.id = counts.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0005_alter_documentlesson_file_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='course_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=1000),
+        ),
+        migrations.RunSQL(BUILD_PATHS, migrations.RunSQL.noop),
+        migrations.RunSQL(COUNT_COURSES, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0006_category_path_course_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['created_at', 'id'], name='lms_course_created_id_idx'),
+        ),
+    ]
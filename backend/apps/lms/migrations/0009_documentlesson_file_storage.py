@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:33
+
+import apps.lms.models
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0008_videoupload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentlesson',
+            name='file',
+            field=models.FileField(help_text='PDF, Word (.doc, .docx) veya Excel (.xls, .xlsx) yükleyebilirsiniz (Max: 5MB)', storage=apps.lms.models.document_storage, upload_to='course_documents/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'doc', 'docx', 'xls', 'xlsx']), apps.lms.models.DocumentLesson.validate_file_size]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0009_documentlesson_file_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videolesson',
+            name='renditions',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
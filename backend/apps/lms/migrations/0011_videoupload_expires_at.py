@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:15
+
+import apps.lms.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0010_videolesson_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videoupload',
+            name='expires_at',
+            field=models.DateTimeField(default=apps.lms.models.video_upload_expiry),
+        ),
+    ]
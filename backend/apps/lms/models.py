@@ -1,15 +1,30 @@
-from django.db import models
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import storages
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from polymorphic.models import PolymorphicModel
 from django.utils.translation import gettext_lazy as _
 
+from apps.core.tracking import FieldTrackerMixin
+
 User = get_user_model()
 
-class Category(models.Model):
+def document_storage():
+    return storages[settings.DOCUMENT_STORAGE]
+
+class Category(FieldTrackerMixin, models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
     icon = models.CharField(max_length=50, blank=True, help_text="Lucide icon name")
+    # Ids from the root down, e.g. '/1/5/23/'. A subtree is path__startswith;
+    # the pattern_ops index Django adds for db_index serves that LIKE.
+    path = models.CharField(max_length=1000, db_index=True, editable=False, default='')
+    # Published courses in this category and all of its descendants.
+    course_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -17,7 +32,33 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
-class Course(models.Model):
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        if self.pk and self.parent and f'/{self.pk}/' in self.parent.path:
+            raise ValidationError({'parent': 'Kategori kendi alt kategorisinin altına taşınamaz.'})
+
+    def save(self, *args, **kwargs):
+        from .services import move_category
+
+        adding = self._state.adding
+        if not adding and kwargs.get('update_fields') is None:
+            # path and course_count are maintained by services; never write
+            # back the possibly stale values loaded with this instance.
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.editable
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding or 'parent' in self.get_tracked_changes(fields=['parent']):
+                move_category(self)
+        self.snapshot_tracked_fields(fields=['parent'])
+
+    def delete(self, *args, **kwargs):
+        # post_delete takes course_count off the ancestors; use the current one.
+        self.refresh_from_db(fields=['path', 'course_count'])
+        return super().delete(*args, **kwargs)
+
+class Course(FieldTrackerMixin, models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='courses')
@@ -29,6 +70,12 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # CoursePagination seeks on (created_at, id).
+            models.Index(fields=['created_at', 'id'], name='lms_course_created_id_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -76,6 +123,8 @@ class VideoLesson(Lesson):
     video_url = models.URLField(help_text="URL to the processed HLS stream", blank=True, null=True) # Repurposed as HLS URL
     duration = models.DurationField(null=True, blank=True)
     processing_status = models.CharField(max_length=20, choices=PROCESSING_STATUS_CHOICES, default='PENDING')
+    # HLS renditions of the last transcode with their encode timings.
+    renditions = models.JSONField(default=list, blank=True, editable=False)
 
     class Meta:
         verbose_name = "Video Lesson"
@@ -95,6 +144,7 @@ class DocumentLesson(Lesson):
     
     file = models.FileField(
         upload_to='course_documents/',
+        storage=document_storage,
         validators=[
             FileExtensionValidator(allowed_extensions=ALLOWED_EXTENSIONS),
             validate_file_size
@@ -109,7 +159,8 @@ class DocumentLesson(Lesson):
         verbose_name_plural = "Document Lessons"
     
     def save(self, *args, **kwargs):
-        if self.file:
+        # Direct uploads arrive with file_size already read from the bucket.
+        if self.file and (self.file_size is None or not self.file._committed):
             # Otomatik dosya tipi algılama
             self.file_type = self.file.name.split('.')[-1].lower()
             self.file_size = self.file.size
@@ -146,3 +197,33 @@ class HTMLLesson(Lesson):
     
     class Meta:
         verbose_name = "HTML Lesson"
+
+def video_upload_expiry():
+    return timezone.now() + settings.VIDEO_UPLOAD_EXPIRY
+
+
+class VideoUpload(models.Model):
+    """
+    A resumable (tus-style) upload of a VideoLesson source file.
+
+    Chunks are appended to ``partial_path``; ``offset`` is the number of
+    bytes received so far. When it reaches ``length`` the file is moved to
+    the lesson's ``source_file`` and transcoding starts (see apps.lms.uploads).
+    An unfinished upload expires VIDEO_UPLOAD_EXPIRY after its last chunk.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    lesson = models.ForeignKey(VideoLesson, on_delete=models.CASCADE, related_name='uploads')
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='video_uploads')
+    filename = models.CharField(max_length=255)
+    length = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(default=video_upload_expiry)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.length})"
+
+    @property
+    def partial_path(self):
+        return settings.VIDEO_UPLOAD_TEMP_DIR / str(self.id)
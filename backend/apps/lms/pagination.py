@@ -0,0 +1,8 @@
+from apps.core.pagination import KeysetPagination
+
+
+class CoursePagination(KeysetPagination):
+    """Newest courses first, on the (created_at, id) index."""
+    timestamp_field = 'created_at'
+    page_size = 20
+    max_page_size = 100
@@ -0,0 +1,125 @@
+"""
+Live transcoding progress in Redis.
+
+The transcode task reports its progress through a ProgressReporter, which
+keeps the latest state of a lesson in one Redis key and publishes it on a
+channel of the same name. It writes at most once per
+``TRANSCODE_PROGRESS_INTERVAL`` seconds, plus the first and final states;
+the database is only written when the status itself changes.
+
+A state is ``{'status', 'percent', 'eta_seconds', 'updated_at'}``. Readers
+poll it with read_progress() or follow it with stream_progress(). The
+stream is an async generator on redis.asyncio, for ASGI only: under WSGI a
+stream would hold a worker thread for as long as it is open.
+"""
+import json
+import time
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+from apps.core.redis_client import get_redis
+
+FINAL_STATUSES = ('COMPLETED', 'FAILED')
+KEEPALIVE_SECONDS = 15
+
+
+def progress_key(schema_name, lesson_id):
+    return f'{schema_name}:transcode:{lesson_id}'
+
+
+class ProgressReporter:
+    def __init__(self, schema_name, lesson_id, interval=None):
+        self.key = progress_key(schema_name, lesson_id)
+        self.interval = settings.TRANSCODE_PROGRESS_INTERVAL if interval is None else interval
+        self.started = time.monotonic()
+        self.published = None  # monotonic time of the last write
+
+    def update(self, fraction):
+        """Report ``fraction`` (0..1) of the work done; dropped if the last write was too recent."""
+        now = time.monotonic()
+        if self.published is not None and now - self.published < self.interval:
+            return
+        elapsed = now - self.started
+        eta = round(elapsed * (1 - fraction) / fraction) if fraction > 0 else None
+        self.publish('PROCESSING', round(fraction * 100.0, 1), eta)
+
+    def finish(self, status):
+        self.publish(status, 100.0 if status == 'COMPLETED' else None, 0)
+
+    def publish(self, status, percent, eta_seconds):
+        self.published = time.monotonic()
+        state = json.dumps({
+            'status': status, 'percent': percent, 'eta_seconds': eta_seconds, 'updated_at': time.time(),
+        })
+        try:
+            with get_redis().pipeline() as pipe:
+                pipe.set(self.key, state, ex=settings.TRANSCODE_PROGRESS_TTL)
+                pipe.publish(self.key, state)
+                pipe.execute()
+        except redis.RedisError:
+            # Progress is informative; the transcode goes on without it.
+            pass
+
+
+def read_progress(schema_name, lesson_id):
+    """The latest reported state, or None if there is none (or Redis is down)."""
+    try:
+        state = get_redis().get(progress_key(schema_name, lesson_id))
+    except redis.RedisError:
+        return None
+    return json.loads(state) if state else None
+
+
+def status_progress(status):
+    """The state derived from a processing_status alone."""
+    percent = {'PENDING': 0.0, 'PROCESSING': 0.0, 'COMPLETED': 100.0}.get(status)
+    return {'status': status, 'percent': percent, 'eta_seconds': None, 'updated_at': None}
+
+
+def lesson_progress(schema_name, lesson_id, status):
+    """
+    The state to show for a lesson whose processing_status is ``status``:
+    the reported one while it is processing, otherwise derived from the status.
+    """
+    if status == 'PROCESSING':
+        state = read_progress(schema_name, lesson_id)
+        if state:
+            return state
+    return status_progress(status)
+
+
+async def stream_progress(schema_name, lesson_id, status):
+    """
+    Server-sent events: the state of a lesson whose processing_status is
+    ``status`` first, then every published state until a final one or
+    TRANSCODE_PROGRESS_STREAM_TIMEOUT. Comments keep idle connections open
+    through proxies.
+    """
+    key = progress_key(schema_name, lesson_id)
+    client = redis.asyncio.Redis.from_url(settings.CACHE_REDIS_URL, socket_connect_timeout=1)
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    state = status_progress(status)
+    try:
+        try:
+            # Subscribed before reading the current state, so no update falls in between.
+            await pubsub.subscribe(key)
+            stored = await client.get(key) if status == 'PROCESSING' else None
+        except redis.RedisError:
+            yield f'data: {json.dumps(state)}\n\n'
+            return
+        if stored:
+            state = json.loads(stored)
+        yield f'data: {json.dumps(state)}\n\n'
+        deadline = time.monotonic() + settings.TRANSCODE_PROGRESS_STREAM_TIMEOUT
+        while state['status'] not in FINAL_STATUSES and time.monotonic() < deadline:
+            message = await pubsub.get_message(timeout=KEEPALIVE_SECONDS)
+            if message is None:
+                yield ': keepalive\n\n'
+                continue
+            state = json.loads(message['data'])
+            yield f'data: {message["data"].decode()}\n\n'
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
@@ -1,19 +1,39 @@
+from django.conf import settings
 from rest_framework import serializers
 from rest_polymorphic.serializers import PolymorphicSerializer
-from .models import Category, Course, Module, Lesson, VideoLesson, DocumentLesson, QuizLesson, HTMLLesson, LiveLesson, Assignment
+from apps.core.validators import FileValidator
+from . import direct_uploads
+from .models import (
+    Category, Course, Module, Lesson, VideoLesson, VideoUpload, DocumentLesson, QuizLesson, HTMLLesson, LiveLesson,
+    Assignment,
+)
+from .services import get_category_tree
+
+class SparseFieldsetMixin:
+    """
+    Accepts ``fields`` (keep only these) and ``expand`` (also render these
+    ``Meta.expandable_fields``, which are left out by default).
+    """
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        hidden = set(getattr(self.Meta, 'expandable_fields', ())) - set(expand)
+        if fields:
+            hidden |= set(self.fields) - set(fields) - set(expand)
+        for name in hidden:
+            self.fields.pop(name, None)
 
 class CategorySerializer(serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'icon', 'children']
+        fields = ['id', 'name', 'slug', 'icon', 'course_count', 'children']
         read_only_fields = ['slug']
 
     def get_children(self, obj):
-        if obj.children.exists():
-            return CategorySerializer(obj.children.all(), many=True).data
-        return []
+        node = get_category_tree()['nodes'].get(obj.pk)
+        return node['children'] if node else []
 
 class VideoLessonSerializer(serializers.ModelSerializer):
     resourcetype = serializers.SerializerMethodField()
@@ -42,17 +62,32 @@ class VideoLessonSerializer(serializers.ModelSerializer):
 class DocumentLessonSerializer(serializers.ModelSerializer):
     resourcetype = serializers.SerializerMethodField()
     file_url = serializers.SerializerMethodField()
+    # Token of a direct upload (apps.lms.direct_uploads), instead of ``file``.
+    upload = serializers.CharField(write_only=True, required=False)
     
     class Meta:
         model = DocumentLesson
         fields = [
             'id', 'title', 'order', 'module', 'is_preview', 'resourcetype', 
-            'file', 'file_url', 'file_type', 'file_size'
+            'file', 'file_url', 'file_type', 'file_size', 'upload'
         ]
         extra_kwargs = {
+            'file': {'required': False},
             'file_type': {'read_only': True},
             'file_size': {'read_only': True}
         }
+
+    def validate(self, attrs):
+        token = attrs.pop('upload', None)
+        if token:
+            try:
+                key, size = direct_uploads.verify(token, 'document', self.context['request'].user)
+            except serializers.ValidationError as exc:
+                raise serializers.ValidationError({'upload': exc.detail})
+            attrs.update(file=key, file_size=size, file_type=key.rsplit('.', 1)[-1].lower())
+        elif self.instance is None and not attrs.get('file'):
+            raise serializers.ValidationError({'file': 'Dosya veya yükleme anahtarı gerekli.'})
+        return attrs
     
     def get_resourcetype(self, obj):
         return 'DocumentLesson'
@@ -123,14 +158,14 @@ class LessonPolymorphicSerializer(PolymorphicSerializer):
         Assignment: AssignmentSerializer
     }
 
-class ModuleSerializer(serializers.ModelSerializer):
+class ModuleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     lessons = LessonPolymorphicSerializer(many=True, read_only=True)
 
     class Meta:
         model = Module
         fields = ['id', 'course', 'title', 'order', 'description', 'lessons']
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     modules = ModuleSerializer(many=True, read_only=True)
     instructor_name = serializers.CharField(source='instructor.get_full_name', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -140,3 +175,63 @@ class CourseSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'slug', 'category', 'category_name', 'instructor', 'instructor_name', 
                   'description', 'image', 'price', 'is_published', 'created_at', 'modules']
         read_only_fields = ['slug']
+
+class CourseListSerializer(CourseSerializer):
+    """Catalog entry: the syllabus only with ``?expand=modules``."""
+    total_modules = serializers.IntegerField(read_only=True)
+
+    class Meta(CourseSerializer.Meta):
+        fields = CourseSerializer.Meta.fields + ['total_modules']
+        expandable_fields = ['modules']
+
+class VideoUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VideoUpload
+        fields = ['id', 'lesson', 'filename', 'length', 'offset', 'created_at', 'completed_at', 'expires_at']
+        read_only_fields = ['offset', 'created_at', 'completed_at', 'expires_at']
+
+    def validate_lesson(self, lesson):
+        user = self.context['request'].user
+        if user.role != 'ADMIN' and lesson.module.course.instructor_id != user.pk:
+            raise serializers.ValidationError('Bu derse video yükleme yetkiniz yok.')
+        return lesson
+
+    def validate_filename(self, value):
+        extension = value.rsplit('.', 1)[-1].lower() if '.' in value else ''
+        if extension not in FileValidator.ALLOWED_VIDEO_EXTENSIONS:
+            raise serializers.ValidationError(
+                f'Desteklenmeyen video formatı. '
+                f'İzin verilen formatlar: {", ".join(FileValidator.ALLOWED_VIDEO_EXTENSIONS)}'
+            )
+        return value
+
+    def validate_length(self, value):
+        if not 0 < value <= settings.VIDEO_UPLOAD_MAX_SIZE:
+            max_mb = settings.VIDEO_UPLOAD_MAX_SIZE / 1024 / 1024
+            raise serializers.ValidationError(f'Video boyutu 0 ile {max_mb:.0f}MB arasında olmalıdır.')
+        return value
+
+class DirectUploadSerializer(serializers.Serializer):
+    purpose = serializers.ChoiceField(choices=list(direct_uploads.PURPOSES))
+    filename = serializers.CharField(max_length=200)
+    # Defaults to the type registered for the file's extension.
+    content_type = serializers.CharField(max_length=100, required=False)
+    size = serializers.IntegerField(min_value=1)
+    method = serializers.ChoiceField(choices=['POST', 'PUT'], default='POST')
+
+    def validate(self, attrs):
+        purpose = direct_uploads.PURPOSES[attrs['purpose']]
+        if self.context['request'].user.role not in purpose['roles']:
+            raise serializers.ValidationError({'purpose': 'Bu tür dosya yükleme yetkiniz yok.'})
+        extension = attrs['filename'].rsplit('.', 1)[-1].lower() if '.' in attrs['filename'] else ''
+        if extension not in purpose['content_types']:
+            raise serializers.ValidationError({
+                'filename': f'İzin verilen formatlar: {", ".join(purpose["content_types"])}',
+            })
+        attrs.setdefault('content_type', purpose['content_types'][extension])
+        if attrs['content_type'] != purpose['content_types'][extension]:
+            raise serializers.ValidationError({'content_type': 'Dosya türü uzantıyla uyuşmuyor.'})
+        if attrs['size'] > purpose['max_size']:
+            max_mb = purpose['max_size'] / 1024 / 1024
+            raise serializers.ValidationError({'size': f'Dosya boyutu {max_mb:.0f}MB\'dan küçük olmalıdır.'})
+        return attrs
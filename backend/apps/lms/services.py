@@ -0,0 +1,189 @@
+import hashlib
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Prefetch, Value
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
+from django.utils.http import quote_etag
+from django_tenants.utils import schema_context
+
+from apps.core.cache import get_or_set, invalidate_group, tenant_cache
+from .models import Category, Course, Module
+
+CATEGORY_GROUP = 'categories'
+OUTLINE_KEY = 'outline:{}'
+
+
+def build_category_tree():
+    """
+    Load every category in one query and nest them in memory.
+
+    Returns {'roots': [...], 'nodes': {id: node}, 'etag': str}; a node is
+    the CategorySerializer representation, and ``nodes`` shares its dicts
+    with ``roots``.
+    """
+    nodes = {}
+    parents = []
+    for row in Category.objects.order_by('id').values('id', 'name', 'slug', 'icon', 'course_count', 'parent_id'):
+        parents.append(row.pop('parent_id'))
+        nodes[row['id']] = {**row, 'children': []}
+
+    roots = []
+    for node, parent_id in zip(nodes.values(), parents):
+        parent = nodes.get(parent_id)
+        (parent['children'] if parent else roots).append(node)
+
+    etag = hashlib.sha1(json.dumps(roots, sort_keys=True).encode()).hexdigest()
+    return {'roots': roots, 'nodes': nodes, 'etag': etag}
+
+
+def get_category_tree():
+    """The current tenant's category tree, cached until a Category changes."""
+    return get_or_set('tree', build_category_tree, settings.CATEGORY_TREE_CACHE_TTL, group=CATEGORY_GROUP)
+
+
+def invalidate_category_tree():
+    """
+    Drop the cached tree once the transaction commits; until then a request
+    would cache the old tree again under the new group version.
+    """
+    schema_name = connection.schema_name
+
+    def invalidate():
+        with schema_context(schema_name):
+            invalidate_group(CATEGORY_GROUP)
+
+    transaction.on_commit(invalidate)
+
+
+def ancestor_ids(path):
+    """'/1/5/23/' -> [1, 5, 23]: the category itself and all of its ancestors."""
+    return [int(part) for part in path.strip('/').split('/') if part]
+
+
+def adjust_course_counts(category_ids, delta):
+    if category_ids and delta:
+        Category.objects.filter(pk__in=category_ids).update(course_count=F('course_count') + delta)
+
+
+def move_category(category):
+    """
+    Set the path of a new or re-parented ``category`` and its subtree, and
+    move its course count from the old ancestors to the new ones.
+
+    Called by Category.save() inside its transaction.
+    """
+    parent_path = '/'
+    if category.parent_id:
+        parent_path = Category.objects.values_list('path', flat=True).get(pk=category.parent_id)
+    old_path, course_count = (
+        Category.objects.select_for_update().values_list('path', 'course_count').get(pk=category.pk)
+    )
+    if old_path and parent_path.startswith(old_path):
+        raise ValueError('A category cannot be moved into its own subtree.')
+
+    path = f'{parent_path}{category.pk}/'
+    category.path = path
+    if path == old_path:
+        return
+    if not old_path:
+        Category.objects.filter(pk=category.pk).update(path=path)
+        return
+    Category.objects.filter(path__startswith=old_path).update(
+        path=Concat(Value(path), Substr('path', len(old_path) + 1)),
+    )
+    adjust_course_counts(ancestor_ids(old_path)[:-1], -course_count)
+    adjust_course_counts(ancestor_ids(path)[:-1], course_count)
+
+
+def subtree_path(category):
+    """Path of the category with this id or slug, or None if there is none."""
+    lookup = {'pk': category} if str(category).isdigit() else {'slug': category}
+    return Category.objects.filter(**lookup).values_list('path', flat=True).first()
+
+
+def move_course(from_category_id, to_category_id):
+    """
+    Move one published course between categories (either may be None) in
+    the precomputed subtree counts.
+    """
+    if from_category_id == to_category_id:
+        return
+    paths = dict(Category.objects.filter(pk__in=[from_category_id, to_category_id]).values_list('pk', 'path'))
+    deltas = Counter()
+    deltas.subtract(ancestor_ids(paths.get(from_category_id, '')))
+    deltas.update(ancestor_ids(paths.get(to_category_id, '')))
+    # Shared ancestors cancel out.
+    for delta in (-1, 1):
+        adjust_course_counts([pk for pk, value in deltas.items() if value == delta], delta)
+    invalidate_category_tree()
+
+
+def with_outline(courses):
+    """
+    Load what CourseSerializer renders in a constant number of queries:
+    instructor and category joined, then one query for the modules, one for
+    the lessons and one per lesson type present (django-polymorphic fetches
+    the typed rows in bulk).
+    """
+    return courses.select_related('instructor', 'category').prefetch_related(
+        Prefetch('modules', queryset=Module.objects.prefetch_related('lessons')),
+    )
+
+
+def render_course_outline(course_id):
+    """
+    The CourseSerializer representation of a course as JSON bytes, with its
+    validators and what the view needs for access checks; None if the
+    course does not exist.
+
+    Rendered without a request, so file and image URLs are site-relative.
+    """
+    from rest_framework.renderers import JSONRenderer
+    from .serializers import CourseSerializer
+
+    course = with_outline(Course.objects.filter(pk=course_id)).first()
+    if course is None:
+        return None
+    body = JSONRenderer().render(CourseSerializer(course).data)
+    return {
+        'body': body,
+        'etag': quote_etag(hashlib.sha1(body).hexdigest()),
+        'last_modified': int(course.updated_at.timestamp()),
+        'is_published': course.is_published,
+        # A string, as the pk of the claims user it is compared with.
+        'instructor_id': str(course.instructor_id),
+    }
+
+
+def get_course_outline(course_id):
+    """The cached outline of a course; only built here when it is missing."""
+    return get_or_set(
+        OUTLINE_KEY.format(course_id), lambda: render_course_outline(course_id),
+        settings.COURSE_OUTLINE_CACHE_TTL, beta=0,
+    )
+
+
+def rebuild_course_outline(course_id):
+    tenant_cache().delete(OUTLINE_KEY.format(course_id))
+    return get_course_outline(course_id)
+
+
+def schedule_outline_rebuild(course_id):
+    """Rebuild the outline in the background once the transaction commits."""
+    from .tasks import rebuild_course_outline_task
+
+    schema_name = connection.schema_name
+    transaction.on_commit(lambda: rebuild_course_outline_task.delay(schema_name, course_id))
+
+
+def touch_course(course_id):
+    """
+    Record a module or lesson change as a change of its course, so
+    Course.updated_at is the outline's Last-Modified, deletions included.
+    """
+    Course.objects.filter(pk=course_id).update(updated_at=timezone.now())
+    schedule_outline_rebuild(course_id)
@@ -1,17 +1,72 @@
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
-from .models import VideoLesson
+from .models import Category, Course, Lesson, Module, VideoLesson
+from .services import (
+    adjust_course_counts, ancestor_ids, invalidate_category_tree, move_course, schedule_outline_rebuild,
+    touch_course,
+)
 from .tasks import transcode_video_task
 import os
 
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, instance, **kwargs):
+    invalidate_category_tree()
+
+@receiver(post_delete, sender=Category)
+def uncount_category(sender, instance, **kwargs):
+    # In a cascade only the top of the deleted subtree still has a parent;
+    # its course_count already includes every descendant.
+    if instance.parent_id and Category.objects.filter(pk=instance.parent_id).exists():
+        adjust_course_counts(ancestor_ids(instance.path)[:-1], -instance.course_count)
+
+@receiver(post_save, sender=Course)
+def count_course(sender, instance, **kwargs):
+    """Keep Category.course_count in step with published courses."""
+    changes = instance.get_tracked_changes(fields=['category', 'is_published'])
+    if changes:
+        # A new instance has no snapshot: it was neither published nor filed.
+        was_published = changes.get('is_published', {}).get('old', instance.is_published)
+        old_category_id = changes.get('category', {}).get('old', instance.category_id)
+        move_course(
+            old_category_id if was_published else None,
+            instance.category_id if instance.is_published else None,
+        )
+    instance.snapshot_tracked_fields(fields=['category', 'is_published'])
+
+@receiver(post_delete, sender=Course)
+def uncount_course(sender, instance, **kwargs):
+    if instance.is_published:
+        move_course(instance.category_id, None)
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def rebuild_course_outline(sender, instance, **kwargs):
+    schedule_outline_rebuild(instance.pk)
+
+def touch_outline(sender, instance, **kwargs):
+    """Modules and lessons are part of their course's outline."""
+    if isinstance(instance, Module):
+        course_id = instance.course_id
+    else:
+        course_id = Module.objects.filter(pk=instance.module_id).values_list('course_id', flat=True).first()
+    if course_id:
+        touch_course(course_id)
+
+# Signals are sent for the concrete class, so every lesson type is connected.
+for model in (Module, Lesson, *Lesson.__subclasses__()):
+    post_save.connect(touch_outline, sender=model, dispatch_uid=f'touch_outline_save_{model.__name__}')
+    post_delete.connect(touch_outline, sender=model, dispatch_uid=f'touch_outline_delete_{model.__name__}')
+
 @receiver(post_save, sender=VideoLesson)
 def trigger_transcoding(sender, instance, created, **kwargs):
     """Trigger video transcoding task when a new video is uploaded"""
     if instance.source_file and instance.processing_status == 'PENDING':
         # Trigger task
         # on_commit is better to ensure DB transaction is finished
-        from django.db import transaction
-        transaction.on_commit(lambda: transcode_video_task.delay(instance.id))
+        from django.db import connection, transaction
+        schema_name = connection.schema_name
+        transaction.on_commit(lambda: transcode_video_task.delay(schema_name, instance.id))
 
 @receiver(pre_delete, sender=VideoLesson)
 def delete_video_file(sender, instance, **kwargs):
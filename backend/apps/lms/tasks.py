@@ -1,73 +1,165 @@
+import logging
 import os
-import subprocess
+from datetime import timedelta
+
 from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
 from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import InterfaceError, OperationalError
+from django_tenants.utils import schema_context
+
+from apps.core.cache import tenant_cache
+from apps.core.models import Client
 from .models import VideoLesson
+from .progress import ProgressReporter
+from .services import rebuild_course_outline
+from .transcoding import MASTER_PLAYLIST, TranscodeError, transcode
+from .uploads import discard_expired_uploads
 
-@shared_task
-def transcode_video_task(lesson_id):
-    try:
-        lesson = VideoLesson.objects.get(id=lesson_id)
-        if not lesson.source_file:
-            return "No source file"
-
-        lesson.processing_status = 'PROCESSING'
-        lesson.save()
-
-        # Paths
-        input_path = lesson.source_file.path
-        
-        # Create output directory for HLS segments
-        file_name = os.path.splitext(os.path.basename(input_path))[0]
-        output_dir = os.path.join(settings.MEDIA_ROOT, 'course_videos', 'hls', file_name)
-        os.makedirs(output_dir, exist_ok=True)
-        
-        output_playlist = os.path.join(output_dir, 'index.m3u8')
-
-        # FFmpeg command for HLS transcoding
-        # -hls_time 10: Segment duration 10 seconds
-        # -hls_list_size 0: Include all segments in playlist
-        # -f hls: Output format
-        command = [
-            'ffmpeg',
-            '-i', input_path,
-            '-profile:v', 'baseline', # Baseline profile for compatibility
-            '-level', '3.0',
-            '-start_number', '0',
-            '-hls_time', '10',
-            '-hls_list_size', '0',
-            '-f', 'hls',
-            output_playlist
-        ]
-
-        # Run FFmpeg
-        process = subprocess.run(command, capture_output=True, text=True)
-        
-        if process.returncode != 0:
-            print(f"FFmpeg Error: {process.stderr}")
-            lesson.processing_status = 'FAILED'
-            lesson.save()
-            return f"Transcoding failed: {process.stderr}"
-
-        # Update Lesson
-        # Construct URL relative to MEDIA_URL
-        relative_path = os.path.join('course_videos', 'hls', file_name, 'index.m3u8')
-        # Assuming MEDIA_URL is handled by web server or S3
-        # For local dev with django.conf.urls.static, this works.
-        # For S3, we would need to upload the directory to S3. 
-        # Since we are using local filesystem for now (MinIO is in docker but we are using local media root in settings?),
-        # Let's check settings.py later. For now assume local file storage for simplicity or volume mount.
-        
-        lesson.video_url = settings.MEDIA_URL + relative_path
-        lesson.processing_status = 'COMPLETED'
-        lesson.save()
-
-        return "Transcoding completed successfully"
-
-    except VideoLesson.DoesNotExist:
+logger = logging.getLogger(__name__)
+
+TRANSCODE_LOCK_KEY = 'transcode-lock:{}'
+TIME_LIMIT_GRACE = 300  # seconds between the soft and the hard time limit
+LOCK_RETRY_SECONDS = 60
+# Enough waits to outlast a lock held until the hard time limit.
+LOCK_RETRIES = (settings.VIDEO_TRANSCODE_TIME_LIMIT + TIME_LIMIT_GRACE) // LOCK_RETRY_SECONDS + 1
+
+@shared_task(
+    bind=True,
+    ignore_result=True,
+    # Redelivered if the worker dies mid-encode; the lock and status check
+    # below make a second delivery harmless.
+    acks_late=True,
+    soft_time_limit=settings.VIDEO_TRANSCODE_TIME_LIMIT,
+    time_limit=settings.VIDEO_TRANSCODE_TIME_LIMIT + TIME_LIMIT_GRACE,
+    autoretry_for=(OperationalError, InterfaceError),
+    retry_backoff=30,
+    max_retries=3,
+)
+def transcode_video_task(self, schema_name, lesson_id, lock_waits=0):
+    reporter = ProgressReporter(schema_name, lesson_id)
+    with schema_context(schema_name):
+        # One transcode per lesson at a time; held until the hard time limit at most.
+        lock_key = TRANSCODE_LOCK_KEY.format(lesson_id)
+        if not tenant_cache().add(lock_key, 1, settings.VIDEO_TRANSCODE_TIME_LIMIT + TIME_LIMIT_GRACE):
+            # This delivery may be for a source uploaded during the running
+            # encode: try again once that one is done.
+            return wait_for_lock(self, (schema_name, lesson_id), lock_waits)
+        try:
+            return transcode_lesson(reporter, lesson_id)
+        finally:
+            tenant_cache().delete(lock_key)
+
+def wait_for_lock(task, args, lock_waits):
+    """
+    Queue ``task`` again for when a lesson's lock may be free. Waits are
+    counted in the ``lock_waits`` argument, apart from the retries of
+    failures, and give up after LOCK_RETRIES.
+    """
+    if lock_waits >= LOCK_RETRIES:
+        logger.error("Gave up waiting for the lock of %s%s", task.name, args)
+        return "Lesson locked"
+    task.apply_async(args, {'lock_waits': lock_waits + 1}, countdown=LOCK_RETRY_SECONDS)
+    return "Waiting for the lesson lock"
+
+def transcode_lesson(reporter, lesson_id):
+    lesson = VideoLesson.objects.filter(id=lesson_id).first()
+    if lesson is None:
         return "Lesson not found"
-    except Exception as e:
-        if 'lesson' in locals():
-            lesson.processing_status = 'FAILED'
-            lesson.save()
-        return f"Error: {str(e)}"
+    if not lesson.source_file:
+        return "No source file"
+    # COMPLETED/FAILED: a repeated trigger for a source that was already handled.
+    # A new source resets the lesson to PENDING.
+    if lesson.processing_status not in ('PENDING', 'PROCESSING'):
+        return "Already processed"
+
+    set_status(lesson, 'PROCESSING')
+    reporter.update(0)
+    try:
+        return encode_lesson(reporter, lesson)
+    except (OperationalError, InterfaceError):
+        raise  # retried with the lesson still PROCESSING
+    except (TranscodeError, SoftTimeLimitExceeded) as e:
+        logger.error("Transcoding lesson %s failed: %s", lesson.pk, e)
+        if not fail_lesson(reporter, lesson):
+            return "Source replaced while transcoding"
+        return f"Transcoding failed: {e}"
+    except Exception:
+        fail_lesson(reporter, lesson)
+        raise
+
+def encode_lesson(reporter, lesson):
+    input_path = lesson.source_file.path
+    # Output directory for the HLS renditions and their master playlist
+    file_name = os.path.splitext(os.path.basename(input_path))[0]
+    output_dir = os.path.join(settings.MEDIA_ROOT, 'course_videos', 'hls', file_name)
+
+    # Progress only goes to Redis, at most every TRANSCODE_PROGRESS_INTERVAL.
+    source, renditions = transcode(input_path, output_dir, on_progress=reporter.update)
+
+    # A source replaced while encoding is left PENDING for its own task,
+    # which retries until this one releases the lock.
+    current = VideoLesson.objects.filter(id=lesson.pk).values_list('source_file', flat=True).first()
+    if current != lesson.source_file.name:
+        reporter.publish('PENDING', 0.0, None)
+        return "Source replaced while transcoding"
+
+    # Players pick a rendition from the master playlist.
+    # URL relative to MEDIA_URL (local file storage / volume mount).
+    relative_path = os.path.join('course_videos', 'hls', file_name, MASTER_PLAYLIST)
+    lesson.video_url = settings.MEDIA_URL + relative_path
+    lesson.duration = timedelta(seconds=round(source['duration']))
+    lesson.renditions = renditions
+    set_status(lesson, 'COMPLETED', 'video_url', 'duration', 'renditions')
+    reporter.finish('COMPLETED')
+    return "Transcoding completed successfully"
+
+def fail_lesson(reporter, lesson):
+    """
+    Mark the lesson FAILED, unless its source was replaced during the encode
+    (which may be why it failed): the new source stays PENDING for its own
+    task. Returns whether the lesson was failed.
+    """
+    failed = VideoLesson.objects.filter(
+        id=lesson.pk, source_file=lesson.source_file.name,
+    ).update(processing_status='FAILED')
+    if failed:
+        lesson.processing_status = 'FAILED'
+        reporter.finish('FAILED')
+    else:
+        reporter.publish('PENDING', 0.0, None)
+    return bool(failed)
+
+def set_status(lesson, status, *fields):
+    """Write the status (and ``fields``) only, never the whole row."""
+    lesson.processing_status = status
+    lesson.save(update_fields=['processing_status', *fields])
+
+@shared_task(bind=True, ignore_result=True)
+def delete_replaced_source_task(self, schema_name, lesson_id, name, lock_waits=0):
+    """Delete a lesson's previous source file once no transcode of the lesson is reading it."""
+    with schema_context(schema_name):
+        lock_key = TRANSCODE_LOCK_KEY.format(lesson_id)
+        if not tenant_cache().add(lock_key, 1, settings.VIDEO_TRANSCODE_TIME_LIMIT + TIME_LIMIT_GRACE):
+            return wait_for_lock(self, (schema_name, lesson_id, name), lock_waits)
+        try:
+            if not VideoLesson.objects.filter(id=lesson_id, source_file=name).exists():
+                default_storage.delete(name)
+        finally:
+            tenant_cache().delete(lock_key)
+
+@shared_task(ignore_result=True)
+def rebuild_course_outline_task(schema_name, course_id):
+    """Re-render a course outline after the course, a module or a lesson changed."""
+    with schema_context(schema_name):
+        rebuild_course_outline(course_id)
+
+@shared_task(ignore_result=True)
+def discard_expired_uploads_task():
+    """Delete abandoned resumable uploads and their partial files in every schema."""
+    for schema_name in Client.objects.values_list('schema_name', flat=True):
+        with schema_context(schema_name):
+            discarded = discard_expired_uploads()
+        if discarded:
+            logger.info("Discarded %d expired video upload(s) in %s", discarded, schema_name)
@@ -0,0 +1,256 @@
+"""
+Adaptive-bitrate HLS for VideoLesson sources.
+
+The source is probed once with ffprobe and encoded into every rung of
+LADDER that does not upscale it (at least the smallest one). Each
+rendition is its own ffmpeg process writing ``<name>/index.m3u8``; they
+run side by side within ``VIDEO_TRANSCODE_CPU_BUDGET`` cores, largest
+first, and split that budget between them as ffmpeg threads. Key frames
+are forced on segment boundaries in every rendition, so players can
+switch between them at any segment. ``master.m3u8`` lists the renditions
+that were produced.
+
+Each rendition's encode time is returned (and stored on the lesson) to
+tune the ladder and the CPU budget against the worker's cores. Progress
+is read from ffmpeg's ``-progress`` output while it runs.
+"""
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MASTER_PLAYLIST = 'master.m3u8'
+
+# Rungs from the top; bitrates in kbit/s. ``codec`` is the RFC 6381 string
+# of the H.264 profile and level, advertised in the master playlist.
+LADDER = [
+    {'name': '1080p', 'height': 1080, 'video_bitrate': 5000, 'audio_bitrate': 128,
+     'profile': 'high', 'level': '4.1', 'codec': 'avc1.640029'},
+    {'name': '720p', 'height': 720, 'video_bitrate': 2800, 'audio_bitrate': 128,
+     'profile': 'main', 'level': '3.1', 'codec': 'avc1.4d401f'},
+    {'name': '480p', 'height': 480, 'video_bitrate': 1400, 'audio_bitrate': 96,
+     'profile': 'main', 'level': '3.0', 'codec': 'avc1.4d401e'},
+    {'name': '360p', 'height': 360, 'video_bitrate': 800, 'audio_bitrate': 96,
+     'profile': 'baseline', 'level': '3.0', 'codec': 'avc1.42e01e'},
+    {'name': '240p', 'height': 240, 'video_bitrate': 400, 'audio_bitrate': 64,
+     'profile': 'baseline', 'level': '3.0', 'codec': 'avc1.42e01e'},
+]
+AUDIO_CODEC = 'mp4a.40.2'  # AAC-LC
+MAXRATE_FACTOR = 1.07  # peak over average video bitrate
+BUFSIZE_FACTOR = 1.5
+
+
+class TranscodeError(Exception):
+    pass
+
+
+def probe(path):
+    """Display width and height, duration (seconds) and audio presence of a video file."""
+    process = subprocess.run(
+        ['ffprobe', '-v', 'error', '-print_format', 'json', '-show_streams', '-show_format', path],
+        capture_output=True, text=True,
+    )
+    if process.returncode != 0:
+        raise TranscodeError(f'ffprobe failed: {process.stderr.strip()}')
+    info = json.loads(process.stdout)
+    video = next((s for s in info['streams'] if s['codec_type'] == 'video'), None)
+    if video is None:
+        raise TranscodeError('The source has no video stream.')
+    width, height = video['width'], video['height']
+    # Phone recordings are stored sideways with a rotation to apply on playback.
+    rotation = video.get('tags', {}).get('rotate') or next(
+        (d.get('rotation') for d in video.get('side_data_list', []) if 'rotation' in d), 0,
+    )
+    if abs(int(rotation)) % 180 == 90:
+        width, height = height, width
+    return {
+        'width': width,
+        'height': height,
+        'duration': float(info['format'].get('duration') or video.get('duration') or 0),
+        'audio': any(s['codec_type'] == 'audio' for s in info['streams']),
+    }
+
+
+def select_ladder(source):
+    """The rungs of LADDER at or below the source height, with output sizes."""
+    rungs = [rung for rung in LADDER if rung['height'] <= source['height']] or [
+        {**LADDER[-1], 'height': source['height'] - source['height'] % 2},
+    ]
+    renditions = []
+    for rung in rungs:
+        # Matches ffmpeg's scale=-2:<height>.
+        width = 2 * round(source['width'] * rung['height'] / source['height'] / 2)
+        audio_bitrate = rung['audio_bitrate'] if source['audio'] else 0
+        bandwidth = int((rung['video_bitrate'] * MAXRATE_FACTOR + audio_bitrate) * 1000)
+        renditions.append({**rung, 'width': width, 'audio_bitrate': audio_bitrate, 'bandwidth': bandwidth})
+    return renditions
+
+
+def rendition_command(source_path, output_dir, rendition, threads):
+    segment_seconds = settings.VIDEO_HLS_SEGMENT_SECONDS
+    bitrate = rendition['video_bitrate']
+    command = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostats', '-progress', 'pipe:1', '-y', '-i', source_path,
+        '-map', '0:v:0', '-vf', f'scale=-2:{rendition["height"]}',
+        '-c:v', 'libx264', '-preset', settings.VIDEO_TRANSCODE_PRESET,
+        '-profile:v', rendition['profile'], '-level', rendition['level'], '-pix_fmt', 'yuv420p',
+        '-b:v', f'{bitrate}k', '-maxrate', f'{int(bitrate * MAXRATE_FACTOR)}k',
+        '-bufsize', f'{int(bitrate * BUFSIZE_FACTOR)}k',
+        # Identical key frame times in every rendition keep segments aligned.
+        '-force_key_frames', f'expr:gte(t,n_forced*{segment_seconds})', '-sc_threshold', '0',
+        '-threads', str(threads),
+    ]
+    if rendition['audio_bitrate']:
+        command += ['-map', '0:a:0', '-c:a', 'aac', '-b:a', f'{rendition["audio_bitrate"]}k', '-ac', '2']
+    return command + [
+        '-f', 'hls', '-hls_time', str(segment_seconds), '-hls_playlist_type', 'vod',
+        '-hls_segment_filename', os.path.join(output_dir, 'segment_%05d.ts'),
+        os.path.join(output_dir, 'index.m3u8'),
+    ]
+
+
+class RunningEncodes:
+    """The ffmpeg processes of one transcode, so they can all be stopped at once."""
+    def __init__(self):
+        self.processes = set()
+        self.stopped = False
+        self.lock = threading.Lock()
+
+    def add(self, process):
+        with self.lock:
+            self.processes.add(process)
+            if self.stopped:
+                process.kill()
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            for process in self.processes:
+                process.kill()
+
+
+def encode_rendition(source_path, output_dir, rendition, threads, on_progress=None, running=None):
+    """
+    Encode one rendition; returns the seconds it took. ``on_progress`` gets
+    the seconds of source encoded so far, read from ffmpeg's -progress
+    output as it is written. The process is registered with ``running``.
+    """
+    rendition_dir = os.path.join(output_dir, rendition['name'])
+    os.makedirs(rendition_dir, exist_ok=True)
+    command = rendition_command(source_path, rendition_dir, rendition, threads)
+    started = time.perf_counter()
+    # Progress is read from stdout line by line; stderr (errors only) goes
+    # to a file instead of memory.
+    with tempfile.TemporaryFile() as stderr:
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr, text=True) as process:
+            if running:
+                running.add(process)
+            for line in process.stdout:
+                if on_progress and line.startswith('out_time_us=') and line[12:].strip().isdigit():
+                    on_progress(int(line[12:]) / 1_000_000)
+        if process.returncode != 0:
+            stderr.seek(max(0, os.fstat(stderr.fileno()).st_size - 2000))
+            raise TranscodeError(f'{rendition["name"]}: {stderr.read().decode(errors="replace").strip()}')
+    return time.perf_counter() - started
+
+
+def master_playlist(renditions):
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-INDEPENDENT-SEGMENTS']
+    for rendition in renditions:
+        codecs = rendition['codec'] + (f',{AUDIO_CODEC}' if rendition['audio_bitrate'] else '')
+        lines += [
+            f'#EXT-X-STREAM-INF:BANDWIDTH={rendition["bandwidth"]},'
+            f'RESOLUTION={rendition["width"]}x{rendition["height"]},CODECS="{codecs}"',
+            f'{rendition["name"]}/index.m3u8',
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+class LadderProgress:
+    """
+    Combines the progress of renditions encoded side by side into one
+    fraction of the whole transcode, weighting each rendition by its pixel
+    count (a proxy for its encode time).
+    """
+    def __init__(self, renditions, duration, callback):
+        self.weights = {r['name']: r['width'] * r['height'] for r in renditions}
+        self.total = sum(self.weights.values())
+        self.duration = duration
+        self.callback = callback
+        self.done = dict.fromkeys(self.weights, 0.0)
+        self.lock = threading.Lock()
+
+    def for_rendition(self, name):
+        if not self.callback or not self.duration:
+            return None
+        return lambda seconds: self.update(name, seconds)
+
+    def update(self, name, seconds):
+        with self.lock:
+            self.done[name] = min(1.0, seconds / self.duration)
+            self.callback(sum(self.weights[n] * done for n, done in self.done.items()) / self.total)
+
+
+def transcode(source_path, output_dir, on_progress=None):
+    """
+    Encode ``source_path`` into an HLS ladder under ``output_dir`` (replacing
+    any earlier output) and write its master playlist. ``on_progress`` is
+    called with the fraction of the work done (0..1) as ffmpeg reports it.
+
+    Returns (source, renditions): the probe result and, per rendition, its
+    name, size, bandwidth, encode seconds and speed (source seconds encoded
+    per second).
+    """
+    source = probe(source_path)
+    renditions = select_ladder(source)
+    budget = max(1, settings.VIDEO_TRANSCODE_CPU_BUDGET)
+    workers = min(budget, len(renditions))
+    threads = max(1, budget // workers)
+
+    progress = LadderProgress(renditions, source['duration'], on_progress)
+    running = RunningEncodes()
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(output_dir)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Submitted largest first, so the longest encodes start first.
+        futures = [
+            pool.submit(
+                encode_rendition, source_path, output_dir, r, threads, progress.for_rendition(r['name']), running,
+            )
+            for r in renditions
+        ]
+        try:
+            seconds = [future.result() for future in futures]
+        except BaseException:
+            # A failed rendition, or the task's soft time limit: stop the rest.
+            pool.shutdown(wait=False, cancel_futures=True)
+            running.stop()
+            raise
+
+    results = []
+    for rendition, elapsed in zip(renditions, seconds):
+        results.append({
+            'name': rendition['name'], 'width': rendition['width'], 'height': rendition['height'],
+            'bandwidth': rendition['bandwidth'], 'encode_seconds': round(elapsed, 2),
+            'speed': round(source['duration'] / elapsed, 2) if elapsed else None,
+        })
+    with open(os.path.join(output_dir, MASTER_PLAYLIST), 'w') as playlist:
+        playlist.write(master_playlist(renditions))
+
+    logger.info(
+        'Transcoded %s (%.0fs of video) in %.1fs with %d worker(s) x %d thread(s): %s',
+        source_path, source['duration'], time.perf_counter() - started, workers, threads,
+        ', '.join(f'{r["name"]} {r["encode_seconds"]}s' for r in results),
+    )
+    return source, results
@@ -0,0 +1,164 @@
+"""
+Resumable video uploads, following the tus 1.0 core protocol and its
+checksum extension.
+
+A client creates a VideoUpload for a lesson with the total ``length``,
+asks for the current ``Upload-Offset`` (HEAD) after an interruption and
+sends the rest with PATCH requests starting at that offset. Each PATCH
+body is streamed onto the end of the partial file in CHUNK_READ_SIZE
+pieces, so worker memory does not depend on the chunk or file size. An
+optional ``Upload-Checksum: <algorithm> <base64 digest>`` is checked as
+the chunk is written; a mismatching chunk is cut off again.
+
+The last chunk completes the upload: the partial file is renamed into the
+storage location of ``VideoLesson.source_file`` (never read again) and the
+lesson goes back to PENDING, which queues transcode_video_task. The file
+it replaces is deleted by delete_replaced_source_task once no transcode of
+the lesson holds its lock.
+
+Following the tus expiration extension, every chunk moves ``expires_at``
+(``Upload-Expires``) VIDEO_UPLOAD_EXPIRY ahead. Unfinished uploads past it
+are gone for the client and discarded by discard_expired_uploads().
+"""
+import base64
+import fcntl
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import VideoUpload, video_upload_expiry
+
+TUS_VERSION = '1.0.0'
+CHUNK_READ_SIZE = 64 * 1024
+CHECKSUM_ALGORITHMS = {'md5': hashlib.md5, 'sha1': hashlib.sha1, 'sha256': hashlib.sha256}
+SOURCE_FILE_DIR = 'course_videos/raw/'
+
+
+class OffsetMismatch(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Upload-Offset sunucudaki konumla uyuşmuyor.'
+
+
+class UploadBusy(APIException):
+    status_code = status.HTTP_423_LOCKED
+    default_detail = 'Bu yükleme için başka bir parça gönderiliyor.'
+
+
+class ChecksumMismatch(APIException):
+    # tus checksum extension: 460 Checksum Mismatch
+    status_code = 460
+    default_detail = 'Parçanın sağlama toplamı uyuşmuyor.'
+
+
+def parse_checksum(header):
+    """``'sha1 <base64>'`` -> (hash object, expected digest); None without a header."""
+    if not header:
+        return None
+    algorithm, _, encoded = header.partition(' ')
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise ValidationError({'Upload-Checksum': f'Desteklenmeyen algoritma: {algorithm}.'})
+    try:
+        expected = base64.b64decode(encoded, validate=True)
+    except ValueError:
+        raise ValidationError({'Upload-Checksum': 'Geçersiz base64 değeri.'})
+    return CHECKSUM_ALGORITHMS[algorithm](), expected
+
+
+def append_chunk(upload, stream, offset, size, checksum=None):
+    """
+    Write ``size`` bytes from ``stream`` at ``offset`` and return the new
+    offset. Completes the upload when the last byte has arrived.
+    """
+    if upload.completed_at is not None or offset + size > upload.length:
+        raise OffsetMismatch('Parça yüklemenin sonunu aşıyor.')
+    upload.partial_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(upload.partial_path, 'ab') as partial:
+        try:
+            fcntl.flock(partial, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadBusy()
+        # Only the lock holder may trust the stored offset.
+        upload.refresh_from_db(fields=['offset', 'completed_at'])
+        if offset != upload.offset or upload.completed_at is not None:
+            raise OffsetMismatch()
+        # Bytes past the recorded offset belong to a chunk that never finished.
+        partial.truncate(upload.offset)
+
+        received = 0
+        while received < size:
+            data = stream.read(min(CHUNK_READ_SIZE, size - received))
+            if not data:
+                break
+            partial.write(data)
+            if checksum:
+                checksum[0].update(data)
+            received += len(data)
+
+        if checksum and (received < size or checksum[0].digest() != checksum[1]):
+            partial.truncate(upload.offset)
+            raise ChecksumMismatch()
+        # Without a checksum, a chunk cut short by the client is kept as far
+        # as it got; the client resumes from the offset HEAD reports.
+        partial.flush()
+        os.fsync(partial.fileno())
+        upload.offset += received
+        upload.expires_at = video_upload_expiry()
+        VideoUpload.objects.filter(pk=upload.pk).update(offset=upload.offset, expires_at=upload.expires_at)
+        if upload.offset == upload.length:
+            complete_upload(upload)
+    return upload.offset
+
+
+def complete_upload(upload):
+    """Move the finished file to the lesson and queue transcoding."""
+    lesson = upload.lesson
+    name = default_storage.get_available_name(SOURCE_FILE_DIR + get_valid_filename(upload.filename))
+    target = default_storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(upload.partial_path, target)
+    os.chmod(target, settings.FILE_UPLOAD_PERMISSIONS)
+
+    previous = lesson.source_file.name
+    lesson.source_file.name = name
+    lesson.processing_status = 'PENDING'
+    # post_save queues transcode_video_task once this commits.
+    lesson.save(update_fields=['source_file', 'processing_status'])
+    if previous and previous != name:
+        # A transcode of the previous file may still be reading it.
+        from django.db import connection, transaction
+        from .tasks import delete_replaced_source_task
+        schema_name = connection.schema_name
+        transaction.on_commit(lambda: delete_replaced_source_task.delay(schema_name, lesson.pk, previous))
+
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['completed_at'])
+
+
+def discard_upload(upload):
+    try:
+        os.remove(upload.partial_path)
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def discard_expired_uploads():
+    """Discard the unfinished uploads past their expiry; returns how many."""
+    discarded = 0
+    for upload in VideoUpload.objects.filter(completed_at__isnull=True, expires_at__lte=timezone.now()):
+        try:
+            with open(upload.partial_path, 'rb') as partial:
+                fcntl.flock(partial, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                discard_upload(upload)
+        except BlockingIOError:
+            continue  # a chunk that started before the expiry is still being written
+        except FileNotFoundError:
+            discard_upload(upload)  # no chunk ever arrived
+        discarded += 1
+    return discarded
@@ -1,12 +1,17 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, CourseViewSet, ModuleViewSet, LessonViewSet
+from .views import (
+    CategoryViewSet, CourseViewSet, ModuleViewSet, LessonViewSet, VideoUploadViewSet,
+    DirectUploadViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet)
 router.register(r'courses', CourseViewSet)
 router.register(r'modules', ModuleViewSet)
 router.register(r'lessons', LessonViewSet)
+router.register(r'video-uploads', VideoUploadViewSet, basename='video-upload')
+router.register(r'direct-uploads', DirectUploadViewSet, basename='direct-upload')
 
 urlpatterns = [
     path('', include(router.urls)),
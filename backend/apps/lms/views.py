@@ -1,15 +1,63 @@
-from rest_framework import viewsets, permissions
+from rest_framework import mixins, viewsets, permissions, status
+from rest_framework.exceptions import UnsupportedMediaType, ValidationError
 from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
-from django.db import models
-from .models import Category, Course, Module, Lesson
-from .serializers import CategorySerializer, CourseSerializer, ModuleSerializer, LessonSerializer, LessonPolymorphicSerializer
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection, models
+from django.db.models import Count
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from .models import Category, Course, Module, Lesson, VideoLesson, VideoUpload
+from .pagination import CoursePagination
+from .serializers import (
+    CategorySerializer, CourseListSerializer, CourseSerializer, ModuleSerializer, LessonSerializer,
+    LessonPolymorphicSerializer, VideoUploadSerializer, DirectUploadSerializer,
+)
+from .services import get_category_tree, get_course_outline, subtree_path, with_outline
+from .direct_uploads import presign
+from .progress import lesson_progress, stream_progress
+from .uploads import TUS_VERSION, append_chunk, discard_upload, parse_checksum
+from apps.core.authentication import ClaimsJWTAuthentication
+from apps.core.throttling import CatalogThrottleScopeMixin
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class EventStreamRenderer(BaseRenderer):
+    """Lets views negotiate text/event-stream; they return the stream themselves."""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+class SparseFieldsetViewMixin:
+    """Passes ``?fields=a,b`` and ``?expand=x`` of GET requests to the serializer."""
+
+    def query_list(self, param):
+        return [name for name in self.request.query_params.get(param, '').split(',') if name]
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == 'GET':
+            kwargs.setdefault('fields', self.query_list('fields'))
+            kwargs.setdefault('expand', self.query_list('expand'))
+        return super().get_serializer(*args, **kwargs)
+
+class CategoryViewSet(CatalogThrottleScopeMixin, viewsets.ModelViewSet):
     queryset = Category.objects.filter(parent=None)
     serializer_class = CategorySerializer
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def list(self, request, *args, **kwargs):
+        """The whole tree from the tenant cache; answers If-None-Match with 304."""
+        tree = get_category_tree()
+        # Weak: the same tree renders differently per format (JSON, browsable API).
+        etag = 'W/' + quote_etag(tree['etag'])
+        response = get_conditional_response(request, etag=etag) or Response(tree['roots'])
+        response['ETag'] = etag
+        return response
+
     def perform_create(self, serializer):
         from django.utils.text import slugify
         name = serializer.validated_data.get('name')
@@ -22,18 +70,47 @@ class CategoryViewSet(viewsets.ModelViewSet):
             counter += 1
         serializer.save(slug=slug)
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(SparseFieldsetViewMixin, CatalogThrottleScopeMixin, viewsets.ModelViewSet):
+    """
+    Lists (the catalog and my_courses) are keyset-paginated and render
+    CourseListSerializer: a module count instead of the syllabus unless
+    ``?expand=modules``. Detail views keep the full outline.
+    """
     queryset = Course.objects.filter(is_published=True)
     serializer_class = CourseSerializer
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = CoursePagination
+    authentication_classes = [ClaimsJWTAuthentication]
+    throttle_write_scope = 'upload'  # cover image
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         # Allow instructors to see their own unpublished courses
         user = self.request.user
         if user.is_authenticated and user.role == 'INSTRUCTOR':
-            return Course.objects.filter(models.Q(is_published=True) | models.Q(instructor=user))
-        return super().get_queryset()
+            courses = Course.objects.filter(models.Q(is_published=True) | models.Q(instructor_id=user.pk))
+        else:
+            courses = super().get_queryset()
+        category = self.request.query_params.get('category')
+        if category:
+            # ?category=<id or slug> includes every subcategory: one indexed
+            # prefix match on the category path instead of walking the tree.
+            path = subtree_path(category)
+            courses = courses.filter(category__path__startswith=path) if path else courses.none()
+        return self.with_related(courses)
+
+    def is_list(self):
+        return self.action in ('list', 'my_courses')
+
+    def get_serializer_class(self):
+        return CourseListSerializer if self.is_list() else CourseSerializer
+
+    def with_related(self, courses):
+        if not self.is_list():
+            return with_outline(courses)
+        courses = courses.annotate(total_modules=Count('modules'))
+        if 'modules' in self.query_list('expand'):
+            return with_outline(courses)
+        return courses.select_related('instructor', 'category')
 
     def perform_create(self, serializer):
         from django.utils.text import slugify
@@ -47,6 +124,28 @@ class CourseViewSet(viewsets.ModelViewSet):
             counter += 1
         serializer.save(instructor=self.request.user, slug=slug)
 
+    @action(detail=True, methods=['get'])
+    def outline(self, request, pk=None):
+        """
+        The prebuilt CourseSerializer document from the tenant cache, with a
+        strong ETag and Last-Modified: a warm hit or a 304 touches no table.
+        """
+        outline = get_course_outline(pk) if pk.isdigit() else None
+        if outline is None:
+            raise Http404
+        user = request.user
+        is_instructor = user.is_authenticated and str(user.pk) == str(outline['instructor_id'])
+        if not (outline['is_published'] or is_instructor):
+            raise Http404
+        response = get_conditional_response(
+            request, etag=outline['etag'], last_modified=outline['last_modified'],
+        ) or HttpResponse(outline['body'], content_type='application/json')
+        response['ETag'] = outline['etag']
+        response['Last-Modified'] = http_date(outline['last_modified'])
+        # Let browsers keep the document but revalidate on every visit.
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
     @action(detail=False, methods=['get'])
     def my_courses(self, request):
         user = request.user
@@ -54,18 +153,27 @@ class CourseViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Authentication credentials were not provided."}, status=401)
         
         # Filter courses where the user is the instructor
-        courses = Course.objects.filter(instructor=user)
-        serializer = self.get_serializer(courses, many=True)
-        return Response(serializer.data)
+        courses = self.with_related(Course.objects.filter(instructor_id=user.pk))
+        serializer = self.get_serializer(self.paginate_queryset(courses), many=True)
+        return self.get_paginated_response(serializer.data)
 
-class ModuleViewSet(viewsets.ModelViewSet):
-    queryset = Module.objects.all()
+class ModuleViewSet(SparseFieldsetViewMixin, CatalogThrottleScopeMixin, viewsets.ModelViewSet):
+    queryset = Module.objects.prefetch_related('lessons')
     serializer_class = ModuleSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
-class LessonViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        fields = self.query_list('fields')
+        if fields and 'lessons' not in fields:
+            return Module.objects.all()
+        return super().get_queryset()
+
+class LessonViewSet(CatalogThrottleScopeMixin, viewsets.ModelViewSet):
     queryset = Lesson.objects.all()
     serializer_class = LessonPolymorphicSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
+    throttle_write_scope = 'upload'  # video and document files
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_class(self):
@@ -98,7 +206,7 @@ status=400
             )
         
         model_class, serializer_class = type_mapping[resource_type]
-        serializer = serializer_class(data=request.data)
+        serializer = serializer_class(data=request.data, context=self.get_serializer_context())
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         
@@ -151,7 +259,7 @@ status=400
             if 'order' not in data:
                 data['order'] = old_order
             
-            serializer = serializer_class(data=data)
+            serializer = serializer_class(data=data, context=self.get_serializer_context())
             serializer.is_valid(raise_exception=True)
             serializer.save()
             
@@ -166,7 +274,9 @@ status=400
         else:
             serializer_class = LessonSerializer
         
-        serializer = serializer_class(instance, data=request.data, partial=partial)
+        serializer = serializer_class(
+            instance, data=request.data, partial=partial, context=self.get_serializer_context(),
+        )
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         
@@ -175,3 +285,106 @@ status=400
         output_serializer = LessonPolymorphicSerializer(updated_instance)
         return Response(output_serializer.data)
 
+    @action(detail=True, methods=['get'], renderer_classes=[JSONRenderer, EventStreamRenderer])
+    def progress(self, request, pk=None):
+        """
+        Transcoding progress of a video lesson for its instructor: the current
+        state as JSON to poll, or with ``Accept: text/event-stream`` a stream
+        of states until the transcode ends. Streams are only served under
+        ASGI; WSGI deployments answer with the JSON state.
+        """
+        row = VideoLesson.objects.filter(pk=pk).values_list(
+            'processing_status', 'module__course__instructor_id',
+        ).first()
+        if row is None:
+            raise Http404
+        processing_status, instructor_id = row
+        if request.user.role not in ('ADMIN', 'TENANT_ADMIN') and str(request.user.pk) != str(instructor_id):
+            raise Http404
+        schema_name = connection.schema_name
+        if request.accepted_renderer.format == EventStreamRenderer.format:
+            if isinstance(request._request, ASGIRequest):
+                response = StreamingHttpResponse(
+                    stream_progress(schema_name, pk, processing_status),
+                    content_type=EventStreamRenderer.media_type,
+                )
+                response['Cache-Control'] = 'no-cache'
+                response['X-Accel-Buffering'] = 'no'  # nginx: pass events through unbuffered
+                return response
+            # A stream would hold a WSGI worker thread while it is open.
+            request.accepted_renderer, request.accepted_media_type = JSONRenderer(), JSONRenderer.media_type
+        return Response(lesson_progress(schema_name, pk, processing_status), headers={'Cache-Control': 'no-store'})
+
+class VideoUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                         viewsets.GenericViewSet):
+    """
+    Resumable VideoLesson source uploads (see apps.lms.uploads): POST
+    creates one, HEAD/GET report Upload-Offset, PATCH appends a chunk
+    (application/offset+octet-stream) and DELETE aborts.
+    """
+    serializer_class = VideoUploadSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        # Expired uploads are gone for the client even before they are discarded.
+        return VideoUpload.objects.filter(created_by_id=self.request.user.pk).exclude(
+            completed_at__isnull=True, expires_at__lte=timezone.now(),
+        )
+
+    def tus_headers(self, upload):
+        headers = {
+            'Tus-Resumable': TUS_VERSION,
+            'Upload-Offset': str(upload.offset),
+            'Upload-Length': str(upload.length),
+            'Cache-Control': 'no-store',
+        }
+        if upload.completed_at is None:
+            headers['Upload-Expires'] = http_date(upload.expires_at.timestamp())
+        return headers
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.save(created_by=request.user)
+        headers = {'Location': request.build_absolute_uri(f'{upload.pk}/'), **self.tus_headers(upload)}
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def retrieve(self, request, *args, **kwargs):
+        upload = self.get_object()
+        return Response(self.get_serializer(upload).data, headers=self.tus_headers(upload))
+
+    def partial_update(self, request, *args, **kwargs):
+        upload = self.get_object()
+        if request.content_type != 'application/offset+octet-stream':
+            raise UnsupportedMediaType(request.content_type)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            size = int(request.headers.get('Content-Length') or 0)
+        except (KeyError, ValueError):
+            raise ValidationError({'Upload-Offset': 'Geçerli bir Upload-Offset başlığı gerekli.'})
+        checksum = parse_checksum(request.headers.get('Upload-Checksum'))
+        # The body is read from the raw stream; request.data is never parsed.
+        append_chunk(upload, request.stream, offset, size, checksum)
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=self.tus_headers(upload))
+
+    def perform_destroy(self, instance):
+        discard_upload(instance)
+
+
+class DirectUploadViewSet(viewsets.GenericViewSet):
+    """
+    POST returns a presigned POST/PUT for uploading one file straight to
+    object storage, and the ``upload`` token to attach it with (see
+    apps.lms.direct_uploads).
+    """
+    serializer_class = DirectUploadSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'upload'
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = presign(user=request.user, **serializer.validated_data)
+        return Response(upload, status=status.HTTP_201_CREATED, headers={'Cache-Control': 'no-store'})
@@ -0,0 +1,128 @@
+"""
+Benchmark: deep-page latency of the keyset-paginated audit log API.
+
+Seeds a few million AuditLog rows spread over the last year, then requests
+pages at deep positions through AuditLogViewSet and asserts the p95 latency.
+
+    python bench_audit_log_api.py --rows 3000000 --p95-ms 50
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.models import AuditLog
+from apps.core.pagination import KeysetPagination
+from apps.core.partitions import add_months, create_partition, month_start
+from apps.core.views import AuditLogViewSet
+
+User = get_user_model()
+
+BENCH_ACTION = 'BENCH_EVENT'
+SEED_BATCH = 500_000
+
+
+def seed(rows):
+    now = timezone.now()
+    first_month = add_months(month_start(now), -12)
+    for offset in range(13):
+        create_partition(add_months(first_month, offset))
+
+    print(f"Seeding {rows} rows...")
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        for start in range(0, rows, SEED_BATCH):
+            cursor.execute(
+                """
+                INSERT INTO core_auditlog (action, details, ip_address, "timestamp", user_id)
+                SELECT %s,
+                       jsonb_build_object('target', 'bench-target-' || (g %% 1000), 'n', g),
+                       ('10.0.' || (g %% 250) || '.' || (g %% 200))::inet,
+                       now() - (random() * interval '365 days'),
+                       NULL
+                FROM generate_series(%s, %s) AS g
+                """,
+                [BENCH_ACTION, start, min(start + SEED_BATCH, rows) - 1],
+            )
+        cursor.execute('ANALYZE core_auditlog')
+    print(f"  Seeded in {time.perf_counter() - started:.1f}s")
+
+
+def deep_cursors(count, rows):
+    """Cursors pointing at random rows in the older half of the table (setup, not timed)."""
+    paginator = KeysetPagination()
+    cursors = []
+    queryset = AuditLog.objects.filter(action=BENCH_ACTION).order_by('-timestamp', '-id')
+    for _ in range(count):
+        row = queryset[random.randint(rows // 2, rows - 1)]
+        cursors.append(paginator.encode_cursor(row))
+    return cursors
+
+
+def timed_requests(cursors, extra_params=None):
+    factory = APIRequestFactory()
+    view = AuditLogViewSet.as_view({'get': 'list'})
+    admin = User(username='bench_admin', role='ADMIN')
+    timings = []
+    for cursor in cursors:
+        params = {'cursor': cursor, 'page_size': 50, **(extra_params or {})}
+        request = factory.get('/api/v1/audit-logs/', params)
+        force_authenticate(request, user=admin)
+        started = time.perf_counter()
+        response = view(request)
+        response.render()
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.data
+    return timings
+
+
+def p95(timings):
+    return statistics.quantiles(timings, n=20)[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=3_000_000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--p95-ms', type=float, default=50.0)
+    parser.add_argument('--keep', action='store_true', help='Keep the seeded rows for another run.')
+    args = parser.parse_args()
+
+    existing = AuditLog.objects.filter(action=BENCH_ACTION).count()
+    if existing < args.rows:
+        seed(args.rows - existing)
+
+    cursors = deep_cursors(args.requests, args.rows)
+    results = {
+        'deep pages': timed_requests(cursors),
+        'deep pages + target filter': timed_requests(cursors, {'target': 'bench-target-7'}),
+        'deep pages + action filter': timed_requests(cursors, {'action': BENCH_ACTION}),
+    }
+
+    failed = False
+    for name, timings in results.items():
+        value = p95(timings)
+        status = 'PASS' if value <= args.p95_ms else 'FAIL'
+        failed = failed or status == 'FAIL'
+        print(f"  [{status}] {name}: p50={statistics.median(timings):.1f}ms p95={value:.1f}ms (limit {args.p95_ms}ms)")
+
+    if not args.keep:
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM core_auditlog WHERE action = %s', [BENCH_ACTION])
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark: "all courses under this category" on a large category tree.
+
+Compares three ways to find the courses of a subtree:
+
+- ``walk``: the adjacency list, one children query per level, then
+  ``category_id IN (...)``
+- ``cte``: a recursive CTE over parent_id
+- ``path``: one indexed prefix match on Category.path
+
+and reading the subtree count from the precomputed Category.course_count.
+
+    python bench_category_subtree.py --categories 10000 --courses 20000
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from collections import Counter
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from apps.lms.models import Category, Course
+from apps.lms.services import ancestor_ids
+
+PREFIX = 'bench-tree-'
+FANOUT = 10
+
+SUBTREE_CTE = """
+WITH RECURSIVE subtree (id) AS (
+    SELECT %s::bigint
+    UNION ALL
+    SELECT c.id FROM lms_category c JOIN subtree ON c.parent_id = subtree.id
+)
+SELECT course.id FROM lms_course course JOIN subtree ON course.category_id = subtree.id
+WHERE course.is_published
+"""
+
+
+def cleanup():
+    Course.objects.filter(slug__startswith=PREFIX).delete()
+    Category.objects.filter(slug__startswith=PREFIX).delete()
+    get_user_model().objects.filter(username=f'{PREFIX}instructor').delete()
+
+
+def seed(categories, courses):
+    """A tree with FANOUT children per node, filled level by level."""
+    created = []
+    level = [None]
+    while len(created) < categories:
+        batch = [
+            Category(name=f'Bench {len(created) + i}', slug=f'{PREFIX}{len(created) + i}', parent=parent)
+            for i, parent in enumerate(p for p in level for _ in range(FANOUT))
+        ][:categories - len(created)]
+        level = Category.objects.bulk_create(batch)
+        created += level
+    # bulk_create skips save(): fill in the paths top-down.
+    for category in created:
+        category.path = f'{category.parent.path if category.parent else "/"}{category.pk}/'
+    Category.objects.bulk_update(created, ['path'], batch_size=2000)
+
+    instructor = get_user_model().objects.create(username=f'{PREFIX}instructor', role='INSTRUCTOR')
+    rng = random.Random(18)
+    placed = [rng.choice(created) for _ in range(courses)]
+    Course.objects.bulk_create([
+        Course(title=f'Bench {i}', slug=f'{PREFIX}{i}', category=category, instructor=instructor,
+               description='-', is_published=True)
+        for i, category in enumerate(placed)
+    ], batch_size=2000)
+    totals = Counter(pk for category in placed for pk in ancestor_ids(category.path))
+    for category in created:
+        category.course_count = totals[category.pk]
+    Category.objects.bulk_update(created, ['course_count'], batch_size=2000)
+    return created
+
+
+def walk(category):
+    ids = level = [category.pk]
+    while level:
+        level = list(Category.objects.filter(parent_id__in=level).values_list('id', flat=True))
+        ids = ids + level
+    return list(Course.objects.filter(category_id__in=ids, is_published=True).values_list('id', flat=True))
+
+
+def cte(category):
+    with connection.cursor() as cursor:
+        cursor.execute(SUBTREE_CTE, [category.pk])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def path(category):
+    return list(
+        Course.objects.filter(category__path__startswith=category.path, is_published=True).values_list('id', flat=True)
+    )
+
+
+def counted(category):
+    return Category.objects.values_list('course_count', flat=True).get(pk=category.pk)
+
+
+def timed(function, category, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(category)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--categories', type=int, default=10000)
+    parser.add_argument('--courses', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--keep', action='store_true', help='Keep the seeded tree')
+    args = parser.parse_args()
+
+    cleanup()
+    try:
+        created = seed(args.categories, args.courses)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE lms_category; ANALYZE lms_course')
+        # A root (one of the largest subtrees) and the first third-level node.
+        samples = {'root': created[0], 'level 3': created[FANOUT + FANOUT * FANOUT]}
+        print(f"{args.categories} categories, {args.courses} courses; median of {args.repeat} runs")
+        for label, category in samples.items():
+            results = {name: timed(function, category, args.repeat)
+                       for name, function in (('walk', walk), ('cte', cte), ('path', path))}
+            count_ms, count = timed(counted, category, args.repeat)
+            sizes = {name: len(result) for name, (_, result) in results.items()}
+            assert len(set(sizes.values())) == 1 and count == sizes['path'], (sizes, count)
+            print(f"  {label} ({count} courses)")
+            for name, (ms, _) in results.items():
+                print(f"    {name:<8} {ms:8.2f} ms")
+            print(f"    {'count':<8} {count_ms:8.2f} ms  (precomputed course_count)")
+    finally:
+        if not args.keep:
+            cleanup()
+
+
+if __name__ == '__main__':
+    main()
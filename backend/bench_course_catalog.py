@@ -0,0 +1,92 @@
+"""
+Benchmark: payload size and server time of the course catalog.
+
+``full`` is what the catalog used to send: every course with its whole
+syllabus in one response (now ``?expand=modules``). ``compact`` is the
+default list entry, for the whole catalog and for the default first page.
+
+    python bench_course_catalog.py --courses 100 --modules 5
+"""
+import argparse
+import os
+import statistics
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client
+
+from apps.lms.models import Course, HTMLLesson, Module, QuizLesson, VideoLesson
+from apps.lms.pagination import CoursePagination
+
+PREFIX = 'bench-catalog-'
+
+
+def cleanup():
+    Course.objects.filter(slug__startswith=PREFIX).delete()
+    get_user_model().objects.filter(username=f'{PREFIX}instructor').delete()
+
+
+def seed(courses, modules):
+    instructor = get_user_model().objects.create(username=f'{PREFIX}instructor', role='INSTRUCTOR')
+    for i in range(courses):
+        course = Course.objects.create(
+            title=f'Bench course {i}', slug=f'{PREFIX}{i}', instructor=instructor,
+            description='Kurs açıklaması ' * 20, is_published=True,
+        )
+        for m in range(modules):
+            module = Module.objects.create(course=course, title=f'Hafta {m}', order=m, description='Modül özeti ' * 10)
+            VideoLesson.objects.create(module=module, title='Video', order=1, video_url='https://cdn.example.com/v.m3u8')
+            QuizLesson.objects.create(module=module, title='Quiz', order=2)
+            HTMLLesson.objects.create(module=module, title='Okuma', order=3, content='<p>Ders metni</p>' * 20)
+
+
+def measure(client, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get('/api/v1/courses/', params)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+    return len(response.content), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--courses', type=int, default=100)
+    parser.add_argument('--modules', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--hostname', default='localhost')
+    args = parser.parse_args()
+
+    # Measure serialization, not the rate limiter.
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_CLASSES': []}
+    cleanup()
+    try:
+        seed(args.courses, args.modules)
+        whole = Course.objects.filter(is_published=True).count()
+        assert whole <= CoursePagination.max_page_size, 'the catalog must fit in one page'
+        client = Client(HTTP_HOST=args.hostname)
+        client.get('/api/v1/courses/')  # warm tenant resolution and caches
+        variants = {
+            'full (before)': {'expand': 'modules', 'page_size': whole},
+            'compact, all': {'page_size': whole},
+            'compact, page 1': {},
+        }
+        print(f"Course list, {whole} courses x {args.modules} modules x 3 lessons; median of {args.repeat}")
+        baseline = None
+        for label, params in variants.items():
+            size, ms = measure(client, params, args.repeat)
+            baseline = baseline or (size, ms)
+            print(f"  {label:<16} {size / 1024:9.1f} KiB ({size / baseline[0]:6.1%}) {ms:8.1f} ms ({ms / baseline[1]:6.1%})")
+    finally:
+        cleanup()
+
+
+if __name__ == '__main__':
+    main()
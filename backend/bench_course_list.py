@@ -0,0 +1,112 @@
+"""
+Benchmark: requests/second on the course list with and without connection reuse.
+
+``baseline`` is the previous setup (django_tenants.postgresql_backend,
+CONN_MAX_AGE=0: a new connection and a SET search_path per request);
+``reuse`` is the configured backend with persistent connections. Each mode
+runs in its own process through the full middleware stack.
+
+    python bench_course_list.py --requests 2000
+    python bench_course_list.py --pool-mode transaction   # behind PgBouncer
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import django
+
+MODES = ('baseline', 'reuse')
+
+
+def configure(mode, pool_mode):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    os.environ['DB_POOL_MODE'] = pool_mode
+    from django.conf import settings
+
+    database = settings.DATABASES['default']
+    if mode == 'baseline':
+        database['ENGINE'] = 'django_tenants.postgresql_backend'
+        database['CONN_MAX_AGE'] = 0
+    elif not database['CONN_MAX_AGE']:
+        database['CONN_MAX_AGE'] = 60
+    # Measure the database path, not the rate limiter.
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_CLASSES': []}
+    django.setup()
+
+
+def seed(courses):
+    from django.contrib.auth import get_user_model
+    from apps.lms.models import Category, Course
+
+    instructor, _ = get_user_model().objects.get_or_create(username='bench_instructor', defaults={'role': 'INSTRUCTOR'})
+    category, _ = Category.objects.get_or_create(slug='bench-category', defaults={'name': 'Bench'})
+    existing = Course.objects.filter(slug__startswith='bench-course-').count()
+    Course.objects.bulk_create([
+        Course(title=f'Bench course {i}', slug=f'bench-course-{i}', category=category, instructor=instructor,
+               description='Benchmark course', is_published=True)
+        for i in range(existing, courses)
+    ])
+
+
+def cleanup():
+    from django.contrib.auth import get_user_model
+    from apps.lms.models import Category, Course
+
+    Course.objects.filter(slug__startswith='bench-course-').delete()
+    Category.objects.filter(slug='bench-category').delete()
+    get_user_model().objects.filter(username='bench_instructor').delete()
+
+
+def run(requests, hostname):
+    from django.test import Client
+
+    client = Client(HTTP_HOST=hostname)
+    for _ in range(20):
+        client.get('/api/v1/courses/')
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/api/v1/courses/')
+        assert response.status_code == 200, response.status_code
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=MODES + ('all',), default='all')
+    parser.add_argument('--pool-mode', choices=('session', 'transaction'), default='session')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--courses', type=int, default=20)
+    parser.add_argument('--hostname', default='localhost')
+    parser.add_argument('--keep', action='store_true', help='Keep the seeded courses')
+    args = parser.parse_args()
+
+    if args.mode == 'all':
+        results = {}
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, '--mode', mode, '--pool-mode', args.pool_mode,
+                 '--requests', str(args.requests), '--courses', str(args.courses),
+                 '--hostname', args.hostname, '--keep'],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = float(output.split()[-1])
+        print(f"Course list, {args.requests} sequential requests ({args.pool_mode} pooling)")
+        for mode in MODES:
+            print(f"  {mode:<10} {results[mode]:8.1f} req/s")
+        print(f"  speed-up   {results['reuse'] / results['baseline']:8.2f}x")
+        if not args.keep:
+            configure('reuse', args.pool_mode)
+            cleanup()
+        return
+
+    configure(args.mode, args.pool_mode)
+    seed(args.courses)
+    print(f'{run(args.requests, args.hostname):.1f}')
+    if not args.keep:
+        cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: time to provision a tenant by replaying migrations vs. cloning
+the template schema.
+
+    python bench_tenant_provisioning.py --tenants 10
+"""
+import argparse
+import os
+import statistics
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.test.utils import override_settings
+
+from apps.core.models import Client
+from apps.core.provisioning import expected_migrations, provision_tenant, refresh_template
+
+PREFIX = 'bench_provision_'
+
+
+def cleanup():
+    for tenant in Client.objects.filter(schema_name__startswith=PREFIX):
+        tenant.delete(force_drop=True)
+
+
+def run(method, tenants):
+    timings = []
+    for i in range(tenants):
+        schema_name = f'{PREFIX}{method}_{i}'
+        started = time.perf_counter()
+        tenant = provision_tenant(schema_name, schema_name, f'{schema_name}.bench.localhost')
+        timings.append((time.perf_counter() - started) * 1000)
+        assert tenant.provisioned_by == method, tenant.provisioned_by
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=10)
+    args = parser.parse_args()
+
+    cleanup()
+    started = time.perf_counter()
+    refresh_template()
+    print(f'Template refresh: {(time.perf_counter() - started) * 1000:.0f} ms')
+    expected_migrations()  # loaded once per process; keep it out of the timings
+
+    try:
+        results = {}
+        with override_settings(TENANT_TEMPLATE_SCHEMA=''):
+            results['migrate'] = run('migrate', args.tenants)
+        results['clone'] = run('clone', args.tenants)
+    finally:
+        cleanup()
+
+    print(f'Provisioning {args.tenants} tenants each way (ms per tenant)')
+    for method, timings in results.items():
+        print(f'  {method:<8} median {statistics.median(timings):8.1f}  max {max(timings):8.1f}')
+    speedup = statistics.median(results['migrate']) / statistics.median(results['clone'])
+    print(f'  speed-up {speedup:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Microbenchmark: per-request cost of hostname -> tenant resolution.
+
+Compares django-tenants' TenantMainMiddleware (one Domain/Client query per
+request) with CachedTenantMainMiddleware on a local LRU hit and on a shared
+cache (Redis) hit.
+
+    python bench_tenant_resolution.py --requests 20000
+    python bench_tenant_resolution.py --locmem   # no Redis available
+"""
+import argparse
+import os
+import statistics
+import time
+from contextlib import nullcontext
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.test import RequestFactory
+from django_tenants.middleware.main import TenantMainMiddleware
+
+from apps.core import tenant_resolution
+from apps.core.cache import local_caches
+from apps.core.middleware import CachedTenantMainMiddleware
+from apps.core.models import Domain
+
+
+def run(middleware, hostname, requests, before_each=None):
+    factory = RequestFactory()
+    timings = []
+    for _ in range(requests):
+        request = factory.get('/', HTTP_HOST=hostname)
+        if before_each:
+            before_each()
+        started = time.perf_counter()
+        middleware.process_request(request)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    timings.sort()
+    return statistics.mean(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--hostname', default=None, help='Defaults to the first Domain row')
+    parser.add_argument('--locmem', action='store_true', help='Use a local-memory shared cache instead of Redis')
+    args = parser.parse_args()
+
+    hostname = args.hostname or Domain.objects.values_list('domain', flat=True).first()
+    if hostname is None:
+        raise SystemExit('No Domain rows; create a tenant first.')
+
+    with local_caches() if args.locmem else nullcontext():
+        get_response = lambda request: None
+        cases = [
+            ('uncached (query per request)', TenantMainMiddleware(get_response), None),
+            ('shared cache hit', CachedTenantMainMiddleware(get_response), tenant_resolution._local.clear),
+            ('local LRU hit', CachedTenantMainMiddleware(get_response), None),
+        ]
+        print(f"Resolving {hostname!r}, {args.requests} requests per case")
+        for label, middleware, before_each in cases:
+            run(middleware, hostname, 100, before_each)  # warm up
+            mean, p95 = run(middleware, hostname, args.requests, before_each)
+            print(f"  {label:<30} mean {mean:8.1f} us   p95 {p95:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
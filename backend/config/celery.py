@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import celeryd_init
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -18,3 +19,21 @@ app.autodiscover_tasks()
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
+
+@celeryd_init.connect
+def size_queue_worker(conf=None, options=None, **kwargs):
+    """
+    A worker started for media queues only (``-Q transcode``) runs
+    CELERY_QUEUE_CONCURRENCY processes for them, one task each at a time.
+    """
+    from django.conf import settings
+
+    queues = options.get('queues') or []
+    if isinstance(queues, str):
+        queues = queues.split(',')
+    limits = settings.CELERY_QUEUE_CONCURRENCY
+    if not queues or not all(queue in limits for queue in queues):
+        return
+    conf.worker_concurrency = sum(limits[queue] for queue in queues)
+    # Long tasks with acks_late: prefetched messages would wait unacknowledged.
+    conf.worker_prefetch_multiplier = 1
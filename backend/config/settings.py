@@ -64,8 +64,18 @@ INSTALLED_APPS = list(SHARED_APPS) + [app for app in TENANT_APPS if app not in S
 TENANT_MODEL = "core.Client" # app.Model
 TENANT_DOMAIN_MODEL = "core.Domain" # app.Model
 
+# New tenant schemas are copied from this pre-migrated schema, with the
+# fixtures already loaded (see apps.core.provisioning). Empty: always migrate.
+TENANT_TEMPLATE_SCHEMA = os.environ.get('TENANT_TEMPLATE_SCHEMA', 'tenant_template')
+TENANT_TEMPLATE_FIXTURES = []
+
+# migrate_schemas migrates tenant schemas in parallel processes (see
+# apps.core.migration_executor); EXECUTOR=standard runs them one by one.
+GET_EXECUTOR_FUNCTION = 'apps.core.migration_executor.get_executor'
+TENANT_MULTIPROCESSING_MAX_PROCESSES = int(os.environ.get('TENANT_MIGRATION_PROCESSES', '4'))
+
 MIDDLEWARE = [
-    'django_tenants.middleware.main.TenantMainMiddleware', # Dependency
+    'apps.core.middleware.CachedTenantMainMiddleware', # django-tenants, cached
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # CORS
@@ -101,14 +111,24 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# 'session': Postgres directly (or session pooling); 'transaction': behind a
+# transaction-pooling proxy such as PgBouncer. See apps.core.postgresql_backend.
+DB_POOL_MODE = os.environ.get('DB_POOL_MODE', 'session')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django_tenants.postgresql_backend',
+        # django-tenants backend that only re-sends search_path on tenant change
+        'ENGINE': 'apps.core.postgresql_backend',
         'NAME': os.environ.get('POSTGRES_DB', 'akademi_db'),
         'USER': os.environ.get('POSTGRES_USER', 'akademi_user'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'akademi_password'),
         'HOST': os.environ.get('POSTGRES_HOST', 'db'),
         'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        # Keep connections across requests; a dead one is replaced before use.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        # Server-side cursors do not survive transaction pooling.
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOL_MODE == 'transaction',
     }
 }
 
@@ -168,18 +188,25 @@ AUTH_USER_MODEL = 'core.User'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.core.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'apps.core.throttling.SlidingWindowThrottle',
     ],
+    # '<kind>' for views without a throttle_scope, '<scope>.<kind>' otherwise
+    # (falling back to '<kind>'); kind is anon (per IP), user or tenant.
     'DEFAULT_THROTTLE_RATES': {
         'anon': '1000/hour',
-        'user': '10000/hour'
+        'user': '10000/hour',
+        'tenant': '200000/hour',
+        'catalog.anon': '3000/hour',
+        'catalog.user': '30000/hour',
+        'catalog.tenant': '1000000/hour',
+        'upload.user': '100/hour',
+        'upload.tenant': '2000/hour',
     }
 }
 
@@ -187,15 +214,24 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    # Adds the role/tenant_id claims read by ClaimsJWTAuthentication.
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.core.serializers.ClaimsTokenObtainPairSerializer',
 }
 
+# Authenticated users are cached per version (replaced on every User save);
+# the local TTL only bounds how long a worker keeps its own copy. Tenant data
+# embedded in a cached user can lag a Client change by AUTH_USER_CACHE_TTL.
+AUTH_USER_CACHE_TTL = 300
+AUTH_USER_CACHE_LOCAL_TTL = 10
+AUTH_USER_CACHE_LOCAL_SIZE = 10000
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3005",
     "http://127.0.0.1:3005",
 ]
 CORS_ALLOW_CREDENTIALS = True
-CORS_ALLOW_METHODS = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS']
+CORS_ALLOW_METHODS = ['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS']
 CORS_ALLOW_HEADERS = [
     'accept',
     'accept-encoding',
@@ -206,18 +242,138 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    # Resumable video uploads (tus)
+    'tus-resumable',
+    'upload-checksum',
+    'upload-offset',
 ]
+CORS_EXPOSE_HEADERS = ['location', 'tus-resumable', 'upload-expires', 'upload-length', 'upload-offset']
 
 # File Upload Configuration
 DATA_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB
-FILE_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB
+# Larger multipart files spill to a temporary file instead of worker memory.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
 FILE_UPLOAD_PERMISSIONS = 0o644
 FILE_UPLOAD_DIRECTORY_PERMISSIONS = 0o755
 
+# Resumable video uploads (apps.lms.uploads). Partial files must live on the
+# same filesystem as MEDIA_ROOT: a finished upload is renamed, not copied.
+VIDEO_UPLOAD_TEMP_DIR = Path(os.environ.get('VIDEO_UPLOAD_TEMP_DIR', MEDIA_ROOT / 'uploads' / 'partial'))
+VIDEO_UPLOAD_MAX_SIZE = int(os.environ.get('VIDEO_UPLOAD_MAX_SIZE', 5 * 1024 ** 3))  # 5GB
+# Unfinished uploads are discarded this long after their last chunk.
+VIDEO_UPLOAD_EXPIRY = timedelta(hours=int(os.environ.get('VIDEO_UPLOAD_EXPIRY_HOURS', '24')))
+
+# HLS ladder encoding (apps.lms.transcoding): cores one transcode may use,
+# shared between the renditions encoded in parallel.
+VIDEO_TRANSCODE_CPU_BUDGET = int(os.environ.get('VIDEO_TRANSCODE_CPU_BUDGET', os.cpu_count() or 1))
+VIDEO_TRANSCODE_PRESET = os.environ.get('VIDEO_TRANSCODE_PRESET', 'veryfast')  # x264 speed/size trade-off
+VIDEO_HLS_SEGMENT_SECONDS = 6
+# Soft time limit of one transcode in seconds; ffmpeg is stopped and the lesson FAILED.
+VIDEO_TRANSCODE_TIME_LIMIT = int(os.environ.get('VIDEO_TRANSCODE_TIME_LIMIT', 2 * 3600))
+# Transcode progress in Redis (apps.lms.progress): seconds between updates,
+# how long the last state is kept and how long one SSE stream may stay open.
+# Streams are served under ASGI (config.asgi) only; under WSGI clients poll.
+TRANSCODE_PROGRESS_INTERVAL = 2
+TRANSCODE_PROGRESS_TTL = 3600
+TRANSCODE_PROGRESS_STREAM_TIMEOUT = 300
+
 
 # Celery
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://redis:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_BROKER_URL', 'redis://redis:6379/0')
+# No task result is read anywhere; tasks that need one must opt in.
+CELERY_TASK_IGNORE_RESULT = True
+# Media work has queues of its own, so a long encode never holds up the
+# default queue (outlines, audit partitions, tenant template). Each queue is
+# served by its own worker (see docker-compose.yml): `-Q <queue>` sizes it
+# from CELERY_QUEUE_CONCURRENCY unless `-c` is given (config.celery).
+CELERY_TASK_ROUTES = {
+    'apps.lms.tasks.transcode_video_task': {'queue': 'transcode'},
+    'apps.core.tasks.import_users_task': {'queue': 'documents'},
+    '*thumbnail*': {'queue': 'thumbnail'},
+}
+MEDIA_WORKER_CPUS = int(os.environ.get('MEDIA_WORKER_CPUS', os.cpu_count() or 1))
+CELERY_QUEUE_CONCURRENCY = {
+    # Each transcode already spreads over VIDEO_TRANSCODE_CPU_BUDGET cores.
+    'transcode': max(1, MEDIA_WORKER_CPUS // VIDEO_TRANSCODE_CPU_BUDGET),
+    'thumbnail': MEDIA_WORKER_CPUS,
+    'documents': max(1, MEDIA_WORKER_CPUS // 2),
+}
+# acks_late tasks are redelivered once unacknowledged for this long, so it
+# must outlast the longest one (a transcode at its hard time limit).
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': VIDEO_TRANSCODE_TIME_LIMIT + 3600}
+CELERY_BEAT_SCHEDULE = {
+    'maintain-audit-log-partitions': {
+        'task': 'apps.core.tasks.maintain_audit_log_partitions',
+        'schedule': timedelta(days=1),
+    },
+    'refresh-tenant-template': {
+        'task': 'apps.core.tasks.refresh_tenant_template_task',
+        'schedule': timedelta(hours=1),
+    },
+    'discard-expired-video-uploads': {
+        'task': 'apps.lms.tasks.discard_expired_uploads_task',
+        'schedule': timedelta(hours=1),
+    },
+}
+
+# Cache and rate limit counters (Redis). Database 0 is the Celery broker.
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://redis:6379/1')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+    },
+    # Keys prefixed with connection.schema_name; see apps.core.cache.
+    'tenant': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+        'KEY_FUNCTION': 'django_tenants.cache.make_key',
+    },
+}
+
+# Rate limiting falls back to per-process token buckets while Redis is
+# unreachable, and retries Redis after this many seconds.
+THROTTLE_REDIS_RETRY_INTERVAL = 5
+
+# Hostname -> tenant resolution: per-process LRU in front of the shared cache.
+# Other processes see a Domain/Client change after at most TENANT_CACHE_LOCAL_TTL.
+TENANT_CACHE_TTL = 3600
+TENANT_CACHE_LOCAL_TTL = 30
+TENANT_CACHE_LOCAL_SIZE = 1024
+
+# Category tree (apps.lms.services): rebuilt when a Category is saved or
+# deleted; the TTL only bounds changes made behind the signals' back.
+CATEGORY_TREE_CACHE_TTL = 86400
+
+# Course outline documents (apps.lms.services): rebuilt by a Celery task when
+# the course, a module or a lesson changes.
+COURSE_OUTLINE_CACHE_TTL = 7 * 86400
+
+# Admin changelists: planner estimates replace COUNT(*) above this many rows,
+# and filter sidebar queries are cancelled after the timeout.
+ADMIN_COUNT_ESTIMATE_THRESHOLD = 10000
+ADMIN_FILTER_QUERY_TIMEOUT_MS = 2000
+
+# Audit log
+# 'buffered' queues events in-process and writes them with bulk_create;
+# 'sync' writes every event immediately (tests, one-off scripts).
+AUDIT_LOG_MODE = os.environ.get('AUDIT_LOG_MODE', 'buffered')
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', '200'))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', '2.0'))
+# core_auditlog is partitioned by month; expired months are archived to
+# gzip JSONL files and dropped by apps.core.tasks.maintain_audit_log_partitions.
+AUDIT_LOG_PARTITIONS_AHEAD = 3
+AUDIT_LOG_RETENTION_MONTHS = int(os.environ.get('AUDIT_LOG_RETENTION_MONTHS', '12'))
+AUDIT_LOG_ARCHIVE_DIR = Path(os.environ.get('AUDIT_LOG_ARCHIVE_DIR', BASE_DIR / 'audit_archive'))
+
+# Bulk user import: rows per committed chunk, password hashing processes and
+# how many rejected rows are kept on the UserImport for the report.
+USER_IMPORT_CHUNK_SIZE = int(os.environ.get('USER_IMPORT_CHUNK_SIZE', '1000'))
+USER_IMPORT_HASH_WORKERS = int(os.environ.get('USER_IMPORT_HASH_WORKERS', os.cpu_count() or 1))
+USER_IMPORT_MAX_ERRORS = 1000
+# Uploaded import files (not served); deleted once an import completes.
+USER_IMPORT_ROOT = Path(os.environ.get('USER_IMPORT_ROOT', BASE_DIR / 'private'))
 
 # MinIO / S3
 AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID', 'minioadmin')
@@ -227,6 +383,22 @@ AWS_S3_ENDPOINT_URL = os.environ.get('AWS_S3_ENDPOINT_URL', 'http://minio:9000')
 AWS_S3_OBJECT_PARAMETERS = {
     'CacheControl': 'max-age=86400',
 }
+AWS_S3_REGION_NAME = os.environ.get('AWS_S3_REGION_NAME', 'us-east-1')
+# Presigned upload URLs are used by browsers, which may reach MinIO under
+# another name than the backend does.
+AWS_S3_PUBLIC_ENDPOINT_URL = os.environ.get('AWS_S3_PUBLIC_ENDPOINT_URL', AWS_S3_ENDPOINT_URL)
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    # MinIO / S3 through django-storages (configured by the AWS_* settings).
+    'objects': {'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage'},
+}
+# Storage of DocumentLesson files. With 'objects', documents are uploaded
+# straight to the bucket via presigned URLs (apps.lms.direct_uploads).
+DOCUMENT_STORAGE = os.environ.get('DOCUMENT_STORAGE', 'default')
+DIRECT_UPLOAD_URL_EXPIRY = 900  # seconds a presigned URL can be used
+DIRECT_UPLOAD_TOKEN_MAX_AGE = 86400  # seconds to attach the uploaded object
 
 # Elasticsearch
 ELASTICSEARCH_DSL = {
@@ -0,0 +1,112 @@
+import io
+import os
+import django
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.core.models import ActivationCode, Client
+from apps.core.serializers import RegisterSerializer
+from apps.core.services import bulk_create_activation_codes, redeem_activation_code
+
+User = get_user_model()
+CODE = 'REDEEM-RACE-TEST'
+FULL_PREFIX = 'FULL-SPACE-TEST-'
+USES = 5
+ATTEMPTS = 40
+
+tenant = Client.objects.get(schema_name='public')
+ActivationCode.objects.filter(code__in=[CODE, CODE + '-OLD']).delete()
+ActivationCode.objects.create(code=CODE, tenant=tenant, uses_left=USES, expires_at=timezone.now() + timedelta(days=1))
+ActivationCode.objects.create(code=CODE + '-OLD', tenant=tenant, uses_left=5, expires_at=timezone.now() - timedelta(days=1))
+
+
+def redeem(_):
+    try:
+        return redeem_activation_code(CODE)
+    finally:
+        connection.close()
+
+
+# 1. Concurrent redemptions never exceed uses_left
+print(f"Redeeming a {USES}-use code from {ATTEMPTS} threads...")
+with ThreadPoolExecutor(max_workers=20) as pool:
+    results = list(pool.map(redeem, range(ATTEMPTS)))
+successes = [r for r in results if r is not None]
+remaining = ActivationCode.objects.get(code=CODE).uses_left
+if len(successes) == USES and remaining == 0 and set(successes) == {tenant.pk}:
+    print(f"  [PASS] {USES} redemptions succeeded, uses_left is 0.")
+else:
+    print(f"  [FAIL] {len(successes)} redemptions succeeded, uses_left is {remaining}.")
+
+if redeem_activation_code(CODE + '-OLD') is None:
+    print("  [PASS] Expired code rejected.")
+else:
+    print("  [FAIL] Expired code redeemed.")
+
+# 2. Registration redeems with one UPDATE and no SELECT on the code
+ActivationCode.objects.filter(code=CODE).update(uses_left=1)
+User.objects.filter(username='redeem_test_user').delete()
+serializer = RegisterSerializer(data={'username': 'redeem_test_user', 'password': 'testpassword', 'activation_code': CODE})
+serializer.is_valid(raise_exception=True)
+print("Registering with the code...")
+with CaptureQueriesContext(connection) as ctx:
+    user = serializer.save()
+code_queries = [q['sql'] for q in ctx.captured_queries if 'core_activationcode' in q['sql']]
+if user.tenant_id == tenant.pk and len(code_queries) == 1 and code_queries[0].lstrip().startswith('UPDATE'):
+    print("  [PASS] Code redeemed with a single UPDATE.")
+else:
+    print(f"  [FAIL] Unexpected code queries: {code_queries}")
+
+serializer = RegisterSerializer(data={'username': 'redeem_test_user2', 'password': 'testpassword', 'activation_code': CODE})
+serializer.is_valid(raise_exception=True)
+try:
+    serializer.save()
+    print("  [FAIL] Used-up code accepted.")
+except Exception as e:
+    print(f"  [PASS] Used-up code rejected: {e}")
+
+user.delete()
+ActivationCode.objects.filter(code__in=[CODE, CODE + '-OLD']).delete()
+
+# 3. Bulk generation stops when the code space runs out
+print("Generating more codes than the code space holds...")
+ActivationCode.objects.filter(code__startswith=FULL_PREFIX).delete()
+
+
+def generate(count):
+    try:
+        call_command('generate_activation_codes', 'public', count=count, length=1, prefix=FULL_PREFIX, stdout=io.StringIO())
+        return None
+    except CommandError as e:
+        return e
+
+
+too_many = generate(40)
+filled = generate(31)
+one_more = generate(1)
+created = ActivationCode.objects.filter(code__startswith=FULL_PREFIX).count()
+if too_many and filled is None and one_more and created == 31:
+    print(f"  [PASS] The full space of 31 codes is created; more is refused: {one_more}")
+else:
+    print(f"  [FAIL] too_many={too_many} filled={filled} one_more={one_more} created={created}")
+
+ActivationCode.objects.filter(code__startswith=FULL_PREFIX).delete()
+ActivationCode.objects.create(code=FULL_PREFIX + 'A', tenant=tenant, uses_left=1, expires_at=timezone.now())
+with mock.patch('apps.core.services.generate_code', return_value=FULL_PREFIX + 'A'):
+    try:
+        bulk_create_activation_codes(tenant, 1, 1, timezone.now(), length=1, prefix=FULL_PREFIX)
+        print("  [FAIL] Generation did not stop without progress.")
+    except ValueError as e:
+        print(f"  [PASS] Generation stops after rounds without a new code: {e}")
+ActivationCode.objects.filter(code__startswith=FULL_PREFIX).delete()
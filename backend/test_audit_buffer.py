@@ -0,0 +1,46 @@
+import os
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ['AUDIT_LOG_MODE'] = 'buffered'
+os.environ['AUDIT_LOG_FLUSH_INTERVAL'] = '3600'  # only size/explicit flushes during the test
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.core import audit
+from apps.core.models import AuditLog
+
+marker = 'audit_buffer_test'
+AuditLog.objects.filter(action=marker).delete()
+
+# 1. Events are queued, not written
+print("Recording 50 buffered events...")
+with CaptureQueriesContext(connection) as ctx:
+    for i in range(50):
+        audit.record(action=marker, details={'n': i}, ip_address='127.0.0.1')
+
+if len(ctx.captured_queries) == 0 and not AuditLog.objects.filter(action=marker).exists():
+    print("  [PASS] No INSERT issued while recording.")
+else:
+    print(f"  [FAIL] Expected no queries, got {len(ctx.captured_queries)}")
+
+# 2. Flush writes them in one batch
+with CaptureQueriesContext(connection) as ctx:
+    written = audit.flush()
+inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+
+if written == 50 and len(inserts) == 1:
+    print("  [PASS] Flushed 50 events with a single INSERT.")
+else:
+    print(f"  [FAIL] Flushed {written} events with {len(inserts)} INSERTs")
+
+# 3. Event time is kept, not flush time
+timestamps = list(AuditLog.objects.filter(action=marker).order_by('details__n').values_list('timestamp', flat=True))
+if timestamps == sorted(timestamps):
+    print("  [PASS] Timestamps reflect recording order.")
+else:
+    print("  [FAIL] Timestamps were overwritten at flush time.")
+
+# Clean up
+AuditLog.objects.filter(action=marker).delete()
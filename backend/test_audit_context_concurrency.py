@@ -0,0 +1,71 @@
+import os
+import asyncio
+import random
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory
+from apps.core.context import get_current_ip, get_current_user
+from apps.core.middleware import AuditMiddleware
+
+REQUESTS = 500
+
+
+class FakeUser:
+    is_authenticated = True
+
+    def __init__(self, pk):
+        self.pk = pk
+
+
+def read_context_in_thread():
+    # Sync code called from async views runs in a worker thread.
+    return get_current_user(), get_current_ip()
+
+
+async def view(request):
+    observed = []
+    for _ in range(3):
+        observed.append((get_current_user(), get_current_ip()))
+        await asyncio.sleep(random.random() / 100)
+        observed.append(await sync_to_async(read_context_in_thread)())
+    response = HttpResponse()
+    response.observed = observed
+    return response
+
+
+async def main():
+    middleware = AuditMiddleware(view)
+    factory = AsyncRequestFactory()
+
+    async def one_request(i):
+        request = factory.get('/', REMOTE_ADDR=f'10.0.{i // 250}.{i % 250}')
+        request.user = FakeUser(i)
+        response = await middleware(request)
+        return request, response
+
+    print(f"Running {REQUESTS} interleaved async requests...")
+    results = await asyncio.gather(*(one_request(i) for i in range(REQUESTS)))
+
+    crossed = 0
+    for request, response in results:
+        for user, ip in response.observed:
+            if user is not request.user or ip != request.META['REMOTE_ADDR']:
+                crossed += 1
+
+    if crossed == 0:
+        print(f"  [PASS] Audit attribution never crossed between {REQUESTS} requests.")
+    else:
+        print(f"  [FAIL] {crossed} observations saw another request's user or IP.")
+
+    if get_current_user() is None and get_current_ip() is None:
+        print("  [PASS] Context cleared after the requests.")
+    else:
+        print("  [FAIL] Context leaked out of the requests.")
+
+
+asyncio.run(main())
@@ -1,14 +1,14 @@
 import os
 import django
 import time
-import threading
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
 django.setup()
 
 from django.contrib.auth import get_user_model
 from apps.core.models import AuditLog
-from apps.core.middleware import _thread_locals
+from apps.core.context import set_audit_context
 
 User = get_user_model()
 
@@ -18,9 +18,8 @@ if not admin_user:
     print("Admin user not found, creating temporary admin...")
     admin_user = User.objects.create_superuser('temp_admin', 'admin@example.com', 'admin')
 
-# Simulate Middleware setting thread locals
-_thread_locals.user = admin_user
-_thread_locals.ip = '127.0.0.1'
+# Simulate Middleware setting the audit context
+set_audit_context(user=admin_user, ip='127.0.0.1')
 
 print(f"Simulating request by: {admin_user.username}")
 
@@ -0,0 +1,125 @@
+import datetime
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.db import connection
+
+from apps.core.models import AuditLog
+from apps.core.partitions import (
+    DEFAULT_PARTITION, PARENT_TABLE, archive_expired_partitions, create_partition, ensure_partitions,
+    list_partitions, partition_name,
+)
+
+# Months long before any real partition, so real data is never touched.
+YEAR = 1990
+ACTION = 'PARTITION_TEST'
+
+
+def month(number):
+    return datetime.date(YEAR, number, 1)
+
+
+def log(number, day=15):
+    timestamp = datetime.datetime(YEAR, number, day, 12, tzinfo=datetime.timezone.utc)
+    return AuditLog.objects.create(action=ACTION, details={'month': number}, timestamp=timestamp)
+
+
+def located(entry):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT tableoid::regclass::text FROM {PARENT_TABLE} WHERE id = %s', [entry.pk])
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+
+def exists(table):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [table])
+        return cursor.fetchone()[0]
+
+
+def test_tables():
+    return [name for name, _, _ in list_partitions() if name.startswith(f'{PARENT_TABLE}_p{YEAR}')]
+
+
+def cleanup():
+    with connection.cursor() as cursor:
+        for name in test_tables():
+            cursor.execute(f'DROP TABLE {connection.ops.quote_name(name)}')
+    AuditLog.objects.filter(action=ACTION).delete()
+
+
+cleanup()
+# archive_expired_partitions() also finishes every detached table; never
+# archive real leftovers into this test's temporary directory.
+if any(not attached for _, _, attached in list_partitions()):
+    print("  [SKIP] Detached audit partitions exist; run archive_audit_partitions first.")
+    sys.exit()
+archive_dir = tempfile.mkdtemp()
+
+# 1. Rows that fell into the default partition move into their month's partition
+print("Creating a partition over rows in the default partition...")
+january = log(1)
+stray = located(january)
+created = create_partition(month(1))
+again = create_partition(month(1))
+if stray == DEFAULT_PARTITION and created and not again and located(january) == partition_name(month(1)) \
+        and AuditLog.objects.filter(action=ACTION).count() == 1:
+    print("  [PASS] The row moved out of the default partition; a second call is a no-op.")
+else:
+    print(f"  [FAIL] before={stray} created={created}/{again} after={located(january)}")
+
+# 2. ensure_partitions covers the current month and the months ahead, once
+print("Ensuring upcoming partitions...")
+first_run = ensure_partitions(months_ahead=2, today=datetime.date(YEAR, 3, 10))
+second_run = ensure_partitions(months_ahead=2, today=datetime.date(YEAR, 3, 10))
+march = log(3)
+if first_run == [partition_name(month(n)) for n in (3, 4, 5)] and second_run == [] \
+        and located(march) == partition_name(month(3)):
+    print("  [PASS] March to May created once; new rows land in their month.")
+else:
+    print(f"  [FAIL] first={first_run} second={second_run} march={located(march)}")
+
+# 3. Months past the retention are archived to gzip JSONL and dropped
+print("Archiving expired partitions...")
+archived = archive_expired_partitions(2, archive_dir, today=datetime.date(YEAR, 4, 20))
+path = os.path.join(archive_dir, f'{partition_name(month(1))}.jsonl.gz')
+with gzip.open(path, 'rt', encoding='utf-8') as archive:
+    rows = [json.loads(line) for line in archive]
+if archived == [(path, 1)] and [row['id'] for row in rows] == [january.pk] and rows[0]['action'] == ACTION \
+        and not exists(partition_name(month(1))) and located(march) == partition_name(month(3)):
+    print("  [PASS] January archived with its row and dropped; March kept.")
+else:
+    print(f"  [FAIL] archived={archived} rows={rows} january exists={exists(partition_name(month(1)))}")
+
+# 4. A table left detached by an interrupted run is finished on the next one
+print("Resuming an interrupted archive...")
+create_partition(month(2))
+february = log(2)
+with connection.cursor() as cursor:
+    cursor.execute(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition_name(month(2))}')
+partial = os.path.join(archive_dir, f'{partition_name(month(2))}.jsonl.gz.part')
+with open(partial, 'wb') as leftover:
+    leftover.write(b'truncated')
+# February is within the retention, but detached.
+archived = archive_expired_partitions(12, archive_dir, today=datetime.date(YEAR, 4, 20))
+path = os.path.join(archive_dir, f'{partition_name(month(2))}.jsonl.gz')
+with gzip.open(path, 'rt', encoding='utf-8') as archive:
+    rows = [json.loads(line) for line in archive]
+if archived == [(path, 1)] and [row['id'] for row in rows] == [february.pk] and not os.path.exists(partial) \
+        and not exists(partition_name(month(2))) and test_tables() == [partition_name(month(n)) for n in (3, 4, 5)]:
+    print("  [PASS] The detached table was archived and dropped; attached months kept.")
+else:
+    print(f"  [FAIL] archived={archived} tables={test_tables()}")
+
+cleanup()
+shutil.rmtree(archive_dir)
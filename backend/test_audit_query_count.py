@@ -0,0 +1,67 @@
+import os
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.core.models import AuditLog
+
+User = get_user_model()
+
+target_username = 'audit_query_count_test'
+User.objects.filter(username=target_username).delete()
+User.objects.create_user(username=target_username, password='testpassword', role='STUDENT')
+
+# 1. Update of a tracked User: one UPDATE plus the audit INSERT, no SELECT
+target_user = User.objects.get(username=target_username)
+target_user.role = 'INSTRUCTOR'
+
+print("Updating tracked user role...")
+with CaptureQueriesContext(connection) as ctx:
+    target_user.save()
+
+# django-tenants prefixes cursors with SET search_path; only count real statements.
+queries = [q['sql'] for q in ctx.captured_queries if not q['sql'].startswith('SET search_path')]
+statements = [sql.split()[0] for sql in queries]
+print(f"  Queries: {statements}")
+if statements == ['UPDATE', 'INSERT'] and 'core_auditlog' in queries[1]:
+    print("  [PASS] Exactly one UPDATE plus the audit write.")
+else:
+    print("  [FAIL] Unexpected queries for a tracked update.")
+
+update_log = AuditLog.objects.filter(action='USER_UPDATE', details__target=target_username).first()
+if update_log and update_log.details.get('role') == {'old': 'STUDENT', 'new': 'INSTRUCTOR'}:
+    print("  [PASS] Diff recorded from the load-time snapshot.")
+else:
+    print(f"  [FAIL] Diff incorrect: {update_log.details if update_log else None}")
+
+# 2. Only an ignored field changed: no audit row at all
+print("Updating last_login only...")
+target_user.last_login = timezone.now()
+with CaptureQueriesContext(connection) as ctx:
+    target_user.save(update_fields=['last_login'])
+
+statements = [q['sql'].split()[0] for q in ctx.captured_queries if not q['sql'].startswith('SET search_path')]
+print(f"  Queries: {statements}")
+if statements == ['UPDATE']:
+    print("  [PASS] Ignored field change skipped the audit write.")
+else:
+    print("  [FAIL] Ignored field change was audited.")
+
+# 3. A second save diffs against the state of the first one
+target_user.first_name = 'Second'
+target_user.save()
+logs = AuditLog.objects.filter(action='USER_UPDATE', details__target=target_username).order_by('-timestamp')
+if logs.count() == 2 and set(logs[0].details) == {'first_name', 'target'}:
+    print("  [PASS] Snapshot refreshed after save.")
+else:
+    print("  [FAIL] Snapshot not refreshed after save.")
+
+# Clean up
+User.objects.filter(username=target_username).delete()
+AuditLog.objects.filter(details__target=target_username).delete()
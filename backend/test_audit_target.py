@@ -1,14 +1,14 @@
 import os
 import django
 import time
-import threading
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
 django.setup()
 
 from django.contrib.auth import get_user_model
 from apps.core.models import AuditLog
-from apps.core.middleware import _thread_locals
+from apps.core.context import set_audit_context
 
 User = get_user_model()
 
@@ -17,8 +17,7 @@ admin_user = User.objects.filter(username='admin').first()
 if not admin_user:
     admin_user = User.objects.create_superuser('temp_admin', 'admin@example.com', 'admin')
 
-_thread_locals.user = admin_user
-_thread_locals.ip = '127.0.0.1'
+set_audit_context(user=admin_user, ip='127.0.0.1')
 
 # 2. Create Target User
 target_username = 'target_test_user'
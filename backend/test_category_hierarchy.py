@@ -0,0 +1,139 @@
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.core.cache import local_caches
+from apps.lms.models import Category, Course
+
+User = get_user_model()
+PREFIX = 'hierarchy-test-'
+
+
+def cleanup():
+    Course.objects.filter(slug__startswith=PREFIX).delete()
+    Category.objects.filter(slug__startswith=PREFIX).delete()
+    User.objects.filter(username=f'{PREFIX}instructor').delete()
+
+
+def category(name, parent=None):
+    return Category.objects.create(name=name, slug=f'{PREFIX}{name}', parent=parent)
+
+
+def course(name, category, is_published=True):
+    return Course.objects.create(
+        title=name, slug=f'{PREFIX}{name}', category=category, instructor=instructor,
+        description='-', is_published=is_published,
+    )
+
+
+def counts():
+    return dict(Category.objects.filter(slug__startswith=PREFIX).values_list('name', 'course_count'))
+
+
+def listed(client, category):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get('/api/v1/courses/', {'category': category})
+    assert response.status_code == 200, response.status_code
+    sql = ' '.join(q['sql'] for q in ctx.captured_queries if 'lms_course' in q['sql'])
+    return sorted(item['title'] for item in response.data['results']), sql
+
+
+cleanup()
+instructor = User.objects.create(username=f'{PREFIX}instructor', role='INSTRUCTOR')
+
+# science > physics > quantum, science > chemistry, arts
+science = category('science')
+physics = category('physics', science)
+quantum = category('quantum', physics)
+chemistry = category('chemistry', science)
+arts = category('arts')
+
+# 1. Paths are set on create
+print("Creating categories...")
+quantum.refresh_from_db()
+if quantum.path == f'/{science.pk}/{physics.pk}/{quantum.pk}/' and arts.path == f'/{arts.pk}/':
+    print("  [PASS] Paths hold the ids from the root down.")
+else:
+    print(f"  [FAIL] quantum={quantum.path} arts={arts.path}")
+
+# 2. Subtree counts follow published courses
+print("Publishing courses...")
+course('q1', quantum)
+course('p1', physics)
+draft = course('c1', chemistry, is_published=False)
+course('a1', arts)
+before = counts()
+draft.is_published = True
+draft.save()
+published = counts()
+moved = Course.objects.get(slug=f'{PREFIX}q1')
+moved.category = arts
+moved.save()
+after_move = counts()
+if before == {'science': 2, 'physics': 2, 'quantum': 1, 'chemistry': 0, 'arts': 1} \
+        and published['science'] == 3 and published['chemistry'] == 1 \
+        and after_move == {'science': 2, 'physics': 1, 'quantum': 0, 'chemistry': 1, 'arts': 2}:
+    print("  [PASS] Publishing and moving courses update every ancestor.")
+else:
+    print(f"  [FAIL] {before} / {published} / {after_move}")
+moved.category = quantum
+moved.save()
+
+# 3. Moving a category rewrites its subtree and moves its counts
+print("Moving physics under arts...")
+physics.parent = arts
+physics.save()
+quantum.refresh_from_db()
+moved_counts = counts()
+if quantum.path == f'/{arts.pk}/{physics.pk}/{quantum.pk}/' \
+        and moved_counts == {'science': 1, 'physics': 2, 'quantum': 1, 'chemistry': 1, 'arts': 3}:
+    print("  [PASS] Subtree paths and ancestor counts follow the move.")
+else:
+    print(f"  [FAIL] quantum={quantum.path} counts={moved_counts}")
+
+# 4. A category cannot move into its own subtree
+arts.refresh_from_db()
+arts.parent = quantum
+try:
+    arts.full_clean()
+    print("  [FAIL] Cycle accepted by full_clean().")
+except ValidationError:
+    try:
+        arts.save()
+        print("  [FAIL] Cycle accepted by save().")
+    except ValueError:
+        print("  [PASS] Moving into the own subtree is rejected.")
+arts.refresh_from_db()
+
+# 5. Deleting a subtree takes its courses off the ancestors once
+physics.delete()
+if counts() == {'science': 1, 'chemistry': 1, 'arts': 1}:
+    print("  [PASS] Deleting a subtree subtracts its courses once.")
+else:
+    print(f"  [FAIL] {counts()}")
+
+# 6. ?category= lists the whole subtree with one prefix match
+print("Filtering courses by category...")
+physics = category('physics2', arts)
+course('p2', physics)
+client = APIClient(HTTP_HOST='localhost')
+with local_caches():
+    by_slug, sql = listed(client, arts.slug)
+    by_id, _ = listed(client, arts.pk)
+    missing, _ = listed(client, f'{PREFIX}missing')
+if by_slug == by_id == ['a1', 'p2'] and 'LIKE' in sql and 'WITH RECURSIVE' not in sql and missing == []:
+    print("  [PASS] Subtree filter by slug or id in a single LIKE query.")
+else:
+    print(f"  [FAIL] slug={by_slug} id={by_id} missing={missing}\n{sql}")
+
+cleanup()
@@ -0,0 +1,115 @@
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.core.cache import local_caches
+from apps.lms.models import Category
+
+PREFIX = 'tree-test-'
+URL = '/api/v1/categories/'
+
+
+def cleanup():
+    Category.objects.filter(slug__startswith=PREFIX).delete()
+
+
+def get(client, **headers):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(URL, **headers)
+    queries = [q for q in ctx.captured_queries if not q['sql'].startswith('SET search_path')]
+    return response, len(queries)
+
+
+def expected(category):
+    # What the old recursive serializer produced for ``category``.
+    return {
+        'id': category.pk, 'name': category.name, 'slug': category.slug, 'icon': category.icon,
+        'course_count': category.course_count,
+        'children': [expected(child) for child in Category.objects.filter(parent=category).order_by('id')],
+    }
+
+
+def find(nodes, slug):
+    for node in nodes:
+        if node['slug'] == slug:
+            return node
+        found = find(node['children'], slug)
+        if found:
+            return found
+
+
+cleanup()
+root = Category.objects.create(name='Kök', slug=f'{PREFIX}root')
+for i in range(3):
+    child = Category.objects.create(name=f'Alt {i}', slug=f'{PREFIX}child-{i}', parent=root)
+    for j in range(3):
+        Category.objects.create(name=f'Alt {i}.{j}', slug=f'{PREFIX}leaf-{i}-{j}', parent=child, icon='book')
+
+client = APIClient(HTTP_HOST='localhost')
+with local_caches():
+    client.get(URL)  # warm tenant resolution
+    Category.objects.create(name='Geçici', slug=f'{PREFIX}temp')  # invalidates the tree
+
+    # 1. One query for the whole tree, none once cached
+    print("Loading the category tree...")
+    cold, cold_queries = get(client)
+    warm, warm_queries = get(client)
+    if cold.status_code == 200 and cold_queries == 1 and warm_queries == 0:
+        print("  [PASS] 1 query cold, 0 warm.")
+    else:
+        print(f"  [FAIL] status={cold.status_code} cold={cold_queries} warm={warm_queries}")
+    if find(cold.data, f'{PREFIX}root') == expected(root) and warm.data == cold.data:
+        print("  [PASS] Same nested representation as the recursive serializer.")
+    else:
+        print("  [FAIL] Tree differs from the recursive serializer.")
+
+    # 2. Conditional GET
+    etag = cold['ETag']
+    not_modified, queries = get(client, HTTP_IF_NONE_MATCH=etag)
+    if not_modified.status_code == 304 and not_modified['ETag'] == etag and queries == 0:
+        print("  [PASS] Matching If-None-Match answered with 304.")
+    else:
+        print(f"  [FAIL] status={not_modified.status_code} queries={queries}")
+
+    # 3. Saving or deleting a category invalidates the cached tree
+    print("Changing categories...")
+    leaf = Category.objects.get(slug=f'{PREFIX}leaf-0-0')
+    leaf.name = 'Yeni ad'
+    leaf.save()
+    renamed, queries = get(client, HTTP_IF_NONE_MATCH=etag)
+    Category.objects.filter(slug=f'{PREFIX}temp').delete()
+    deleted, _ = get(client)
+    if renamed.status_code == 200 and renamed['ETag'] != etag and queries == 1 \
+            and find(renamed.data, leaf.slug)['name'] == 'Yeni ad' and find(deleted.data, f'{PREFIX}temp') is None:
+        print("  [PASS] Save and delete rebuild the tree with a new ETag.")
+    else:
+        print(f"  [FAIL] status={renamed.status_code} queries={queries}")
+
+    # 4. Detail views take their children from the same tree
+    with CaptureQueriesContext(connection) as ctx:
+        detail = client.get(f'{URL}{root.pk}/')
+    if detail.status_code == 200 and detail.data == expected(root) and len(ctx.captured_queries) <= 2:
+        print("  [PASS] Category detail nests its subtree without extra queries.")
+    else:
+        print(f"  [FAIL] status={detail.status_code} queries={len(ctx.captured_queries)}")
+
+    # 5. A tree cached while the change is uncommitted is dropped on commit
+    print("Caching the tree during a transaction...")
+    with transaction.atomic():
+        leaf.name = 'Taslak ad'
+        leaf.save()
+        get(client)  # a request in the window caches the tree
+    committed, queries = get(client)
+    if queries == 1 and find(committed.data, leaf.slug)['name'] == 'Taslak ad':
+        print("  [PASS] The tree is rebuilt after the commit.")
+    else:
+        print(f"  [FAIL] queries={queries}")
+
+cleanup()
@@ -0,0 +1,90 @@
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from apps.core.cache import local_caches
+from apps.lms.models import Course, HTMLLesson, Module
+
+User = get_user_model()
+PREFIX = 'catalog-fields-'
+COURSES = 7
+
+
+def cleanup():
+    Course.objects.filter(slug__startswith=PREFIX).delete()
+    User.objects.filter(username=f'{PREFIX}instructor').delete()
+
+
+def get(client, url, **params):
+    response = client.get(url, params)
+    assert response.status_code == 200, (url, params, response.status_code)
+    return response.data
+
+
+cleanup()
+instructor = User.objects.create(username=f'{PREFIX}instructor', role='INSTRUCTOR')
+for i in range(COURSES):
+    course = Course.objects.create(
+        title=f'Katalog {i}', slug=f'{PREFIX}{i}', instructor=instructor, description='-', is_published=True,
+    )
+    for m in range(i % 3):
+        module = Module.objects.create(course=course, title=f'Modül {m}', order=m)
+        HTMLLesson.objects.create(module=module, title='Ders', order=1, content='<p>x</p>')
+ours = set(Course.objects.filter(slug__startswith=PREFIX).values_list('pk', flat=True))
+
+client = APIClient(HTTP_HOST='localhost')
+with local_caches():
+    # 1. Compact, paginated catalog
+    print("Listing the catalog...")
+    page = get(client, '/api/v1/courses/', page_size=3)
+    first = page['results'][0]
+    if len(page['results']) == 3 and page['next'] and 'modules' not in first and 'total_modules' in first:
+        print("  [PASS] List entries carry a module count instead of the syllabus.")
+    else:
+        print(f"  [FAIL] {page}")
+
+    # 2. Following the cursor visits every course once
+    seen = []
+    url, params = '/api/v1/courses/', {'page_size': 3}
+    while url:
+        page = get(client, url, **params)
+        seen += [item['id'] for item in page['results']]
+        url, params = page['next'], {}
+    counts = {item['id']: item['total_modules'] for item in get(client, '/api/v1/courses/', page_size=100)['results']}
+    if len(seen) == len(set(seen)) and ours <= set(seen) \
+            and all(counts[course.pk] == course.modules.count() for course in Course.objects.filter(pk__in=ours)):
+        print("  [PASS] The cursor walks the whole catalog with correct module counts.")
+    else:
+        print(f"  [FAIL] seen={len(seen)} unique={len(set(seen))}")
+
+    # 3. ?expand=modules and ?fields=
+    expanded = get(client, '/api/v1/courses/', expand='modules', page_size=100)['results']
+    sparse = get(client, '/api/v1/courses/', fields='id,title')['results']
+    nested = next(item for item in expanded if item['id'] in ours and item['total_modules'])
+    if nested['modules'] and nested['modules'][0]['lessons'] and all(set(item) == {'id', 'title'} for item in sparse):
+        print("  [PASS] expand adds the syllabus, fields trims the entries.")
+    else:
+        print(f"  [FAIL] expanded={nested} sparse={sparse[:1]}")
+
+    # 4. Detail keeps the outline; fields applies there and on modules too
+    course = Course.objects.filter(pk__in=ours, modules__isnull=False).first()
+    detail = get(client, f'/api/v1/courses/{course.pk}/')
+    trimmed = get(client, f'/api/v1/courses/{course.pk}/', fields='id,modules')
+    client.force_authenticate(instructor)
+    modules = get(client, '/api/v1/modules/', fields='id,title')
+    mine = get(client, '/api/v1/courses/my_courses/', expand='modules', page_size=100)
+    if 'modules' in detail and 'total_modules' not in detail and set(trimmed) == {'id', 'modules'} \
+            and all(set(item) == {'id', 'title'} for item in modules) \
+            and {item['id'] for item in mine['results']} == ours and all('modules' in item for item in mine['results']):
+        print("  [PASS] Detail, modules and my_courses honour fields/expand.")
+    else:
+        print(f"  [FAIL] detail={sorted(detail)} trimmed={sorted(trimmed)} mine={len(mine['results'])}")
+
+cleanup()
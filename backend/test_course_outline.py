@@ -0,0 +1,100 @@
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.core.cache import local_caches
+from apps.core.serializers import ClaimsTokenObtainPairSerializer
+from apps.lms.models import Course, HTMLLesson, Module
+from config.celery import app
+
+User = get_user_model()
+PREFIX = 'outline-test-'
+app.conf.task_always_eager = True
+
+
+def cleanup():
+    Course.objects.filter(slug__startswith=PREFIX).delete()
+    User.objects.filter(username=f'{PREFIX}instructor').delete()
+
+
+def get(client, url, **headers):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url, **headers)
+    return response, len([q for q in ctx.captured_queries if not q['sql'].startswith('SET search_path')])
+
+
+cleanup()
+client = APIClient(HTTP_HOST='localhost')
+with local_caches():
+    instructor = User.objects.create(username=f'{PREFIX}instructor', role='INSTRUCTOR')
+    course = Course.objects.create(
+        title='Taslak', slug=f'{PREFIX}course', instructor=instructor, description='-', is_published=True,
+    )
+    module = Module.objects.create(course=course, title='Hafta 1', order=1)
+    lesson = HTMLLesson.objects.create(module=module, title='Giriş', order=1, content='<p>Merhaba</p>')
+    url = f'/api/v1/courses/{course.pk}/outline/'
+    client.get('/api/v1/courses/')  # warm tenant resolution
+
+    # 1. The outline is the retrieve representation, served from the cache
+    print("Fetching the outline...")
+    first, _ = get(client, url)
+    warm, queries = get(client, url)
+    detail = client.get(f'/api/v1/courses/{course.pk}/').json()
+    if first.status_code == 200 and first.json() == detail and warm.content == first.content and queries == 0:
+        print("  [PASS] Same document as the detail view, 0 queries when warm.")
+    else:
+        print(f"  [FAIL] status={first.status_code} queries={queries}")
+
+    # 2. Strong validators and 304s without database work
+    etag, last_modified = first['ETag'], first['Last-Modified']
+    by_etag, etag_queries = get(client, url, HTTP_IF_NONE_MATCH=etag)
+    by_date, date_queries = get(client, url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    if not etag.startswith('W/') and by_etag.status_code == 304 and by_date.status_code == 304 \
+            and etag_queries == 0 and date_queries == 0:
+        print("  [PASS] If-None-Match and If-Modified-Since answered with 304, 0 queries.")
+    else:
+        print(f"  [FAIL] etag={etag} statuses={by_etag.status_code}/{by_date.status_code} "
+              f"queries={etag_queries}/{date_queries}")
+
+    # 3. Editing a lesson or deleting a module rebuilds the document
+    print("Editing the course content...")
+    time.sleep(1)  # Last-Modified has one second resolution
+    lesson.title = 'Yeni giriş'
+    lesson.save()
+    edited, _ = get(client, url, HTTP_IF_NONE_MATCH=etag)
+    extra = Module.objects.create(course=course, title='Hafta 2', order=2)
+    added, _ = get(client, url)
+    extra.delete()
+    removed, _ = get(client, url)
+    if edited.status_code == 200 and edited['ETag'] != etag and edited['Last-Modified'] != last_modified \
+            and edited.json()['modules'][0]['lessons'][0]['title'] == 'Yeni giriş' \
+            and len(added.json()['modules']) == 2 and added['ETag'] != edited['ETag'] \
+            and removed.content == edited.content:
+        print("  [PASS] Lesson and module changes produce a new document and validators.")
+    else:
+        print(f"  [FAIL] status={edited.status_code} etag={edited.get('ETag')}")
+
+    # 4. Unpublished outlines are only visible to their instructor
+    course.is_published = False
+    course.save()
+    hidden, _ = get(client, url)
+    # A real bearer token: JWT requests carry a claims user, not a User.
+    token = ClaimsTokenObtainPairSerializer.get_token(instructor).access_token
+    own, _ = get(client, url, HTTP_AUTHORIZATION=f'Bearer {token}')
+    missing, _ = get(client, '/api/v1/courses/999999999/outline/')
+    if hidden.status_code == 404 and own.status_code == 200 and missing.status_code == 404:
+        print("  [PASS] Drafts are hidden from others; unknown courses are 404.")
+    else:
+        print(f"  [FAIL] hidden={hidden.status_code} own={own.status_code} missing={missing.status_code}")
+
+cleanup()
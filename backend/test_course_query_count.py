@@ -0,0 +1,104 @@
+import os
+from datetime import timedelta
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.cache import local_caches
+from apps.lms.models import (
+    Assignment, Category, Course, DocumentLesson, HTMLLesson, LiveLesson, Module, QuizLesson, VideoLesson,
+)
+
+User = get_user_model()
+PREFIX = 'query-count-'
+DOCUMENT = f'course_documents/{PREFIX}document.pdf'
+# Course outline: courses, modules, lessons, then one query per lesson type.
+LIST_QUERIES = 3 + 6
+
+
+def cleanup():
+    Course.objects.filter(slug__startswith=PREFIX).delete()
+    Category.objects.filter(slug=f'{PREFIX}category').delete()
+    User.objects.filter(username=f'{PREFIX}instructor').delete()
+    default_storage.delete(DOCUMENT)
+
+
+def seed(courses, modules_per_course):
+    instructor, _ = User.objects.get_or_create(
+        username=f'{PREFIX}instructor', defaults={'role': 'INSTRUCTOR', 'first_name': 'Ada'},
+    )
+    category, _ = Category.objects.get_or_create(slug=f'{PREFIX}category', defaults={'name': 'Sorgu'})
+    if not default_storage.exists(DOCUMENT):
+        default_storage.save(DOCUMENT, ContentFile(b'%PDF-1.4'))
+    now = timezone.now()
+    start = Course.objects.filter(slug__startswith=PREFIX).count()
+    for i in range(start, start + courses):
+        course = Course.objects.create(
+            title=f'Course {i}', slug=f'{PREFIX}{i}', category=category, instructor=instructor,
+            description='-', is_published=True,
+        )
+        for m in range(modules_per_course):
+            module = Module.objects.create(course=course, title=f'Module {m}', order=m)
+            VideoLesson.objects.create(module=module, title='Video', order=1)
+            DocumentLesson.objects.create(module=module, title='Doc', order=2, file=DOCUMENT)
+            QuizLesson.objects.create(module=module, title='Quiz', order=3)
+            HTMLLesson.objects.create(module=module, title='HTML', order=4, content='<p>x</p>')
+            LiveLesson.objects.create(module=module, title='Live', order=5, start_time=now,
+                                      end_time=now + timedelta(hours=1), meeting_link='https://meet.example.com/x')
+            Assignment.objects.create(module=module, title='Ödev', order=6, due_date=now)
+    return instructor
+
+
+def count_queries(client, url):
+    client.get(url)  # warm the tenant, content type and user caches
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200, (url, response.status_code)
+    return len([q for q in ctx.captured_queries if not q['sql'].startswith('SET search_path')])
+
+
+def measure(instructor):
+    client = APIClient(HTTP_HOST='localhost')
+    course = Course.objects.filter(slug__startswith=PREFIX).first()
+    counts = {
+        'list': count_queries(client, '/api/v1/courses/'),
+        'list_expanded': count_queries(client, '/api/v1/courses/?expand=modules'),
+        'detail': count_queries(client, f'/api/v1/courses/{course.pk}/'),
+    }
+    client.force_authenticate(instructor)
+    counts['my_courses'] = count_queries(client, '/api/v1/courses/my_courses/')
+    counts['modules'] = count_queries(client, '/api/v1/modules/')
+    return counts
+
+
+cleanup()
+with local_caches():
+    instructor = seed(courses=2, modules_per_course=1)
+    small = measure(instructor)
+    seed(courses=8, modules_per_course=3)
+    large = measure(instructor)
+
+print(f"Queries with 2 courses: {small}")
+print(f"Queries with 10 courses: {large}")
+if small == large:
+    print("  [PASS] Query counts do not grow with the catalog.")
+else:
+    print("  [FAIL] Query counts grow with the catalog.")
+if large['list'] == 1 and large['my_courses'] == 1 \
+        and large['list_expanded'] <= LIST_QUERIES and large['detail'] <= LIST_QUERIES:
+    print(f"  [PASS] Compact lists use 1 query, outlines at most {LIST_QUERIES}.")
+else:
+    print("  [FAIL] Course endpoints exceed their query budget.")
+
+cleanup()
@@ -0,0 +1,117 @@
+import os
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, connections, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django_tenants.utils import schema_exists
+
+from apps.core.provisioning import refresh_template
+from apps.lms.models import Lesson
+
+SCHEMA = 'search_path_test'
+
+
+def set_statements(ctx):
+    return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SET search_path')]
+
+
+def show_search_path(conn):
+    with conn.cursor() as cursor:
+        cursor.execute('SHOW search_path')
+        return cursor.fetchone()[0]
+
+
+with connection.cursor() as cursor:
+    cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {SCHEMA}')
+
+# 1. Session mode: SET only when the tenant changes
+print("Simulating requests for the same tenant...")
+with CaptureQueriesContext(connection) as ctx:
+    for _ in range(5):
+        connection.set_schema_to_public()  # what the tenant middleware does per request
+        show_search_path(connection)
+if len(set_statements(ctx)) <= 1:
+    print(f"  [PASS] {len(set_statements(ctx))} SET for 5 requests.")
+else:
+    print(f"  [FAIL] {len(set_statements(ctx))} SET statements for 5 requests.")
+
+print("Switching tenants...")
+with CaptureQueriesContext(connection) as ctx:
+    connection.set_schema(SCHEMA)
+    path = show_search_path(connection)
+    connection.set_schema_to_public()
+    show_search_path(connection)
+if len(set_statements(ctx)) == 2 and path.startswith(SCHEMA):
+    print("  [PASS] SET re-issued on every tenant change.")
+else:
+    print(f"  [FAIL] {set_statements(ctx)} / {path}")
+
+# 2. A rolled back SET is not trusted afterwards
+print("Rolling back a transaction that switched tenants...")
+try:
+    with transaction.atomic():
+        connection.set_schema(SCHEMA)
+        show_search_path(connection)
+        raise RuntimeError('rollback')
+except RuntimeError:
+    pass
+path = show_search_path(connection)  # still SCHEMA for Django, reverted in Postgres
+connection.set_schema_to_public()
+if path.startswith(SCHEMA) and show_search_path(connection) == 'public':
+    print("  [PASS] search_path restored after the rollback.")
+else:
+    print(f"  [FAIL] search_path after rollback: {path}")
+
+# 3. Persistent connection survives requests, health check enabled
+if connection.settings_dict['CONN_MAX_AGE'] and connection.settings_dict['CONN_HEALTH_CHECKS']:
+    print("  [PASS] Persistent connections with health checks configured.")
+else:
+    print("  [FAIL] Connections are not persistent or not health-checked.")
+
+# 4. Transaction pooling: every statement carries its own search_path
+print("Transaction pooling mode...")
+with override_settings(DB_POOL_MODE='transaction'):
+    pooled = connections.create_connection('default')
+    pooled.set_schema(SCHEMA)
+    with pooled.cursor() as cursor:
+        # Another client's SET on a shared server connection must not leak in.
+        cursor.execute('SET search_path = pg_catalog')
+        cursor.execute('SHOW search_path')
+        path = cursor.fetchone()[0]
+        cursor.execute('SELECT %s::text', ['100%'])
+        value = cursor.fetchone()[0]
+    pooled.close()
+if path.startswith(SCHEMA) and value == '100%':
+    print("  [PASS] search_path sent with each statement.")
+else:
+    print(f"  [FAIL] search_path {path}, value {value}")
+
+# 5. Content types are cached per schema; ids differ between schemas
+print("Content type cache across schemas...")
+template = settings.TENANT_TEMPLATE_SCHEMA
+if not schema_exists(template):
+    refresh_template()
+ids = {}
+for schema_name in ('public', template, 'public', template):
+    connection.set_schema(schema_name, include_public=False)
+    with CaptureQueriesContext(connection) as ctx:
+        content_type = ContentType.objects.get_for_model(Lesson)
+    reads = [q for q in ctx.captured_queries if 'django_content_type' in q['sql']]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT id FROM django_content_type WHERE app_label = 'lms' AND model = 'lesson'")
+        expected = cursor.fetchone()[0]
+    ids.setdefault(schema_name, []).append((content_type.pk == expected, len(reads)))
+if all(correct for entries in ids.values() for correct, _ in entries) \
+        and all(entries[1][1] == 0 for entries in ids.values()):
+    print("  [PASS] Each schema gets its own ids, cached across tenant switches.")
+else:
+    print(f"  [FAIL] {ids}")
+
+connection.set_schema_to_public()
+with connection.cursor() as cursor:
+    cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA}')
@@ -0,0 +1,136 @@
+import os
+
+# Documents go to an S3 bucket served by moto for this test.
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+os.environ['DOCUMENT_STORAGE'] = 'objects'
+os.environ['AWS_S3_ENDPOINT_URL'] = os.environ['AWS_S3_PUBLIC_ENDPOINT_URL'] = 'http://127.0.0.1:5123'
+os.environ['AWS_ACCESS_KEY_ID'] = os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
+os.environ['AWS_STORAGE_BUCKET_NAME'] = 'direct-upload-test'
+
+import django
+import requests
+from moto.server import ThreadedMotoServer
+
+django.setup()
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from apps.core.cache import local_caches
+from apps.lms.models import Course, DocumentLesson, Module
+
+User = get_user_model()
+PREFIX = 'direct-upload-test-'
+URL = '/api/v1/direct-uploads/'
+PDF = b'%PDF-1.4\n' + os.urandom(50 * 1024)
+
+
+def cleanup():
+    Course.objects.filter(slug__startswith=PREFIX).delete()
+    User.objects.filter(username__startswith=PREFIX).delete()
+
+
+def presign(client, method='POST', size=len(PDF), **overrides):
+    data = {'purpose': 'document', 'filename': 'Ders Notu.pdf', 'content_type': 'application/pdf',
+            'size': size, 'method': method, **overrides}
+    return client.post(URL, data, format='json')
+
+
+def upload(presigned, body=PDF):
+    if presigned['method'] == 'PUT':
+        return requests.put(presigned['url'], data=body, headers=presigned['headers'])
+    return requests.post(presigned['url'], data=presigned['fields'], files={'file': ('doc.pdf', body)})
+
+
+def create_lesson(client, module, token, order=1):
+    return client.post('/api/v1/lessons/', {
+        'resourcetype': 'DocumentLesson', 'title': 'Doküman', 'order': order, 'module': module.pk, 'upload': token,
+    }, format='json')
+
+
+server = ThreadedMotoServer(port=5123, verbose=False)
+server.start()
+storage = DocumentLesson._meta.get_field('file').storage
+storage.connection.meta.client.create_bucket(Bucket=storage.bucket_name)
+
+cleanup()
+instructor = User.objects.create(username=f'{PREFIX}instructor', role='INSTRUCTOR')
+stranger = User.objects.create(username=f'{PREFIX}stranger', role='INSTRUCTOR')
+student = User.objects.create(username=f'{PREFIX}student', role='STUDENT')
+course = Course.objects.create(title='Direct', slug=f'{PREFIX}course', instructor=instructor, description='-')
+module = Module.objects.create(course=course, title='Modül', order=1)
+
+client = APIClient(HTTP_HOST='localhost')
+with local_caches():
+    # 1. Presigned POST, then the lesson is created from the token
+    print("Uploading a document with a presigned POST...")
+    client.force_authenticate(instructor)
+    presigned = presign(client)
+    uploaded = upload(presigned.data)
+    created = create_lesson(client, module, presigned.data['upload'])
+    lesson = DocumentLesson.objects.filter(module=module).first()
+    if presigned.status_code == 201 and uploaded.status_code in (200, 204) and created.status_code == 201 \
+            and lesson.file.name == presigned.data['key'] and lesson.file_size == len(PDF) \
+            and lesson.file_type == 'pdf' and storage.open(lesson.file.name).read() == PDF:
+        print("  [PASS] Object uploaded to the bucket and attached by HEAD.")
+    else:
+        print(f"  [FAIL] presign={presigned.status_code} upload={uploaded.status_code} "
+              f"create={created.status_code} {created.data}")
+    conditions = presigned.data.get('fields', {}).get('policy', '')
+    if presigned.data['key'].startswith('course_documents/public/') and conditions:
+        print("  [PASS] Key is namespaced by tenant and the POST carries a policy.")
+    else:
+        print(f"  [FAIL] key={presigned.data['key']}")
+
+    # 2. Presigned PUT replaces the file of an existing lesson
+    print("Replacing it with a presigned PUT...")
+    replacement = PDF[:1000]
+    presigned = presign(client, method='PUT', size=len(replacement))
+    uploaded = upload(presigned.data, replacement)
+    patched = client.patch(f'/api/v1/lessons/{lesson.pk}/', {'upload': presigned.data['upload']}, format='json')
+    lesson.refresh_from_db()
+    if uploaded.status_code == 200 and patched.status_code == 200 \
+            and lesson.file.name == presigned.data['key'] and lesson.file_size == len(replacement):
+        print("  [PASS] PUT upload attached with its size.")
+    else:
+        print(f"  [FAIL] upload={uploaded.status_code} patch={patched.status_code} {patched.data}")
+
+    # 3. Requests outside the purpose's rules are refused before signing
+    print("Checking what can be presigned...")
+    too_big = presign(client, size=DocumentLesson.MAX_FILE_SIZE + 1)
+    wrong_type = presign(client, content_type='text/html')
+    wrong_extension = presign(client, filename='script.exe', content_type='application/octet-stream')
+    client.force_authenticate(student)
+    forbidden = presign(client)
+    if (too_big.status_code, wrong_type.status_code, wrong_extension.status_code, forbidden.status_code) \
+            == (400, 400, 400, 400):
+        print("  [PASS] Size, type, extension and role are enforced.")
+    else:
+        print(f"  [FAIL] {too_big.status_code} {wrong_type.status_code} "
+              f"{wrong_extension.status_code} {forbidden.status_code}")
+
+    # 4. Tokens only attach this user's object, once it matches the presign
+    print("Attaching tokens that must be rejected...")
+    client.force_authenticate(instructor)
+    presigned = presign(client).data
+    missing = create_lesson(client, module, presigned['upload'], order=2)
+    storage.connection.meta.client.put_object(
+        Bucket=storage.bucket_name, Key=presigned['key'], Body=PDF[:10], ContentType='application/pdf',
+    )
+    mismatch = create_lesson(client, module, presigned['upload'], order=2)
+    forged = create_lesson(client, module, presigned['upload'] + 'x', order=2)
+    client.force_authenticate(stranger)
+    presigned = presign(client).data
+    upload(presigned)
+    client.force_authenticate(instructor)
+    foreign = create_lesson(client, module, presigned['upload'], order=2)
+    codes = [response.status_code for response in (missing, mismatch, forged, foreign)]
+    if codes == [400] * 4 and all('upload' in response.data for response in (missing, mismatch, forged, foreign)) \
+            and DocumentLesson.objects.filter(module=module).count() == 1:
+        print("  [PASS] Missing, mismatched, forged and foreign uploads are refused.")
+    else:
+        print(f"  [FAIL] {codes}")
+
+cleanup()
+server.stop()
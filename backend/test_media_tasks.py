@@ -0,0 +1,200 @@
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from celery.exceptions import SoftTimeLimitExceeded
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import OperationalError, connection
+from django.db.models.signals import post_save
+
+from apps.core.cache import local_caches, tenant_cache
+from apps.core.redis_client import get_redis
+from apps.lms.models import Course, Module, VideoLesson
+from apps.lms.progress import progress_key, read_progress
+from apps.lms.tasks import LOCK_RETRIES, TRANSCODE_LOCK_KEY, transcode_video_task
+from apps.lms.transcoding import TranscodeError, transcode
+from config.celery import app
+
+User = get_user_model()
+PREFIX = 'media-task-test-'
+RESULT = ({'duration': 3.0}, [{'name': '240p', 'encode_seconds': 1.0}])
+
+
+def cleanup():
+    for lesson in VideoLesson.objects.filter(module__course__slug__startswith=PREFIX):
+        if lesson.source_file:
+            lesson.source_file.delete(save=False)
+        get_redis().delete(progress_key(connection.schema_name, lesson.pk))
+    Course.objects.filter(slug__startswith=PREFIX).delete()
+    User.objects.filter(username__startswith=PREFIX).delete()
+
+
+def run(lesson, kwargs=None, **patch):
+    """Run the task with transcode() mocked; returns (mock, update_fields of every save)."""
+    saves = []
+    receiver = lambda sender, update_fields, **kwargs: saves.append(update_fields and set(update_fields))
+    post_save.connect(receiver, sender=VideoLesson, weak=False)
+    with mock.patch('apps.lms.tasks.transcode', **patch) as transcode_mock:
+        transcode_video_task.apply(args=(connection.schema_name, lesson.pk), kwargs=kwargs)
+    post_save.disconnect(receiver, sender=VideoLesson)
+    lesson.refresh_from_db()
+    return transcode_mock, saves
+
+
+def reset(lesson, status='PENDING'):
+    VideoLesson.objects.filter(pk=lesson.pk).update(processing_status=status)
+
+
+# 1. Routing and task options
+print("Checking queues and task options...")
+route = lambda name: app.amqp.router.route({}, name)['queue'].name
+routes = {name: route(name) for name in (
+    'apps.lms.tasks.transcode_video_task', 'apps.core.tasks.import_users_task',
+    'apps.lms.tasks.generate_thumbnail_task', 'apps.lms.tasks.rebuild_course_outline_task',
+)}
+if list(routes.values()) == ['transcode', 'documents', 'thumbnail', 'celery']:
+    print("  [PASS] Transcode, thumbnail and document work have their own queues.")
+else:
+    print(f"  [FAIL] {routes}")
+task = transcode_video_task
+if task.acks_late and task.ignore_result and task.soft_time_limit < task.time_limit \
+        and all(t.ignore_result for name, t in app.tasks.items() if name.startswith('apps.')) \
+        and app.conf.broker_transport_options['visibility_timeout'] > task.time_limit:
+    print("  [PASS] acks_late, time limits within the visibility timeout, no stored results.")
+else:
+    print(f"  [FAIL] acks_late={task.acks_late} limits={task.soft_time_limit}/{task.time_limit}")
+
+cleanup()
+instructor = User.objects.create(username=f'{PREFIX}instructor', role='INSTRUCTOR')
+course = Course.objects.create(title='Media', slug=f'{PREFIX}course', instructor=instructor, description='-')
+module = Module.objects.create(course=course, title='Modül', order=1)
+
+with local_caches(), mock.patch('apps.lms.signals.transcode_video_task.delay'):
+    lesson = VideoLesson.objects.create(module=module, title='Video', order=1)
+    lesson.source_file.save(f'{PREFIX}lesson.mp4', ContentFile(b'video'))
+
+    # 2. Status writes touch only the fields they change
+    print("Running the task...")
+    transcode_mock, saves = run(lesson, return_value=RESULT)
+    if lesson.processing_status == 'COMPLETED' and lesson.renditions == RESULT[1] \
+            and saves == [{'processing_status'}, {'processing_status', 'video_url', 'duration', 'renditions'}]:
+        print("  [PASS] Status writes use update_fields.")
+    else:
+        print(f"  [FAIL] status={lesson.processing_status} saves={saves}")
+
+    # 3. Repeated triggers do not encode twice; a delivery that finds the lesson locked is queued again
+    transcode_mock, saves = run(lesson, return_value=RESULT)
+    if not transcode_mock.called and not saves:
+        print("  [PASS] Completed lessons are skipped.")
+    else:
+        print(f"  [FAIL] completed lesson encoded again, saves={saves}")
+
+    print("Replacing the source during an encode...")
+    reset(lesson)
+    old_name = lesson.source_file.name
+    retries = []
+
+    def replace_source(*args, **kwargs):
+        # What complete_upload does, then the task it queues is delivered.
+        new_name = lesson.source_file.storage.save(f'course_videos/{PREFIX}new.mp4', ContentFile(b'video'))
+        VideoLesson.objects.filter(pk=lesson.pk).update(source_file=new_name, processing_status='PENDING')
+        with mock.patch.object(transcode_video_task, 'apply_async') as requeue:
+            transcode_video_task.apply(args=(connection.schema_name, lesson.pk))
+            # The last allowed wait gives up instead of queueing another.
+            transcode_video_task.apply(args=(connection.schema_name, lesson.pk), kwargs={'lock_waits': LOCK_RETRIES})
+        retries.extend(requeue.call_args_list)
+        return RESULT
+
+    first_mock, _ = run(lesson, side_effect=replace_source)
+    status_after_first = lesson.processing_status
+    state_after_first = read_progress(connection.schema_name, lesson.pk)
+    retried_mock, _ = run(lesson, return_value=RESULT)
+    lesson.source_file.storage.delete(old_name)
+    if first_mock.call_count == 1 and len(retries) == 1 and retries[0].kwargs['countdown'] > 0 \
+            and retries[0].args[1] == {'lock_waits': 1} \
+            and status_after_first == 'PENDING' and state_after_first['status'] == 'PENDING' \
+            and retried_mock.call_args.args[0] == lesson.source_file.path \
+            and lesson.processing_status == 'COMPLETED':
+        print("  [PASS] The locked delivery is queued again, counting its waits, and encodes the new source.")
+    else:
+        print(f"  [FAIL] retries={retries} status={status_after_first}/{lesson.processing_status} "
+              f"progress={state_after_first}")
+
+    print("Failing an encode whose source was replaced...")
+    reset(lesson)
+    old_name = lesson.source_file.name
+
+    def replace_and_fail(*args, **kwargs):
+        # The old source is gone under the remaining renditions.
+        new_name = lesson.source_file.storage.save(f'course_videos/{PREFIX}newer.mp4', ContentFile(b'video'))
+        VideoLesson.objects.filter(pk=lesson.pk).update(source_file=new_name, processing_status='PENDING')
+        raise TranscodeError('360p: No such file or directory')
+
+    run(lesson, side_effect=replace_and_fail)
+    status_after_failure = lesson.processing_status
+    retried_mock, _ = run(lesson, return_value=RESULT)
+    lesson.source_file.storage.delete(old_name)
+    if status_after_failure == 'PENDING' and retried_mock.called \
+            and retried_mock.call_args.args[0] == lesson.source_file.path \
+            and lesson.processing_status == 'COMPLETED':
+        print("  [PASS] The failure leaves the new source PENDING, and it is encoded.")
+    else:
+        print(f"  [FAIL] status={status_after_failure}/{lesson.processing_status}")
+
+    # 4. Database errors are retried, however long the delivery waited for the lock;
+    # the soft time limit fails the lesson
+    print("Retrying and timing out...")
+    reset(lesson)
+    transcode_mock, _ = run(lesson, {'lock_waits': LOCK_RETRIES}, side_effect=OperationalError('connection lost'))
+    retried = transcode_mock.call_count
+    status_after_retries = lesson.processing_status
+    reset(lesson)
+    transcode_mock, _ = run(lesson, side_effect=SoftTimeLimitExceeded())
+    if retried == 1 + task.max_retries and status_after_retries == 'PROCESSING' \
+            and lesson.processing_status == 'FAILED' \
+            and tenant_cache().get(TRANSCODE_LOCK_KEY.format(lesson.pk)) is None:
+        print(f"  [PASS] {retried} attempts on OperationalError; FAILED on the time limit; lock released.")
+    else:
+        print(f"  [FAIL] attempts={retried} status={status_after_retries}/{lesson.processing_status}")
+
+cleanup()
+
+# 5. A time limit during an encode stops every ffmpeg process
+if shutil.which('ffmpeg') and shutil.which('ffprobe'):
+    print("Interrupting an encode...")
+    work = tempfile.mkdtemp()
+    source_path = os.path.join(work, 'source.mp4')
+    subprocess.run(['ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc=size=1280x720:rate=25',
+                    '-t', '120', '-pix_fmt', 'yuv420p', '-c:v', 'libx264', '-preset', 'ultrafast', source_path],
+                   check=True)
+
+    def soft_limit(signum, frame):
+        # What Celery does when soft_time_limit is reached.
+        raise SoftTimeLimitExceeded()
+
+    signal.signal(signal.SIGALRM, soft_limit)
+    signal.setitimer(signal.ITIMER_REAL, 1.0)
+    started = time.monotonic()
+    try:
+        transcode(source_path, os.path.join(work, 'hls'))
+        interrupted = False
+    except SoftTimeLimitExceeded:
+        interrupted = True
+    elapsed = time.monotonic() - started
+    leftover = subprocess.run(['pgrep', '-f', os.path.join(work, 'hls')], capture_output=True).stdout
+    if interrupted and elapsed < 5 and not leftover:
+        print(f"  [PASS] Interrupted after {elapsed:.1f}s with no ffmpeg left running.")
+    else:
+        print(f"  [FAIL] interrupted={interrupted} elapsed={elapsed:.1f}s leftover={leftover}")
+    shutil.rmtree(work)
@@ -0,0 +1,81 @@
+import io
+import os
+from contextlib import redirect_stdout
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+from apps.core.models import Client
+from apps.core.provisioning import applied_migrations, expected_migrations, provision_tenant
+
+PREFIX = 'migrate_test_'
+SCHEMAS = [f'{PREFIX}{i}' for i in range(4)]
+
+
+def cleanup():
+    for tenant in Client.objects.filter(schema_name__startswith=PREFIX):
+        tenant.delete(force_drop=True)
+
+
+def migrate(**options):
+    output = io.StringIO()
+    with redirect_stdout(output):
+        try:
+            call_command('migrate_schemas', interactive=False, **options)
+            error = None
+        except CommandError as exc:
+            error = str(exc)
+    connection.set_schema_to_public()
+    return output.getvalue(), error
+
+
+def current(schema_name):
+    return expected_migrations() <= applied_migrations(schema_name)
+
+
+cleanup()
+for schema_name in SCHEMAS:
+    provision_tenant(schema_name, schema_name, f'{schema_name}.localhost')
+    # Leave every tenant two migrations behind.
+    call_command('migrate_schemas', 'lms', '0003', schema_name=schema_name, verbosity=0)
+
+# Break the second tenant: its pending migration creates a table that already exists.
+with connection.cursor() as cursor:
+    cursor.execute(f'CREATE TABLE "{SCHEMAS[1]}".lms_documentlesson (id integer)')
+
+# 1. One process: the first failure stops the run before the later schemas
+print("Migrating with a broken schema...")
+output, error = migrate(parallel=1)
+states = [current(schema_name) for schema_name in SCHEMAS]
+if error and SCHEMAS[1] in error and states == [True, False, False, False] and '2 schema(s) not started' in error:
+    print("  [PASS] Stopped after the failing schema; later schemas untouched.")
+else:
+    print(f"  [FAIL] error={error!r} states={states}")
+
+# 2. Re-running resumes: up-to-date schemas are skipped
+with connection.cursor() as cursor:
+    cursor.execute(f'DROP TABLE "{SCHEMAS[1]}".lms_documentlesson')
+print("Resuming with two processes...")
+output, error = migrate(parallel=2)
+if error is None and all(current(schema_name) for schema_name in SCHEMAS) \
+        and 'already up to date, skipped' in output and f'{SCHEMAS[0]} migrated' not in output \
+        and all(f'{schema_name} migrated' in output for schema_name in SCHEMAS[1:]):
+    print("  [PASS] Only the pending schemas were migrated.")
+else:
+    print(f"  [FAIL] error={error!r}\n{output}")
+
+# 3. Nothing left to do
+output, error = migrate()
+if error is None and ' migrated in ' not in output:
+    print("  [PASS] A repeated run migrates nothing.")
+else:
+    print(f"  [FAIL] error={error!r}\n{output}")
+
+cleanup()
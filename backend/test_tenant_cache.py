@@ -0,0 +1,74 @@
+import os
+import time
+import django
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import connection
+from apps.core.cache import get_or_set, invalidate_group, local_caches, tenant_cache
+
+calls = []
+
+
+def producer(value, delay=0):
+    def build():
+        calls.append(value)
+        time.sleep(delay)
+        return value
+    return build
+
+
+with local_caches():
+    # 1. Keys are namespaced by schema
+    print("Caching the same key in two schemas...")
+    public_value = get_or_set('greeting', producer('public'), 60)
+    connection.set_schema('tenant_cache_test')
+    other_value = get_or_set('greeting', producer('other'), 60)
+    connection.set_schema_to_public()
+    if public_value == 'public' and other_value == 'other' and get_or_set('greeting', producer('x'), 60) == 'public':
+        print("  [PASS] Tenants do not share keys.")
+    else:
+        print(f"  [FAIL] Got {public_value!r} and {other_value!r}.")
+
+    # 2. Group invalidation only affects the current tenant
+    print("Invalidating a key group...")
+    get_or_set('tree', producer('v1'), 60, group='catalog')
+    connection.set_schema('tenant_cache_test')
+    get_or_set('tree', producer('other-v1'), 60, group='catalog')
+    connection.set_schema_to_public()
+    invalidate_group('catalog')
+    refreshed = get_or_set('tree', producer('v2'), 60, group='catalog')
+    connection.set_schema('tenant_cache_test')
+    untouched = get_or_set('tree', producer('other-v2'), 60, group='catalog')
+    connection.set_schema_to_public()
+    if refreshed == 'v2' and untouched == 'other-v1':
+        print("  [PASS] Group rebuilt for this tenant only.")
+    else:
+        print(f"  [FAIL] Got {refreshed!r} and {untouched!r}.")
+
+    # 3. A cold key is built once under concurrent misses
+    print("Requesting a cold key from 20 threads...")
+    calls.clear()
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(lambda _: get_or_set('slow', producer('built', delay=0.3), 60), range(20)))
+    if calls == ['built'] and set(results) == {'built'}:
+        print("  [PASS] Producer ran once, every caller got the value.")
+    else:
+        print(f"  [FAIL] Producer ran {len(calls)} times.")
+
+    # 4. Values close to expiry are refreshed early
+    print("Reading a key about to expire...")
+    tenant_cache().set('early', ('old', 5.0, time.time() + 1), 60)
+    calls.clear()
+    value = get_or_set('early', producer('new'), 60, beta=1000)
+    if value == 'new' and calls == ['new']:
+        print("  [PASS] Expensive value refreshed before expiry.")
+    else:
+        print(f"  [FAIL] Got {value!r}.")
+    tenant_cache().set('fresh', ('old', 0.01, time.time() + 600), 600)
+    if get_or_set('fresh', producer('new'), 60) == 'old':
+        print("  [PASS] Fresh value served from cache.")
+    else:
+        print("  [FAIL] Fresh value was rebuilt.")
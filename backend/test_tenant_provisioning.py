@@ -0,0 +1,121 @@
+import os
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django_tenants.utils import schema_context
+from rest_framework.test import APIClient
+
+from apps.core.cache import local_caches
+from apps.core.models import Client
+from apps.core.provisioning import (
+    applied_migrations, expected_migrations, provision_tenant, refresh_template, template_is_current,
+)
+from apps.lms.models import Category
+
+User = get_user_model()
+PREFIX = 'provision_test_'
+TEMPLATE = settings.TENANT_TEMPLATE_SCHEMA
+
+
+def tables(schema_name):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT tablename FROM pg_tables WHERE schemaname = %s ORDER BY 1', [schema_name])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def count(schema_name, table):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) FROM "{schema_name}"."{table}"')
+        return cursor.fetchone()[0]
+
+
+def cleanup():
+    for tenant in Client.objects.filter(schema_name__startswith=PREFIX):
+        tenant.delete(force_drop=True)
+    User.objects.filter(username__startswith=PREFIX).delete()
+
+
+cleanup()
+
+# 1. A current template is cloned, migrations and framework rows included
+print("Provisioning from a fresh template...")
+refresh_template()
+tenant = provision_tenant(f'{PREFIX}clone', 'Clone Academy', f'{PREFIX}clone.localhost')
+schema = tenant.schema_name
+if (tenant.provisioned_by == 'clone' and tables(schema) == tables(TEMPLATE)
+        and applied_migrations(schema) == applied_migrations(TEMPLATE)
+        and count(schema, 'auth_permission') == count(TEMPLATE, 'auth_permission') > 0):
+    print("  [PASS] Schema cloned with tables, migration history and permissions.")
+else:
+    print(f"  [FAIL] provisioned_by={tenant.provisioned_by} tables={len(tables(schema))}/{len(tables(TEMPLATE))}")
+
+# 2. Identity sequences are independent of the template
+with schema_context(schema):
+    first_id = Category.objects.create(name='Kategori', slug='kategori').pk
+if first_id == 1 and count(TEMPLATE, 'lms_category') == 0:
+    print("  [PASS] Cloned tables get their own sequences.")
+else:
+    print(f"  [FAIL] id={first_id}, template rows={count(TEMPLATE, 'lms_category')}")
+
+# 3. A stale template falls back to migrations and schedules a refresh
+print("Provisioning from a stale template...")
+# A migration added after the template was built.
+pending = expected_migrations() | {('lms', '9999_pending')}
+with mock.patch('apps.core.provisioning.expected_migrations', return_value=pending), \
+        mock.patch('apps.core.tasks.refresh_tenant_template_task.delay') as refresh_task:
+    stale = not template_is_current()
+    tenant = provision_tenant(f'{PREFIX}migrate', 'Migrate Academy', f'{PREFIX}migrate.localhost')
+if stale and tenant.provisioned_by == 'migrate' and refresh_task.called \
+        and applied_migrations(tenant.schema_name) == applied_migrations(TEMPLATE):
+    print("  [PASS] Tenant migrated, template refresh scheduled.")
+else:
+    print(f"  [FAIL] provisioned_by={tenant.provisioned_by} refresh scheduled={refresh_task.called}")
+
+# 4. A stale template is migrated in place, inside the refresh transaction
+print("Refreshing a stale template...")
+# Roll the template back, as if migrations had been added since it was built.
+call_command('migrate_schemas', 'lms', '0003', schema_name=TEMPLATE, verbosity=0)
+stale = not template_is_current()
+refresh_template()
+tenant = provision_tenant(f'{PREFIX}refreshed', 'Refreshed Academy', f'{PREFIX}refreshed.localhost')
+if stale and template_is_current() and tenant.provisioned_by == 'clone' \
+        and applied_migrations(tenant.schema_name) == applied_migrations(TEMPLATE):
+    print("  [PASS] Template migrated to the current state and cloned again.")
+else:
+    print(f"  [FAIL] stale={stale} current={template_is_current()} provisioned_by={tenant.provisioned_by}")
+
+# 5. API: platform admins only, reserved schema names rejected
+print("Provisioning through the API...")
+admin = User.objects.create_user(username=f'{PREFIX}admin', password='x', role='ADMIN')
+tenant_admin = User.objects.create_user(username=f'{PREFIX}tenant_admin', password='x', role='TENANT_ADMIN')
+api = APIClient(HTTP_HOST='localhost')
+url = '/api/v1/tenants/'
+payload = {'schema_name': f'{PREFIX}api', 'name': 'API Academy', 'domain': f'{PREFIX}api.localhost'}
+
+with local_caches():
+    api.force_authenticate(tenant_admin)
+    forbidden = api.post(url, payload, format='json')
+    api.force_authenticate(admin)
+    reserved = api.post(url, {**payload, 'schema_name': TEMPLATE}, format='json')
+    created = api.post(url, payload, format='json')
+
+if forbidden.status_code == 403 and reserved.status_code == 400 and 'schema_name' in reserved.data:
+    print("  [PASS] Tenant admins and reserved schema names are rejected.")
+else:
+    print(f"  [FAIL] tenant admin={forbidden.status_code} reserved={reserved.status_code}")
+if created.status_code == 201 and created.data['provisioned_by'] == 'clone' \
+        and Client.objects.get(schema_name=payload['schema_name']).domains.filter(is_primary=True).exists():
+    print("  [PASS] Tenant and primary domain created by cloning.")
+else:
+    print(f"  [FAIL] {created.status_code} {getattr(created, 'data', None)}")
+
+cleanup()
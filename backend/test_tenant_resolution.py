@@ -0,0 +1,115 @@
+import os
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from apps.core.middleware import CachedTenantMainMiddleware
+from apps.core.cache import local_caches
+from apps.core.models import Client, Domain
+from apps.core import tenant_resolution
+
+HOSTNAME = 'tenant-cache-test.localhost'
+RENAMED = 'tenant-cache-renamed.localhost'
+
+
+def real_queries(ctx):
+    # django-tenants prefixes cursors with SET search_path; only count real statements.
+    return [q['sql'] for q in ctx.captured_queries if not q['sql'].startswith('SET search_path')]
+
+
+def resolve(hostname):
+    try:
+        return tenant_resolution.resolve_tenant(Domain, hostname)
+    except Domain.DoesNotExist:
+        return None
+
+
+with local_caches():
+    tenant_resolution._local.clear()
+    public = Client.objects.get(schema_name='public')
+    Domain.objects.filter(domain__in=[HOSTNAME, RENAMED]).delete()
+
+    # 1. Only the first lookup of a hostname reaches the database
+    domain = Domain.objects.create(domain=HOSTNAME, tenant=public, is_primary=False)
+    print("Resolving hostname twice...")
+    with CaptureQueriesContext(connection) as ctx:
+        first = resolve(HOSTNAME)
+        second = resolve(HOSTNAME)
+    queries = real_queries(ctx)
+    if first and second and first.pk == public.pk and len(queries) == 1:
+        print("  [PASS] One query for two lookups.")
+    else:
+        print(f"  [FAIL] Unexpected lookups/queries: {queries}")
+
+    tenant_resolution._local.clear()
+    with CaptureQueriesContext(connection) as ctx:
+        third = resolve(HOSTNAME)
+    if third and not real_queries(ctx):
+        print("  [PASS] Local LRU miss served from the shared cache.")
+    else:
+        print("  [FAIL] Shared cache was not used.")
+
+    # 2. Renaming a domain invalidates the old hostname
+    print("Renaming the domain...")
+    domain.domain = RENAMED
+    domain.save()
+    if resolve(HOSTNAME) is None and resolve(RENAMED) is not None:
+        print("  [PASS] Old hostname no longer resolves, new one does.")
+    else:
+        print("  [FAIL] Stale hostname mapping after rename.")
+
+    # 3. Saving the Client refreshes the cached tenant
+    print("Renaming the tenant...")
+    original_name = public.name
+    public.name = f'{original_name} (cache test)'
+    public.save()
+    if resolve(RENAMED).name == public.name:
+        print("  [PASS] Cached tenant refreshed after Client save.")
+    else:
+        print("  [FAIL] Cached tenant is stale after Client save.")
+    public.name = original_name
+    public.save()
+
+    # A request before the commit still gets the cached tenant, so it cannot
+    # cache the uncommitted one; the commit invalidates it.
+    resolve(RENAMED)
+    with transaction.atomic():
+        public.name = f'{original_name} (uncommitted)'
+        public.save()
+        with CaptureQueriesContext(connection) as ctx:
+            before_commit = resolve(RENAMED).name
+    after_commit = resolve(RENAMED).name
+    if before_commit == original_name and not real_queries(ctx) and after_commit == public.name:
+        print("  [PASS] Cached tenant invalidated on commit.")
+    else:
+        print(f"  [FAIL] before commit={before_commit!r} after={after_commit!r}")
+    public.name = original_name
+    public.save()
+
+    # 4. Deleting the domain stops resolution, including the negative cache
+    print("Deleting the domain...")
+    domain.delete()
+    if resolve(RENAMED) is None:
+        print("  [PASS] Deleted hostname no longer resolves.")
+    else:
+        print("  [FAIL] Deleted hostname still resolves.")
+    Domain.objects.create(domain=RENAMED, tenant=public, is_primary=False)
+    if resolve(RENAMED) is not None:
+        print("  [PASS] Re-created hostname resolves despite the cached miss.")
+    else:
+        print("  [FAIL] Cached miss survived Domain creation.")
+
+    # 5. Middleware wiring
+    request = RequestFactory().get('/', HTTP_HOST=RENAMED)
+    CachedTenantMainMiddleware(lambda r: None).process_request(request)
+    if request.tenant.schema_name == 'public' and request.tenant.domain_url == RENAMED:
+        print("  [PASS] Middleware sets request.tenant from the cache.")
+    else:
+        print("  [FAIL] Middleware did not set the tenant.")
+
+    Domain.objects.filter(domain__in=[HOSTNAME, RENAMED]).delete()
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from apps.core.cache import local_caches
+from apps.core.redis_client import get_redis
+from apps.core.serializers import ClaimsTokenObtainPairSerializer
+from apps.lms.models import Course, Module, VideoLesson
+from apps.lms.progress import ProgressReporter, progress_key
+from apps.lms.tasks import transcode_video_task
+
+User = get_user_model()
+PREFIX = 'progress-test-'
+
+if not (shutil.which('ffmpeg') and shutil.which('ffprobe')):
+    print("  [SKIP] ffmpeg and ffprobe are required.")
+    sys.exit()
+
+
+class Subscriber(threading.Thread):
+    """Collects the states published for a lesson."""
+
+    def __init__(self, lesson_id):
+        super().__init__(daemon=True)
+        self.pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(progress_key(connection.schema_name, lesson_id))
+        self.states = []
+
+    def run(self):
+        while True:
+            message = self.pubsub.get_message(timeout=0.5)
+            if message:
+                self.states.append(json.loads(message['data']))
+                if self.states[-1]['status'] != 'PROCESSING':
+                    return
+
+
+def cleanup():
+    for lesson in VideoLesson.objects.filter(module__course__slug__startswith=PREFIX):
+        if lesson.source_file:
+            name = os.path.splitext(os.path.basename(lesson.source_file.name))[0]
+            shutil.rmtree(os.path.join(settings.MEDIA_ROOT, 'course_videos', 'hls', name), ignore_errors=True)
+            lesson.source_file.delete(save=False)
+        get_redis().delete(progress_key(connection.schema_name, lesson.pk))
+    Course.objects.filter(slug__startswith=PREFIX).delete()
+    User.objects.filter(username__startswith=PREFIX).delete()
+
+
+cleanup()
+instructor = User.objects.create(username=f'{PREFIX}instructor', role='INSTRUCTOR')
+stranger = User.objects.create(username=f'{PREFIX}stranger', role='INSTRUCTOR')
+course = Course.objects.create(title='Progress', slug=f'{PREFIX}course', instructor=instructor, description='-')
+module = Module.objects.create(course=course, title='Modül', order=1)
+work = tempfile.mkdtemp()
+source_path = os.path.join(work, 'source.mp4')
+subprocess.run(['ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc=size=854x480:rate=25',
+                '-t', '20', '-pix_fmt', 'yuv420p', source_path], check=True)
+
+with local_caches(), mock.patch('apps.lms.signals.transcode_video_task.delay'):
+    lesson = VideoLesson.objects.create(module=module, title='Video', order=1)
+    with open(source_path, 'rb') as f:
+        lesson.source_file.save(f'{PREFIX}lesson.mp4', ContentFile(f.read()))
+
+    # 1. Updates are dropped inside the interval; the final state always goes out
+    print("Throttling progress writes...")
+    subscriber = Subscriber(lesson.pk)
+    subscriber.start()
+    reporter = ProgressReporter(connection.schema_name, lesson.pk, interval=60)
+    for i in range(1000):
+        reporter.update(i / 1000)
+    reporter.finish('COMPLETED')
+    subscriber.join(5)
+    if [(s['status'], s['percent']) for s in subscriber.states] == [('PROCESSING', 0.0), ('COMPLETED', 100.0)]:
+        print("  [PASS] 1000 updates within the interval published twice.")
+    else:
+        print(f"  [FAIL] {subscriber.states}")
+
+    # 2. The task streams ffmpeg progress to Redis, and saves the lesson only on status changes
+    print("Transcoding with progress...")
+    saves = []
+    receiver = lambda sender, instance, **kwargs: saves.append(instance.processing_status)
+    post_save.connect(receiver, sender=VideoLesson, weak=False)
+    subscriber = Subscriber(lesson.pk)
+    subscriber.start()
+    with override_settings(TRANSCODE_PROGRESS_INTERVAL=0.2, VIDEO_TRANSCODE_PRESET='medium'):
+        transcode_video_task(connection.schema_name, lesson.pk)
+    subscriber.join(10)
+    post_save.disconnect(receiver, sender=VideoLesson)
+    running = [s for s in subscriber.states if s['status'] == 'PROCESSING']
+    percents = [s['percent'] for s in running]
+    if len(running) > 3 and percents == sorted(percents) and 0 < percents[-2] < 100 \
+            and any(s['eta_seconds'] for s in running[1:]) and subscriber.states[-1]['status'] == 'COMPLETED':
+        print(f"  [PASS] {len(running)} progress updates: {percents}")
+    else:
+        print(f"  [FAIL] {subscriber.states}")
+    if saves == ['PROCESSING', 'COMPLETED']:
+        print("  [PASS] The lesson was saved for status changes only.")
+    else:
+        print(f"  [FAIL] saves={saves}")
+
+    # 3. The endpoint: JSON to poll, SSE to follow, instructors only
+    print("Reading progress through the API...")
+    url = f'/api/v1/lessons/{lesson.pk}/progress/'
+    client = APIClient(HTTP_HOST='localhost')
+    client.force_authenticate(stranger)
+    hidden = client.get(url)
+    client.force_authenticate(instructor)
+    done = client.get(url)
+    VideoLesson.objects.filter(pk=lesson.pk).update(processing_status='PROCESSING')
+    ProgressReporter(connection.schema_name, lesson.pk).publish('PROCESSING', 25.0, 30)
+    polled = client.get(url)
+    if hidden.status_code == 404 and done.data['status'] == 'COMPLETED' and done.data['percent'] == 100 \
+            and (polled.data['percent'], polled.data['eta_seconds']) == (25.0, 30):
+        print("  [PASS] Polling returns the Redis state while processing, the status otherwise.")
+    else:
+        print(f"  [FAIL] {hidden.status_code} {done.data} {polled.data}")
+
+    # Under WSGI a stream request gets the JSON state to poll.
+    wsgi_stream = client.get(url, HTTP_ACCEPT='text/event-stream')
+    if wsgi_stream['Content-Type'] == 'application/json' and wsgi_stream.data['percent'] == 25.0:
+        print("  [PASS] WSGI answers a stream request with the state to poll.")
+    else:
+        print(f"  [FAIL] {wsgi_stream['Content-Type']}")
+
+    async def follow():
+        # ASGI: the stream is an async generator, read as it is produced.
+        token = ClaimsTokenObtainPairSerializer.get_token(instructor).access_token
+        # A scope of its own: AsyncClient.get() always sends Host: testserver.
+        response = await AsyncClient().request(method='GET', path=url, query_string='', headers=[
+            (b'host', b'localhost'), (b'accept', b'text/event-stream'), (b'authorization', f'Bearer {token}'.encode()),
+        ])
+        events = []
+        async for chunk in response.streaming_content:
+            if chunk.startswith(b'data: '):
+                events.append(json.loads(chunk.decode()[len('data: '):]))
+                if len(events) == 1:
+                    reporter = ProgressReporter(connection.schema_name, lesson.pk, interval=0)
+                    await sync_to_async(reporter.update)(0.5)
+                    await sync_to_async(reporter.finish)('COMPLETED')
+        return response, events
+
+    streamed, events = asyncio.run(follow())
+    if streamed['Content-Type'] == 'text/event-stream' \
+            and [e['status'] for e in events] == ['PROCESSING', 'PROCESSING', 'COMPLETED'] \
+            and events[0]['percent'] == 25.0 and events[1]['percent'] == 50.0:
+        print("  [PASS] ASGI streams the current state, then updates until the transcode ends.")
+    else:
+        print(f"  [FAIL] {streamed['Content-Type']} {events}")
+
+cleanup()
+shutil.rmtree(work)
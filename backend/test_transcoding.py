@@ -0,0 +1,128 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test.utils import override_settings
+
+from apps.core.cache import local_caches
+from apps.lms.models import Course, Module, VideoLesson
+from apps.lms.tasks import transcode_video_task
+from apps.lms.transcoding import MASTER_PLAYLIST, transcode
+
+User = get_user_model()
+PREFIX = 'transcode-test-'
+
+if not (shutil.which('ffmpeg') and shutil.which('ffprobe')):
+    print("  [SKIP] ffmpeg and ffprobe are required.")
+    sys.exit()
+
+
+def make_source(path, width, height, seconds=8, audio=True):
+    command = ['ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', f'testsrc=size={width}x{height}:rate=25']
+    if audio:
+        command += ['-f', 'lavfi', '-i', 'sine=frequency=440']
+    subprocess.run(command + ['-t', str(seconds), '-pix_fmt', 'yuv420p', path], check=True)
+
+
+def playlist(path):
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+def segment_durations(path):
+    return [line for line in playlist(path) if line.startswith('#EXTINF')]
+
+
+def cleanup():
+    for lesson in VideoLesson.objects.filter(module__course__slug__startswith=PREFIX):
+        if lesson.source_file:
+            lesson.source_file.delete(save=False)
+    Course.objects.filter(slug__startswith=PREFIX).delete()
+    User.objects.filter(username__startswith=PREFIX).delete()
+
+
+work = tempfile.mkdtemp()
+
+# 1. The ladder stops at the source height and shares one set of segment boundaries
+print("Transcoding a 640x360 source...")
+source_path = os.path.join(work, 'source.mp4')
+make_source(source_path, 640, 360)
+output_dir = os.path.join(work, 'hls')
+with override_settings(VIDEO_TRANSCODE_CPU_BUDGET=2):
+    source, renditions = transcode(source_path, output_dir)
+master = playlist(os.path.join(output_dir, MASTER_PLAYLIST))
+names = [r['name'] for r in renditions]
+if names == ['360p', '240p'] and 'RESOLUTION=640x360,CODECS="avc1.42e01e,mp4a.40.2"' in master[3] \
+        and master[4] == '360p/index.m3u8' and master[6] == '240p/index.m3u8':
+    print("  [PASS] 360p and 240p renditions listed in the master playlist, nothing upscaled.")
+else:
+    print(f"  [FAIL] renditions={names} master={master}")
+durations = [segment_durations(os.path.join(output_dir, name, 'index.m3u8')) for name in names]
+if len(durations[0]) > 1 and durations[0] == durations[1]:
+    print(f"  [PASS] Renditions share {len(durations[0])} aligned segments.")
+else:
+    print(f"  [FAIL] segments={durations}")
+if all(r['encode_seconds'] > 0 and r['speed'] for r in renditions):
+    print("  [PASS] Encode timings recorded: " + ', '.join(f"{r['name']} {r['encode_seconds']}s" for r in renditions))
+else:
+    print(f"  [FAIL] {renditions}")
+
+# 2. Sources below the smallest rung keep their own height; silent ones get no audio
+print("Transcoding a small silent source...")
+make_source(source_path, 320, 180, seconds=2, audio=False)
+source, renditions = transcode(source_path, output_dir)
+master = playlist(os.path.join(output_dir, MASTER_PLAYLIST))
+if [(r['width'], r['height']) for r in renditions] == [(320, 180)] and 'CODECS="avc1.42e01e"' in master[3] \
+        and not os.path.exists(os.path.join(output_dir, '360p')):
+    print("  [PASS] One 180p video-only rendition; earlier output replaced.")
+else:
+    print(f"  [FAIL] {renditions} {master}")
+
+# 3. The task points video_url at the master playlist and stores the timings
+print("Running transcode_video_task...")
+cleanup()
+instructor = User.objects.create(username=f'{PREFIX}instructor', role='INSTRUCTOR')
+course = Course.objects.create(title='Transcode', slug=f'{PREFIX}course', instructor=instructor, description='-')
+module = Module.objects.create(course=course, title='Modül', order=1)
+make_source(source_path, 854, 480, seconds=3)
+with local_caches(), mock.patch('apps.lms.signals.transcode_video_task.delay'):
+    lesson = VideoLesson.objects.create(module=module, title='Video', order=1)
+    with open(source_path, 'rb') as f:
+        lesson.source_file.save(f'{PREFIX}lesson.mp4', ContentFile(f.read()))
+    transcode_video_task(connection.schema_name, lesson.pk)
+    lesson.refresh_from_db()
+    hls_dir = os.path.join(settings.MEDIA_ROOT, 'course_videos', 'hls', os.path.splitext(
+        os.path.basename(lesson.source_file.name))[0])
+    if lesson.processing_status == 'COMPLETED' and lesson.video_url.endswith(f'/{MASTER_PLAYLIST}') \
+            and [r['name'] for r in lesson.renditions] == ['480p', '360p', '240p'] \
+            and lesson.duration.total_seconds() == 3:
+        print("  [PASS] video_url is the master playlist; renditions and duration stored.")
+    else:
+        print(f"  [FAIL] status={lesson.processing_status} url={lesson.video_url} renditions={lesson.renditions}")
+
+    with open(lesson.source_file.path, 'wb') as f:
+        f.write(b'not a video')
+    VideoLesson.objects.filter(pk=lesson.pk).update(processing_status='PENDING')  # as a new upload does
+    transcode_video_task(connection.schema_name, lesson.pk)
+    lesson.refresh_from_db()
+    if lesson.processing_status == 'FAILED':
+        print("  [PASS] An unreadable source fails the lesson.")
+    else:
+        print(f"  [FAIL] status={lesson.processing_status}")
+    shutil.rmtree(hls_dir, ignore_errors=True)
+
+cleanup()
+shutil.rmtree(work)
@@ -0,0 +1,85 @@
+import os
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from apps.core.cache import local_caches
+from apps.core import authentication
+from apps.core.authentication import CachedJWTAuthentication, ClaimsJWTAuthentication, ClaimsTokenUser
+from apps.core.serializers import ClaimsTokenObtainPairSerializer
+from apps.lms.views import CourseViewSet
+
+User = get_user_model()
+factory = APIRequestFactory()
+
+
+def real_queries(ctx):
+    # django-tenants prefixes cursors with SET search_path; only count real statements.
+    return [q['sql'] for q in ctx.captured_queries if not q['sql'].startswith('SET search_path')]
+
+
+def authenticate(auth_class, token, method='get'):
+    request = getattr(factory, method)('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+    return auth_class().authenticate(request)[0]
+
+
+with local_caches():
+    authentication._local.clear()
+    username = 'user_cache_test'
+    User.objects.filter(username=username).delete()
+    user = User.objects.create_user(username=username, password='testpassword', role='STUDENT')
+    token = str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+
+    # 1. Only the first request loads the user from the database
+    print("Authenticating twice...")
+    with CaptureQueriesContext(connection) as ctx:
+        first = authenticate(CachedJWTAuthentication, token)
+        second = authenticate(CachedJWTAuthentication, token)
+    if first.pk == second.pk == user.pk and len(real_queries(ctx)) == 1:
+        print("  [PASS] One query for two authenticated requests.")
+    else:
+        print(f"  [FAIL] Unexpected queries: {real_queries(ctx)}")
+
+    # 2. A save is visible on the very next request
+    print("Changing the role...")
+    user.role = 'INSTRUCTOR'
+    user.save()
+    if authenticate(CachedJWTAuthentication, token).role == 'INSTRUCTOR':
+        print("  [PASS] Cached user invalidated by the save.")
+    else:
+        print("  [FAIL] Stale role after save.")
+
+    # 3. Stateless mode: safe requests trust the claims, writes load the user
+    print("Authenticating with claims...")
+    with CaptureQueriesContext(connection) as ctx:
+        claims_user = authenticate(ClaimsJWTAuthentication, token)
+    if isinstance(claims_user, ClaimsTokenUser) and claims_user.role == 'STUDENT' and not real_queries(ctx):
+        print("  [PASS] GET authenticated from token claims without queries.")
+    else:
+        print("  [FAIL] GET did not use the token claims.")
+    if authenticate(ClaimsJWTAuthentication, token, method='post').role == 'INSTRUCTOR':
+        print("  [PASS] POST authenticated against the current user.")
+    else:
+        print("  [FAIL] POST trusted stale claims.")
+
+    # 4. Read-only LMS endpoints work with the stateless user
+    instructor_token = str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+    request = factory.get('/api/v1/courses/', HTTP_AUTHORIZATION=f'Bearer {instructor_token}')
+    response = CourseViewSet.as_view({'get': 'list'})(request)
+    if response.status_code == 200:
+        print("  [PASS] Course list served to a claims-only user.")
+    else:
+        print(f"  [FAIL] Course list returned {response.status_code}.")
+
+    user.delete()
+    try:
+        authenticate(CachedJWTAuthentication, token)
+        print("  [FAIL] Deleted user still authenticated.")
+    except Exception:
+        print("  [PASS] Deleted user rejected.")
@@ -0,0 +1,113 @@
+import os
+import csv
+import io
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.core.cache import local_caches
+from apps.core.models import AuditLog, Client, ImportStatus, UserImport
+from apps.core.user_import import run_import
+
+User = get_user_model()
+PREFIX = 'import_test_'
+VALID = 25
+
+buffer = io.StringIO()
+writer = csv.writer(buffer)
+writer.writerow(['Username', 'Password', 'Email', 'First_Name', 'Last_Name', 'Role'])
+for i in range(VALID):
+    writer.writerow([f'{PREFIX}{i}', f'Kx!{i}wPq83mZ', f'{PREFIX}{i}@example.com', 'Ad', 'Soyad', 'student'])
+writer.writerow([f'{PREFIX}0', 'Kx!0wPq83mZ', '', '', '', ''])   # duplicate username
+writer.writerow(['bad user!', '123', 'not-an-email', '', '', 'ADMIN'])
+
+started = timezone.now()
+tenant = Client.objects.get(schema_name='public')
+User.objects.filter(username__startswith=PREFIX).delete()
+user_import = UserImport(tenant=tenant)
+user_import.file.save('import_test.csv', ContentFile(buffer.getvalue().encode()), save=False)
+user_import.save()
+
+
+class Interrupted(Exception):
+    pass
+
+
+def stop_after_first_chunk(job):
+    raise Interrupted()
+
+
+# Fast hasher keeps the test quick; the pool path is the same.
+with local_caches(), override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+    # 1. An interrupted import keeps its first committed chunk
+    print("Importing until interrupted after the first chunk...")
+    try:
+        run_import(user_import, chunk_size=10, workers=2, progress=stop_after_first_chunk)
+    except Interrupted:
+        pass
+    user_import.refresh_from_db()
+    created = User.objects.filter(username__startswith=PREFIX).count()
+    if user_import.status == ImportStatus.FAILED and user_import.processed_rows == 10 and created == 10:
+        print("  [PASS] First chunk committed, import marked failed.")
+    else:
+        print(f"  [FAIL] status={user_import.status} processed={user_import.processed_rows} created={created}")
+
+    # 2. Resuming continues after the committed chunk
+    print("Resuming...")
+    run_import(user_import, chunk_size=10, workers=2)
+    user_import.refresh_from_db()
+    created = User.objects.filter(username__startswith=PREFIX).count()
+    if (user_import.status == ImportStatus.COMPLETED and created == VALID
+            and user_import.created_count == VALID and user_import.error_count == 2
+            and user_import.total_rows == VALID + 2):
+        print(f"  [PASS] {VALID} users created, 2 rows rejected.")
+    else:
+        print(f"  [FAIL] status={user_import.status} created={created} errors={user_import.errors}")
+
+    sample = User.objects.get(username=f'{PREFIX}3')
+    if sample.check_password('Kx!3wPq83mZ') and sample.tenant_id == tenant.pk and sample.role == 'STUDENT':
+        print("  [PASS] Imported user can log in and belongs to the tenant.")
+    else:
+        print("  [FAIL] Imported user is incomplete.")
+
+    audits = AuditLog.objects.filter(
+        action='USER_BULK_IMPORT', details__import_id=user_import.pk, timestamp__gte=started
+    ).count()
+    per_row = AuditLog.objects.filter(action='USER_CREATE', details__username__startswith=PREFIX).count()
+    if audits == 3 and per_row == 0:
+        print("  [PASS] One audit entry per chunk, none per user.")
+    else:
+        print(f"  [FAIL] {audits} chunk audits, {per_row} per-user audits.")
+
+    # 3. The API resumes failed imports only, once
+    print("Resuming through the API...")
+    # Not PREFIX: its own USER_CREATE audit would count as a per-row one on the next run.
+    admin = User.objects.create_user(username='import_api_admin', password='x', role='ADMIN')
+    api = APIClient(HTTP_HOST='localhost')
+    api.force_authenticate(admin)
+    url = f'/api/v1/user-imports/{user_import.pk}/resume/'
+    codes = {}
+    with mock.patch('apps.core.views.import_users_task.delay') as delay:
+        codes['completed'] = api.post(url).status_code
+        UserImport.objects.filter(pk=user_import.pk).update(status=ImportStatus.RUNNING)
+        codes['running'] = api.post(url).status_code
+        UserImport.objects.filter(pk=user_import.pk).update(status=ImportStatus.FAILED)
+        codes['failed'] = api.post(url).status_code
+        codes['again'] = api.post(url).status_code
+    if codes == {'completed': 409, 'running': 409, 'failed': 202, 'again': 409} and delay.call_count == 1:
+        print("  [PASS] Only a failed import is resumed, and only one task is queued.")
+    else:
+        print(f"  [FAIL] {codes} tasks={delay.call_count}")
+
+    User.objects.filter(username__startswith=PREFIX).delete()
+    admin.delete()
+    user_import.delete()
@@ -0,0 +1,197 @@
+import base64
+import fcntl
+import hashlib
+import os
+from datetime import timedelta
+import tracemalloc
+from unittest import mock
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('AUDIT_LOG_MODE', 'sync')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.cache import local_caches, tenant_cache
+from apps.lms.models import Course, Module, VideoLesson, VideoUpload
+from apps.lms.tasks import TRANSCODE_LOCK_KEY, delete_replaced_source_task, discard_expired_uploads_task
+from apps.lms.uploads import append_chunk
+
+User = get_user_model()
+PREFIX = 'upload-test-'
+URL = '/api/v1/video-uploads/'
+CHUNK = 100 * 1024
+DATA = os.urandom(3 * CHUNK - 17)
+
+
+def cleanup():
+    for lesson in VideoLesson.objects.filter(module__course__slug__startswith=PREFIX):
+        if lesson.source_file:
+            default_storage.delete(lesson.source_file.name)
+    for upload in VideoUpload.objects.filter(created_by__username__startswith=PREFIX):
+        upload.partial_path.unlink(missing_ok=True)
+    Course.objects.filter(slug__startswith=PREFIX).delete()
+    User.objects.filter(username__startswith=PREFIX).delete()
+
+
+def patch(client, upload_id, offset, data, checksum=None):
+    headers = {'HTTP_UPLOAD_OFFSET': str(offset), 'HTTP_TUS_RESUMABLE': '1.0.0'}
+    if checksum is not None:
+        headers['HTTP_UPLOAD_CHECKSUM'] = checksum
+    return client.generic('PATCH', f'{URL}{upload_id}/', data, 'application/offset+octet-stream', **headers)
+
+
+def sha1(data):
+    return 'sha1 ' + base64.b64encode(hashlib.sha1(data).digest()).decode()
+
+
+class LazyStream:
+    """``size`` bytes produced on demand, like a socket."""
+
+    def __init__(self, size):
+        self.remaining = size
+
+    def read(self, n):
+        n = min(n, self.remaining)
+        self.remaining -= n
+        return b'x' * n
+
+
+cleanup()
+instructor = User.objects.create(username=f'{PREFIX}instructor', role='INSTRUCTOR')
+stranger = User.objects.create(username=f'{PREFIX}stranger', role='INSTRUCTOR')
+course = Course.objects.create(title='Video', slug=f'{PREFIX}course', instructor=instructor, description='-')
+module = Module.objects.create(course=course, title='Hafta 1')
+lesson = VideoLesson.objects.create(module=module, title='Video', processing_status='COMPLETED')
+
+client = APIClient(HTTP_HOST='localhost')
+with local_caches(), mock.patch('apps.lms.signals.transcode_video_task.delay') as transcode:
+    # 1. Creating an upload
+    print("Creating an upload...")
+    client.force_authenticate(stranger)
+    denied = client.post(URL, {'lesson': lesson.pk, 'filename': 'ders.mp4', 'length': len(DATA)}, format='json')
+    client.force_authenticate(instructor)
+    bad_type = client.post(URL, {'lesson': lesson.pk, 'filename': 'ders.exe', 'length': len(DATA)}, format='json')
+    created = client.post(URL, {'lesson': lesson.pk, 'filename': 'ders 1.mp4', 'length': len(DATA)}, format='json')
+    upload_id = created.data['id']
+    if denied.status_code == 400 and bad_type.status_code == 400 and created.status_code == 201 \
+            and created['Location'].endswith(f'{URL}{upload_id}/') and created['Upload-Offset'] == '0':
+        print("  [PASS] Only the course instructor can start an upload of a video file.")
+    else:
+        print(f"  [FAIL] denied={denied.status_code} bad_type={bad_type.status_code} created={created.status_code}")
+
+    # 2. Chunks, offsets and checksums
+    print("Sending chunks...")
+    first = patch(client, upload_id, 0, DATA[:CHUNK], sha1(DATA[:CHUNK]))
+    head = client.head(f'{URL}{upload_id}/')
+    wrong_offset = patch(client, upload_id, 0, DATA[:CHUNK])
+    corrupt = patch(client, upload_id, CHUNK, DATA[CHUNK:2 * CHUNK], sha1(b'something else'))
+    partial = VideoUpload.objects.get(pk=upload_id).partial_path
+    if first.status_code == 204 and first['Upload-Offset'] == str(CHUNK) and head['Upload-Offset'] == str(CHUNK) \
+            and wrong_offset.status_code == 409 and corrupt.status_code == 460 \
+            and partial.stat().st_size == CHUNK:
+        print("  [PASS] Offsets advance, stale offsets get 409, corrupt chunks 460 and are dropped.")
+    else:
+        print(f"  [FAIL] first={first.status_code} head={head.get('Upload-Offset')} "
+              f"wrong={wrong_offset.status_code} corrupt={corrupt.status_code} size={partial.stat().st_size}")
+
+    # 3. Leftovers of an interrupted chunk are cut off on resume
+    with open(partial, 'ab') as f:
+        f.write(b'half a chunk')
+    second = patch(client, upload_id, CHUNK, DATA[CHUNK:2 * CHUNK], sha1(DATA[CHUNK:2 * CHUNK]))
+    transcode.assert_not_called()
+    last = patch(client, upload_id, 2 * CHUNK, DATA[2 * CHUNK:])
+    lesson.refresh_from_db()
+    upload = VideoUpload.objects.get(pk=upload_id)
+    with default_storage.open(lesson.source_file.name) as f:
+        stored = f.read()
+    if second.status_code == 204 and last.status_code == 204 and stored == DATA and not partial.exists() \
+            and upload.completed_at and lesson.processing_status == 'PENDING' \
+            and lesson.source_file.name.startswith('course_videos/raw/') and transcode.call_count == 1:
+        print("  [PASS] The last chunk moves the file to the lesson and queues transcoding.")
+    else:
+        print(f"  [FAIL] second={second.status_code} last={last.status_code} same={stored == DATA} "
+              f"status={lesson.processing_status} transcode={transcode.call_count}")
+    finished = patch(client, upload_id, len(DATA), b'more')
+
+    # 4. Uploads are private and can be aborted
+    client.force_authenticate(stranger)
+    hidden = client.head(f'{URL}{upload_id}/')
+    client.force_authenticate(instructor)
+    aborted = client.post(URL, {'lesson': lesson.pk, 'filename': 'iptal.mp4', 'length': 10}, format='json').data['id']
+    patch(client, aborted, 0, b'12345')
+    aborted_path = VideoUpload.objects.get(pk=aborted).partial_path
+    deleted = client.delete(f'{URL}{aborted}/')
+    if finished.status_code == 409 and hidden.status_code == 404 and deleted.status_code == 204 \
+            and not aborted_path.exists():
+        print("  [PASS] Finished uploads take no more data; others' uploads are 404; DELETE discards.")
+    else:
+        print(f"  [FAIL] finished={finished.status_code} hidden={hidden.status_code} deleted={deleted.status_code}")
+
+    # 5. Abandoned uploads expire and are discarded with their partial files
+    print("Expiring abandoned uploads...")
+    created = client.post(URL, {'lesson': lesson.pk, 'filename': 'terk.mp4', 'length': 10}, format='json')
+    abandoned = VideoUpload.objects.get(pk=created.data['id'])
+    patch(client, abandoned.pk, 0, b'12345')
+    extended = VideoUpload.objects.get(pk=abandoned.pk).expires_at > abandoned.expires_at
+    busy = VideoUpload.objects.create(lesson=lesson, created_by=instructor, filename='yaziliyor.mp4', length=10)
+    busy.partial_path.write_bytes(b'123')
+    past = timezone.now() - timedelta(seconds=1)
+    VideoUpload.objects.filter(pk__in=[abandoned.pk, busy.pk, upload_id]).update(expires_at=past)
+    gone = client.head(f'{URL}{abandoned.pk}/')
+    with open(busy.partial_path, 'ab') as writing:
+        # A chunk that started before the expiry is still being written.
+        fcntl.flock(writing, fcntl.LOCK_EX)
+        discard_expired_uploads_task()
+    remaining = VideoUpload.objects.filter(pk__in=[abandoned.pk, busy.pk, upload_id]).values_list('pk', flat=True)
+    kept = {str(pk) for pk in remaining}
+    if 'Upload-Expires' in created and extended and gone.status_code == 404 \
+            and kept == {str(busy.pk), str(upload_id)} and not abandoned.partial_path.exists():
+        print("  [PASS] Upload-Expires moves with each chunk; expired uploads are 404 and discarded.")
+    else:
+        print(f"  [FAIL] header={created.get('Upload-Expires')} extended={extended} "
+              f"head={gone.status_code} kept={kept}")
+
+    # 6. The replaced source stays until no transcode of the lesson holds its lock
+    print("Replacing the source...")
+    previous = lesson.source_file.name
+    replacement = client.post(URL, {'lesson': lesson.pk, 'filename': 'yeni.mp4', 'length': 5}, format='json')
+    with mock.patch.object(delete_replaced_source_task, 'delay') as delete_later:
+        patch(client, replacement.data['id'], 0, b'12345')
+    lesson.refresh_from_db()
+    kept_on_upload = default_storage.exists(previous)
+    lock_key = TRANSCODE_LOCK_KEY.format(lesson.pk)
+    tenant_cache().add(lock_key, 1)  # an encode of the previous file is running
+    with mock.patch.object(delete_replaced_source_task, 'apply_async') as requeue:
+        delete_replaced_source_task.apply(args=delete_later.call_args.args)
+    kept_while_locked = default_storage.exists(previous)
+    tenant_cache().delete(lock_key)
+    delete_replaced_source_task.apply(args=delete_later.call_args.args)
+    if lesson.source_file.name != previous and delete_later.call_args.args[2] == previous \
+            and kept_on_upload and kept_while_locked and requeue.called \
+            and not default_storage.exists(previous) and default_storage.exists(lesson.source_file.name):
+        print("  [PASS] The previous source is deleted only once the lesson lock is free.")
+    else:
+        print(f"  [FAIL] kept={kept_on_upload}/{kept_while_locked} requeued={requeue.called} "
+              f"deleted={not default_storage.exists(previous)}")
+
+# 7. Memory stays flat however large the chunk is
+print("Streaming a 64MB chunk...")
+big = VideoUpload.objects.create(lesson=lesson, created_by=instructor, filename='buyuk.mp4', length=64 * 1024 ** 2 + 1)
+tracemalloc.start()
+append_chunk(big, LazyStream(64 * 1024 ** 2), 0, 64 * 1024 ** 2)
+_, peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+size = big.partial_path.stat().st_size
+big.partial_path.unlink()
+if size == 64 * 1024 ** 2 and peak < 1024 ** 2:
+    print(f"  [PASS] Peak traced memory {peak / 1024:.0f} KiB for 64MB.")
+else:
+    print(f"  [FAIL] size={size} peak={peak / 1024:.0f} KiB")
+
+cleanup()
@@ -5,7 +5,7 @@ import {
     Image as ImageIcon, Upload, Edit2, FileText
 } from 'lucide-react';
 import { lmsService } from '../../../services/lmsService';
-import { Category, Course, Module } from '../../../types/lms';
+import { Category, Course, Module, TranscodeProgress } from '../../../types/lms';
 import clsx from 'clsx';
 
 interface CourseWizardProps {
@@ -19,6 +19,23 @@ interface CourseWizardProps {
     onDeleteContent?: (lessonId: number) => void;
 }
 
+// Live processing state of an uploaded video until its transcode ends.
+const TranscodeStatus: React.FC<{ lessonId: number; status: TranscodeProgress['status'] }> = ({ lessonId, status }) => {
+    const [progress, setProgress] = useState<TranscodeProgress | null>(null);
+
+    React.useEffect(() => {
+        if (status === 'COMPLETED' || status === 'FAILED') return;
+        return lmsService.watchTranscodeProgress(lessonId, setProgress);
+    }, [lessonId, status]);
+
+    const current = progress?.status || status;
+    if (current === 'COMPLETED') return null;
+    if (current === 'FAILED') return <span className="text-red-500"> · İşleme başarısız</span>;
+    if (current === 'PENDING') return <span className="text-amber-600"> · Sırada</span>;
+    const eta = progress?.eta_seconds ? ` · ~${Math.max(1, Math.round(progress.eta_seconds / 60))} dk kaldı` : '';
+    return <span className="text-indigo-600"> · İşleniyor %{Math.round(progress?.percent || 0)}{eta}</span>;
+};
+
 const STEPS = [
     { id: 1, title: 'Temel Bilgiler', icon: BookOpen },
     { id: 2, title: 'İçerik Yönetimi', icon: Video },
@@ -544,6 +561,9 @@ export const CourseWizard: React.FC<CourseWizardProps> = ({
                                                                         <p className="font-medium text-slate-800 truncate">{lesson.title}</p>
                                                                         <p className="text-xs text-slate-500">
                                                                             {lesson.resourcetype === 'VideoLesson' && 'Video Ders'}
+                                                                            {lesson.resourcetype === 'VideoLesson' && lesson.processing_status && (
+                                                                                <TranscodeStatus lessonId={lesson.id} status={lesson.processing_status} />
+                                                                            )}
                                                                             {lesson.resourcetype === 'DocumentLesson' && 'Doküman'}
                                                                             {lesson.resourcetype === 'LiveLesson' && 'Canlı Ders'}
                                                                             {lesson.resourcetype === 'QuizLesson' && 'Quiz'}
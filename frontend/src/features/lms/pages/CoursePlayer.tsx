@@ -26,7 +26,7 @@ const CoursePlayer: React.FC<CoursePlayerProps> = ({ courseId, onBack }) => {
     if (!courseId) return;
     const fetchCourse = async () => {
       try {
-        const data = await lmsService.getCourse(Number(courseId));
+        const data = await lmsService.getCourseOutline(Number(courseId));
         setCourse(data);
         // Set first lesson as active if available
         if (data.modules && data.modules.length > 0 && data.modules[0].lessons && data.modules[0].lessons.length > 0) {
@@ -251,7 +251,7 @@ const VideosList = ({ onCourseClick }: { onCourseClick: (id: string) => void })
                 </div>
               </div>
                               <div className="absolute bottom-3 right-3 bg-black/70 text-white text-[10px] font-bold px-2 py-1 rounded flex items-center gap-1">
-                                <Video className="w-3 h-3" /> {course.modules?.length || 0} Hafta
+                                <Video className="w-3 h-3" /> {course.total_modules || 0} Hafta
                               </div>
             </div>
             <div className="p-5 flex flex-col flex-1">
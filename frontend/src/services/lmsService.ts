@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { Course, Category, CourseCreateData, Module, Lesson } from '../types/lms';
+import { Course, Category, CourseCreateData, Module, Lesson, TranscodeProgress } from '../types/lms';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8001';
 
@@ -8,6 +8,78 @@ const api = axios.create({
     baseURL: `${API_URL}/api/v1`,
 });
 
+// The prebuilt course outline carries site-relative file URLs.
+const FILE_KEYS = ['image', 'source_file', 'source_file_url', 'file', 'file_url'];
+
+const withAbsoluteFileUrls = (value: any): any => {
+    if (Array.isArray(value)) return value.map(withAbsoluteFileUrls);
+    if (!value || typeof value !== 'object') return value;
+    return Object.fromEntries(Object.entries(value).map(([key, item]) => [
+        key,
+        FILE_KEYS.includes(key) && typeof item === 'string' && item.startsWith('/')
+            ? `${API_URL}${item}`
+            : withAbsoluteFileUrls(item),
+    ]));
+};
+
+// Course lists are keyset-paginated ({ next, first, results }): follow the
+// cursor in `next` until the last page. The cursor is re-sent through
+// `api`, since `next` is built from the host the backend saw.
+const getAllPages = async <T>(url: string, params: Record<string, any> = {}): Promise<T[]> => {
+    const items: T[] = [];
+    let cursor: string | null = null;
+    do {
+        const page: { next: string | null; results: T[] } = (
+            await api.get(url, { params: cursor ? { ...params, cursor } : params })
+        ).data;
+        items.push(...page.results);
+        cursor = page.next ? new URL(page.next).searchParams.get('cursor') : null;
+    } while (cursor);
+    return items;
+};
+
+// Documents go straight to object storage when the backend offers a
+// presigned upload (503 otherwise); the lesson then only gets its token.
+const appendDocument = async (
+    formData: FormData,
+    file: File,
+    onProgress?: (progress: number) => void
+): Promise<void> => {
+    let presigned;
+    try {
+        ({ data: presigned } = await api.post('/direct-uploads/', {
+            purpose: 'document',
+            filename: file.name,
+            size: file.size,
+        }));
+    } catch (error: any) {
+        if (error.response?.status !== 503) throw error;
+        formData.append('file', file);
+        return;
+    }
+    const body = new FormData();
+    Object.entries(presigned.fields).forEach(([key, value]) => body.append(key, value as string));
+    body.append('file', file);
+    // Plain axios: the bucket must not receive the API's Authorization header.
+    await axios.post(presigned.url, body, {
+        onUploadProgress: (progressEvent) => {
+            if (onProgress && progressEvent.total) {
+                onProgress(Math.round((progressEvent.loaded * 100) / progressEvent.total));
+            }
+        },
+    });
+    formData.append('upload', presigned.upload);
+};
+
+// Resumable video uploads: chunk size and retries per chunk.
+const UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024;
+const UPLOAD_MAX_RETRIES = 5;
+
+const sha1Base64 = async (data: ArrayBuffer): Promise<string> => {
+    const digest = new Uint8Array(await crypto.subtle.digest('SHA-1', data));
+    return btoa(String.fromCharCode(...digest));
+};
+
 api.interceptors.request.use((config) => {
     const token = localStorage.getItem('token');
     if (token) {
@@ -29,9 +101,10 @@ export const lmsService = {
         return response.data;
     },
 
+    // Every page of the course list, without the modules unless asked for
+    // with expand=modules.
     getCourses: async (params?: any): Promise<Course[]> => {
-        const response = await api.get('/courses/', { params });
-        return response.data;
+        return getAllPages<Course>('/courses/', { page_size: 100, ...params });
     },
 
     getCourse: async (id: string | number): Promise<Course> => {
@@ -39,6 +112,13 @@ export const lmsService = {
         return response.data;
     },
 
+    // Same document as getCourse, prebuilt on the server; the browser
+    // revalidates it with its ETag and usually gets a 304.
+    getCourseOutline: async (id: string | number): Promise<Course> => {
+        const response = await api.get(`/courses/${id}/outline/`);
+        return withAbsoluteFileUrls(response.data);
+    },
+
     createCourse: async (data: CourseCreateData): Promise<Course> => {
         const formData = new FormData();
         formData.append('title', data.title);
@@ -103,8 +183,7 @@ export const lmsService = {
     // But for now let's define the service and I'll fix backend if needed.
 
     getMyCourses: async (): Promise<Course[]> => {
-        const response = await api.get('/courses/my_courses/');
-        return response.data;
+        return getAllPages<Course>('/courses/my_courses/', { expand: 'modules', page_size: 100 });
     },
 
     createLesson: async (
@@ -118,15 +197,14 @@ export const lmsService = {
         formData.append('title', data.title!);
         formData.append('order', (data.order || 1).toString());
 
-        // VideoLesson
+        // VideoLesson: the source file follows through uploadVideo below
         if (data.resourcetype === 'VideoLesson') {
-            if (data.source_file) formData.append('source_file', data.source_file);
             if (data.video_url) formData.append('video_url', data.video_url);
         }
 
         // DocumentLesson (PDF, DOCX, XLSX)
-        if (data.resourcetype === 'DocumentLesson' && data.file) {
-            formData.append('file', data.file);
+        if (data.resourcetype === 'DocumentLesson' && data.file instanceof File) {
+            await appendDocument(formData, data.file, onProgress);
         }
 
         // LiveLesson
@@ -167,9 +245,102 @@ export const lmsService = {
                 }
             },
         });
+        if (data.resourcetype === 'VideoLesson' && data.source_file instanceof File) {
+            await lmsService.uploadVideo(response.data.id, data.source_file, onProgress);
+            return { ...response.data, processing_status: 'PENDING' };
+        }
         return response.data;
     },
 
+    // Resumable (tus-style) source upload: 5MB checksummed chunks; after a
+    // failure the upload resumes from the offset the server reports.
+    uploadVideo: async (
+        lessonId: number,
+        file: File,
+        onProgress?: (progress: number) => void
+    ): Promise<void> => {
+        const { data: upload } = await api.post('/video-uploads/', {
+            lesson: lessonId,
+            filename: file.name,
+            length: file.size,
+        });
+        const url = `/video-uploads/${upload.id}/`;
+        let offset = upload.offset;
+        let retries = 0;
+        while (offset < file.size) {
+            const chunk = await file.slice(offset, offset + UPLOAD_CHUNK_SIZE).arrayBuffer();
+            try {
+                const response = await api.patch(url, chunk, {
+                    headers: {
+                        'Content-Type': 'application/offset+octet-stream',
+                        'Tus-Resumable': '1.0.0',
+                        'Upload-Offset': String(offset),
+                        'Upload-Checksum': `sha1 ${await sha1Base64(chunk)}`,
+                    },
+                });
+                offset = Number(response.headers['upload-offset']);
+                retries = 0;
+            } catch (error) {
+                if (++retries > UPLOAD_MAX_RETRIES) throw error;
+                await new Promise((resolve) => setTimeout(resolve, 1000 * retries));
+                const head = await api.head(url);
+                offset = Number(head.headers['upload-offset']);
+            }
+            onProgress?.(Math.round((offset * 100) / file.size));
+        }
+    },
+
+    // Follows a video lesson's transcoding progress over server-sent events
+    // (fetch, since EventSource cannot send the Authorization header),
+    // reconnecting until it completes or fails. Servers without ASGI answer
+    // with the JSON state instead, which is then polled at the same interval.
+    // Returns a function that stops it.
+    watchTranscodeProgress: (
+        lessonId: number,
+        onUpdate: (progress: TranscodeProgress) => void
+    ): (() => void) => {
+        const controller = new AbortController();
+        const follow = async (): Promise<void> => {
+            let status = '';
+            try {
+                const response = await fetch(`${API_URL}/api/v1/lessons/${lessonId}/progress/`, {
+                    headers: {
+                        Accept: 'text/event-stream',
+                        Authorization: `Bearer ${localStorage.getItem('token')}`,
+                    },
+                    signal: controller.signal,
+                });
+                if (!response.ok || !response.body) return;
+                if (response.headers.get('Content-Type')?.startsWith('application/json')) {
+                    const progress: TranscodeProgress = await response.json();
+                    status = progress.status;
+                    onUpdate(progress);
+                } else {
+                    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+                    let buffer = '';
+                    for (;;) {
+                        const { value, done } = await reader.read();
+                        if (done) break;
+                        const events = (buffer + value).split('\n\n');
+                        buffer = events.pop() || '';
+                        events.filter((event) => event.startsWith('data: ')).forEach((event) => {
+                            const progress: TranscodeProgress = JSON.parse(event.slice(6));
+                            status = progress.status;
+                            onUpdate(progress);
+                        });
+                    }
+                }
+            } catch {
+                if (controller.signal.aborted) return;
+            }
+            if (status !== 'COMPLETED' && status !== 'FAILED' && !controller.signal.aborted) {
+                setTimeout(follow, 2000);
+            }
+        };
+        follow();
+        return () => controller.abort();
+    },
+
     deleteLesson: async (id: number): Promise<void> => {
         await api.delete(`/lessons/${id}/`);
     },
@@ -183,13 +354,12 @@ export const lmsService = {
 
         // VideoLesson
         if (data.resourcetype === 'VideoLesson') {
-            if (data.source_file instanceof File) formData.append('source_file', data.source_file);
             if (data.video_url) formData.append('video_url', data.video_url);
         }
 
         // DocumentLesson (PDF, DOCX, XLSX)
         if (data.resourcetype === 'DocumentLesson' && data.file instanceof File) {
-            formData.append('file', data.file);
+            await appendDocument(formData, data.file);
         }
 
         // LiveLesson
@@ -222,6 +392,10 @@ export const lmsService = {
                 'Content-Type': 'multipart/form-data',
             },
         });
+        if (data.resourcetype === 'VideoLesson' && data.source_file instanceof File) {
+            await lmsService.uploadVideo(id, data.source_file);
+            return { ...response.data, processing_status: 'PENDING' };
+        }
         return response.data;
     }
 };
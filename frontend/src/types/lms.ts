@@ -6,6 +6,13 @@ export interface Category {
     icon?: string;
 }
 
+export interface TranscodeProgress {
+    status: 'PENDING' | 'PROCESSING' | 'COMPLETED' | 'FAILED';
+    percent: number | null;
+    eta_seconds: number | null;
+    updated_at: number | null;
+}
+
 export interface Lesson {
     id: number;
     title: string;